@@ -82,6 +82,26 @@ export interface YieldPredictionResponse {
   };
 }
 
+export interface FieldReportSectionError {
+  error: string;
+  status: number;
+  retry_after?: number;
+}
+
+export type FieldReportRequest = Partial<
+  CropRecommendationRequest & YieldPredictionRequest & { cropname: string }
+>;
+
+export interface FieldReportResponse {
+  crop?: CropRecommendationResponse;
+  fertilizer?: FertilizerRecommendationResponse;
+  yield?: YieldPredictionResponse;
+  disease?: DiseaseDetectionResponse;
+  sections: string[];
+  errors: Record<string, FieldReportSectionError>;
+  partial: boolean;
+}
+
 export interface ApiError {
   error: string;
 }
@@ -91,7 +111,8 @@ export type ApiResponse<T> = T | ApiError;
 // API Functions
 async function apiCall<T>(
   endpoint: string,
-  data: Record<string, any> | File
+  data: Record<string, any> | File,
+  image?: File
 ): Promise<ApiResponse<T>> {
   try {
     const formData = new FormData();
@@ -100,7 +121,12 @@ async function apiCall<T>(
       formData.append("image", data);
     } else {
       for (const [key, value] of Object.entries(data)) {
-        formData.append(key, String(value));
+        if (value !== undefined) {
+          formData.append(key, String(value));
+        }
+      }
+      if (image) {
+        formData.append("image", image);
       }
     }
 
@@ -140,3 +166,11 @@ export const predictYield = (
   data: YieldPredictionRequest
 ): Promise<ApiResponse<YieldPredictionResponse>> =>
   apiCall<YieldPredictionResponse>("/predict-yield", data);
+
+// One request for every section of a field page; sections whose fields are
+// missing are skipped and failed ones are listed under `errors`
+export const getFieldReport = (
+  data: FieldReportRequest,
+  image?: File
+): Promise<ApiResponse<FieldReportResponse>> =>
+  apiCall<FieldReportResponse>("/field-report", data, image);
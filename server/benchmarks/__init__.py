@@ -0,0 +1,3 @@
+"""
+Benchmarks for the Agricultural ML API
+"""
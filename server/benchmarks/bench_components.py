@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the pieces behind each endpoint
+
+Times the crop scaler/model calls, fertilizer lookups, disease info
+lookups, image decoding, model_prediction and the yield preprocessor/model
+in isolation, so a regression shows up in the component that caused it.
+
+Usage:
+    python benchmarks/bench_components.py [--calls 500] [--output results/components.json]
+"""
+import argparse
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_endpoints import PayloadFactory
+from benchmarks.harness import summarize, time_calls, synthetic_image, run_metadata, write_results, compare, print_summary
+from config.settings import (
+    CROP_CLASSES, FERTILIZER_DATA_PATH, PLANT_DISEASE_DATA_PATH, DISEASE_CLASSES_PATH,
+    DISEASE_CLASS_NAMES
+)
+from src.api.routes import (
+    CROP_FEATURE_FIELDS, crop_prediction_batch, model_prediction, load_disease_info, yield_prediction_batch
+)
+from src.utils.disease_catalog import DiseaseCatalog
+from src.utils.fertilizer_kb import FertilizerKnowledgeBase
+from src.utils.image_preprocessing import ImagePreprocessor
+from src.utils.model_loader import ModelLoader
+from src.utils.yield_engine import CompiledYieldModel
+
+
+def bench_crop(loader, payloads, calls):
+    scaler = loader.get_model('crop_scaler')
+    model = loader.get_model('crop_model')
+    rows = [np.array([[payloads.crop(i)[0][field] for field in CROP_FEATURE_FIELDS]], dtype=np.float64)
+            for i in range(calls)]
+    batch = np.vstack(rows)
+    return {
+        "scaler_transform": summarize(time_calls(scaler.transform, rows)),
+        "scaler_and_predict": summarize(time_calls(
+            lambda row: CROP_CLASSES.get(model.predict(scaler.transform(row))[0]), rows
+        )),
+        f"batch_{len(batch)}_rows": summarize(time_calls(lambda _: crop_prediction_batch(batch, loader), [None] * 20)),
+    }
+
+
+def bench_fertilizer(payloads, calls):
+    kb = FertilizerKnowledgeBase(FERTILIZER_DATA_PATH)
+    inputs = [payloads.fertilizer(i)[0] for i in range(calls)]
+    return {
+        "recommend": summarize(time_calls(
+            lambda form: kb.recommend(form['cropname'], form['nitrogen'], form['phosphorous'], form['pottasium']),
+            inputs
+        ))
+    }
+
+
+def bench_disease_info(calls):
+    catalog = DiseaseCatalog(DISEASE_CLASS_NAMES, PLANT_DISEASE_DATA_PATH, DISEASE_CLASSES_PATH)
+    classes = [DISEASE_CLASS_NAMES[i % len(DISEASE_CLASS_NAMES)] for i in range(calls)]
+    return {
+        "load_disease_info_file_scan": summarize(time_calls(load_disease_info, classes[:min(calls, 100)])),
+        "load_disease_info_catalog": summarize(time_calls(lambda name: load_disease_info(name, catalog), classes)),
+        "catalog_response_for": summarize(time_calls(
+            catalog.response_for, [i % len(DISEASE_CLASS_NAMES) for i in range(calls)]
+        )),
+    }
+
+
+def bench_image_decode(calls, seed):
+    rng = np.random.default_rng(seed)
+    preprocessor = ImagePreprocessor()
+    results = {}
+    for name, size, fmt in (('jpeg_256', 256, 'JPEG'), ('jpeg_1024', 1024, 'JPEG'),
+                            ('jpeg_3000', 3000, 'JPEG'), ('png_256', 256, 'PNG')):
+        images = [synthetic_image(rng, (size, size), fmt) for _ in range(4)]
+        n_calls = calls if size <= 1024 else max(10, calls // 20)
+        results[name] = summarize(time_calls(preprocessor.preprocess, [images[i % 4] for i in range(n_calls)]))
+    return results
+
+
+def bench_model_prediction(loader, payloads, calls):
+    if not loader.is_model_available('disease_model'):
+        return {"skipped": "disease model not available"}
+    images = [payloads.disease(i)[1][0][2] for i in range(calls)]
+    return {
+        "model_prediction": summarize(time_calls(lambda image: model_prediction(image, loader), images)),
+    }
+
+
+def bench_yield(loader, payloads, calls):
+    preprocessor = loader.get_model('yield_preprocessor')
+    model = loader.get_model('yield_model')
+    engine = CompiledYieldModel.from_sklearn(preprocessor, model)
+    forms = [payloads.yield_(i)[0] for i in range(calls)]
+    rows = [np.array([[form['Year'], form['average_rain_fall_mm_per_year'], form['pesticides_tonnes'],
+                       form['avg_temp'], form['Area'], form['Item']]], dtype=object) for form in forms]
+    batch = np.vstack(rows)
+    numeric = batch[:, :4].astype(np.float64)
+    return {
+        "preprocessor_transform": summarize(time_calls(preprocessor.transform, rows)),
+        "sklearn_transform_and_predict": summarize(time_calls(
+            lambda row: model.predict(preprocessor.transform(row))[0], rows
+        )),
+        "compiled_predict_one": summarize(time_calls(lambda row: engine.predict_one(*row[0]), rows)),
+        f"sklearn_batch_{len(batch)}_rows": summarize(time_calls(
+            lambda _: yield_prediction_batch(numeric, batch[:, 4], batch[:, 5], loader), [None] * 20
+        )),
+        f"compiled_batch_{len(batch)}_rows": summarize(time_calls(
+            lambda _: engine.predict(numeric, batch[:, 4], batch[:, 5]), [None] * 20
+        )),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=500, help='timed calls per component')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    loader = ModelLoader(mode='eager')
+    payloads = PayloadFactory(args.seed)
+
+    results = {
+        "crop": bench_crop(loader, payloads, args.calls),
+        "fertilizer": bench_fertilizer(payloads, args.calls),
+        "disease_info": bench_disease_info(args.calls),
+        "image_decode": bench_image_decode(args.calls, args.seed),
+        "disease_prediction": bench_model_prediction(loader, payloads, args.calls),
+        "yield": bench_yield(loader, payloads, args.calls),
+    }
+    for group, components in results.items():
+        for name, summary in components.items():
+            if isinstance(summary, dict):
+                print_summary(f"{group}.{name}", summary)
+            else:
+                print(f"{group:<40} skipped ({summary})")
+
+    report = {
+        "metadata": run_metadata({"benchmark": "components", "calls": args.calls}),
+        "results": results
+    }
+    if args.output:
+        write_results(args.output, report)
+    if args.compare:
+        regressions = compare(args.compare, report, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
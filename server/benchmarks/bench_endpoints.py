@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Load-test the prediction endpoints with synthetic inputs
+
+Measures latency percentiles and throughput for /predict-crop,
+/predict-fertilizer, /predict-disease and /predict-yield at each
+concurrency level. Inputs are random, so the prediction caches see
+mostly misses; pass --repeat to send one fixed input per endpoint instead.
+
+Usage:
+    python benchmarks/bench_endpoints.py                            # in-process test client
+    python benchmarks/bench_endpoints.py --url http://127.0.0.1:8000  # running server
+    python benchmarks/bench_endpoints.py --gunicorn                 # start gunicorn locally
+    python benchmarks/bench_endpoints.py --output results/run.json --compare results/base.json
+"""
+import argparse
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.harness import (
+    run_load, synthetic_image, http_post, wait_for_server, run_metadata,
+    write_results, compare, print_summary
+)
+from config.settings import FERTILIZER_DATA_PATH, YIELD_PREPROCESSOR_PATH
+
+ENDPOINTS = ('/predict-crop', '/predict-fertilizer', '/predict-disease', '/predict-yield')
+
+
+class PayloadFactory:
+    """Synthetic form inputs and leaf images for each endpoint"""
+
+    def __init__(self, seed=0, image_size=256, repeat=False):
+        self.seed = seed
+        self.repeat = repeat
+        self.crops = pd.read_csv(FERTILIZER_DATA_PATH)['Crop'].tolist()
+        encoder = joblib.load(YIELD_PREPROCESSOR_PATH).named_transformers_['OneHotEncode']
+        self.areas, self.items = (list(categories) for categories in encoder.categories_)
+        image_rng = np.random.default_rng(seed)
+        self.images = [synthetic_image(image_rng, (image_size, image_size)) for _ in range(1 if repeat else 32)]
+
+    def _rng(self, i):
+        return np.random.default_rng((self.seed, 0 if self.repeat else i))
+
+    def crop(self, i):
+        rng = self._rng(i)
+        return {
+            "Nitrogen": rng.integers(0, 140), "Phosporus": rng.integers(5, 145),
+            "Potassium": rng.integers(5, 205), "Temperature": round(rng.uniform(8, 44), 2),
+            "Humidity": round(rng.uniform(14, 100), 2), "pH": round(rng.uniform(3.5, 9.9), 2),
+            "Rainfall": round(rng.uniform(20, 300), 2)
+        }, ()
+
+    def fertilizer(self, i):
+        rng = self._rng(i)
+        return {
+            "cropname": rng.choice(self.crops), "nitrogen": rng.integers(0, 140),
+            "phosphorous": rng.integers(5, 145), "pottasium": rng.integers(5, 205)
+        }, ()
+
+    def disease(self, i):
+        return {}, [('image', 'leaf.jpg', self.images[i % len(self.images)])]
+
+    def yield_(self, i):
+        rng = self._rng(i)
+        return {
+            "Year": rng.integers(1990, 2014), "average_rain_fall_mm_per_year": round(rng.uniform(50, 3300), 1),
+            "pesticides_tonnes": round(rng.uniform(0, 370000), 1), "avg_temp": round(rng.uniform(1, 31), 2),
+            "Area": rng.choice(self.areas), "Item": rng.choice(self.items)
+        }, ()
+
+    def for_endpoint(self, endpoint):
+        return {
+            '/predict-crop': self.crop, '/predict-fertilizer': self.fertilizer,
+            '/predict-disease': self.disease, '/predict-yield': self.yield_
+        }[endpoint]
+
+
+def in_process_sender(app, endpoint):
+    """Send requests through the Flask test client, one client per thread"""
+    local = threading.local()
+
+    def send(request):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        fields, files = request
+        data = dict(fields)
+        data.update({name: (io.BytesIO(content), filename) for name, filename, content in files})
+        return client.post(endpoint, data=data, content_type='multipart/form-data').status_code == 200
+
+    return send
+
+
+def http_sender(url, endpoint):
+    def send(request):
+        fields, files = request
+        return http_post(f"{url}{endpoint}", fields, files) == 200
+    return send
+
+
+def start_gunicorn(port, workers, env=None):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), **(env or {}))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+        cwd=project_root, env=env, start_new_session=True
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for_server(url)
+    except Exception:
+        stop_gunicorn(process)
+        raise
+    return process, url
+
+
+def stop_gunicorn(process):
+    # Signal the whole session so workers exit with the master
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='benchmark an already running server')
+    target.add_argument('--gunicorn', action='store_true', help='start gunicorn with gunicorn.conf.py')
+    parser.add_argument('--port', type=int, default=8765, help='port for --gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for --gunicorn')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma-separated endpoints')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint and concurrency level')
+    parser.add_argument('--image-size', type=int, default=256, help='side of the generated leaf images')
+    parser.add_argument('--repeat', action='store_true', help='send the same input every time (cache hits)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(',') if endpoint.strip()]
+    levels = [int(level) for level in args.concurrency.split(',')]
+    payloads = PayloadFactory(args.seed, args.image_size, args.repeat)
+
+    process = None
+    if args.gunicorn:
+        process, url = start_gunicorn(args.port, args.workers)
+        target = f"gunicorn ({args.workers} workers)"
+    else:
+        url = args.url
+        target = url or "in-process test client"
+
+    app = None
+    if not url:
+        from src.app import create_app
+        app = create_app()
+
+    results = {}
+    try:
+        for endpoint in endpoints:
+            send = http_sender(url, endpoint) if url else in_process_sender(app, endpoint)
+            make_request = payloads.for_endpoint(endpoint)
+
+            # Probe once so unavailable models are reported instead of timed
+            if not send(make_request(0)):
+                print(f"{endpoint:<40} skipped (probe request failed; is the model available?)")
+                results[endpoint] = {"skipped": "probe request failed"}
+                continue
+
+            results[endpoint] = {}
+            for level in levels:
+                summary = run_load(send, make_request, args.requests, level)
+                results[endpoint][f"concurrency_{level}"] = summary
+                print_summary(f"{endpoint} x{level}", summary)
+    finally:
+        if process is not None:
+            stop_gunicorn(process)
+
+    report = {
+        "metadata": run_metadata({
+            "benchmark": "endpoints", "target": target, "requests": args.requests,
+            "concurrency": levels, "image_size": args.image_size, "repeat_inputs": args.repeat
+        }),
+        "results": results
+    }
+    if args.output:
+        write_results(args.output, report)
+    if args.compare:
+        regressions = compare(args.compare, report, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Find the gunicorn worker x thread layout that serves the most requests on this machine
+
+For a core budget, tries every split into worker processes and threads
+per worker (1 x N, 2 x N/2, ..., N x 1). Each layout starts gunicorn with
+WEB_CONCURRENCY and GUNICORN_THREADS set, and sizes the TensorFlow and
+BLAS/OpenMP pools to the cores each worker owns (TF_INTRA_OP_THREADS,
+INFERENCE_BLAS_THREADS), so the processes do not oversubscribe the CPU.
+Every endpoint is then loaded at a fixed client concurrency and the best
+layout per endpoint is reported.
+
+Usage:
+    python benchmarks/bench_layout.py                          # all cores, every split
+    python benchmarks/bench_layout.py --cores 8 --layouts 2x4,4x2,8x1
+    python benchmarks/bench_layout.py --output results/layout.json
+"""
+import argparse
+import os
+import sys
+import warnings
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_endpoints import (
+    ENDPOINTS, PayloadFactory, http_sender, start_gunicorn, stop_gunicorn
+)
+from benchmarks.harness import run_load, run_metadata, write_results, print_summary
+
+
+def layouts_for(cores):
+    """Every (workers, threads) split whose product is ``cores``"""
+    return [(workers, cores // workers) for workers in range(1, cores + 1) if cores % workers == 0]
+
+
+def parse_layouts(text):
+    layouts = []
+    for item in text.split(','):
+        workers, threads = item.lower().split('x')
+        layouts.append((int(workers), int(threads)))
+    return layouts
+
+
+def layout_env(workers, threads, cores):
+    """Environment for one layout: request threads plus native pools sized to each worker's cores"""
+    per_worker = str(max(1, cores // workers))
+    return {
+        'GUNICORN_THREADS': str(threads),
+        'TF_INTRA_OP_THREADS': per_worker,
+        'TF_INTER_OP_THREADS': '1',
+        'INFERENCE_BLAS_THREADS': per_worker
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cores', type=int, default=os.cpu_count(), help='cores to divide between workers')
+    parser.add_argument('--layouts', help='comma-separated WORKERSxTHREADS layouts (default: every split of --cores)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma-separated endpoints')
+    parser.add_argument('--concurrency', type=int, help='client threads per endpoint (default: 2 x cores)')
+    parser.add_argument('--requests', type=int, default=400, help='requests per endpoint and layout')
+    parser.add_argument('--image-size', type=int, default=256, help='side of the generated leaf images')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    layouts = parse_layouts(args.layouts) if args.layouts else layouts_for(args.cores)
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(',') if endpoint.strip()]
+    concurrency = args.concurrency or 2 * args.cores
+    payloads = PayloadFactory(args.seed, args.image_size)
+
+    results = {}
+    for workers, threads in layouts:
+        name = f"{workers}x{threads}"
+        env = layout_env(workers, threads, args.cores)
+        process, url = start_gunicorn(args.port, workers, env)
+        results[name] = {"workers": workers, "threads": threads, "env": env, "endpoints": {}}
+        try:
+            for endpoint in endpoints:
+                send = http_sender(url, endpoint)
+                make_request = payloads.for_endpoint(endpoint)
+                if not send(make_request(0)):
+                    print(f"{name} {endpoint:<32} skipped (probe request failed; is the model available?)")
+                    results[name]["endpoints"][endpoint] = {"skipped": "probe request failed"}
+                    continue
+                summary = run_load(send, make_request, args.requests, concurrency)
+                results[name]["endpoints"][endpoint] = summary
+                print_summary(f"{name} {endpoint}", summary)
+        finally:
+            stop_gunicorn(process)
+
+    best = {}
+    for endpoint in endpoints:
+        timed = [(result["endpoints"][endpoint]["throughput_rps"], name) for name, result in results.items()
+                 if "throughput_rps" in result["endpoints"].get(endpoint, {})]
+        if timed:
+            throughput, name = max(timed)
+            best[endpoint] = name
+            print(f"best for {endpoint:<28} {name:>6}  {throughput:9.1f} req/s")
+
+    report = {
+        "metadata": run_metadata({
+            "benchmark": "layout", "cores": args.cores, "concurrency": concurrency,
+            "requests": args.requests, "image_size": args.image_size
+        }),
+        "results": results,
+        "best": best
+    }
+    if args.output:
+        write_results(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
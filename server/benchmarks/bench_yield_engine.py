@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled yield engine against the sklearn preprocessor + tree
+
+Usage:
+    python benchmarks/bench_yield_engine.py [--rows 2000] [--batch 10000]
+"""
+import argparse
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import YIELD_MODEL_PATH, YIELD_PREPROCESSOR_PATH
+from src.utils.yield_engine import CompiledYieldModel
+
+def random_rows(preprocessor, n_rows, seed=0):
+    """Generate random yield inputs as the object array the sklearn path expects"""
+    rng = np.random.default_rng(seed)
+    areas, items = preprocessor.named_transformers_['OneHotEncode'].categories_
+    rows = np.empty((n_rows, 6), dtype=object)
+    rows[:, 0] = rng.integers(1990, 2014, n_rows)
+    rows[:, 1] = rng.uniform(50, 3300, n_rows)
+    rows[:, 2] = rng.uniform(0, 370000, n_rows)
+    rows[:, 3] = rng.uniform(1, 31, n_rows)
+    rows[:, 4] = rng.choice(areas, n_rows)
+    rows[:, 5] = rng.choice(items, n_rows)
+    return rows
+
+def time_calls(fn, rows):
+    """Time fn on each row, returning per-call latencies in microseconds"""
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        fn(row)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+def summarize(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<22} mean {statistics.mean(latencies):9.1f} us   "
+          f"p50 {statistics.median(latencies):9.1f} us   p99 {p99:9.1f} us")
+    return statistics.mean(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000, help='single-row calls to time per engine')
+    parser.add_argument('--batch', type=int, default=10000, help='rows in the batch comparison')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    preprocessor = joblib.load(YIELD_PREPROCESSOR_PATH)
+    model = joblib.load(YIELD_MODEL_PATH)
+    engine = CompiledYieldModel.from_sklearn(preprocessor, model)
+
+    # Parity check before timing anything
+    rows = random_rows(preprocessor, args.batch)
+    expected = model.predict(preprocessor.transform(rows))
+    compiled = engine.predict(rows[:, :4].astype(np.float64), rows[:, 4], rows[:, 5])
+    mismatches = int(np.sum(expected != compiled))
+    print(f"Parity: {len(rows) - mismatches}/{len(rows)} identical predictions")
+    if mismatches:
+        sys.exit(1)
+
+    print(f"\nSingle-row latency ({args.rows} calls)")
+    single_rows = rows[:args.rows]
+    sklearn_mean = summarize(
+        "sklearn", time_calls(lambda row: model.predict(preprocessor.transform(row.reshape(1, -1)))[0], single_rows)
+    )
+    compiled_mean = summarize("compiled predict_one", time_calls(lambda row: engine.predict_one(*row), single_rows))
+    print(f"Speedup: {sklearn_mean / compiled_mean:.1f}x")
+
+    print(f"\nBatch throughput ({len(rows)} rows)")
+    start = time.perf_counter()
+    model.predict(preprocessor.transform(rows))
+    sklearn_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    engine.predict(rows[:, :4].astype(np.float64), rows[:, 4], rows[:, 5])
+    compiled_batch = time.perf_counter() - start
+    print(f"sklearn  {sklearn_batch * 1e3:8.1f} ms   ({len(rows) / sklearn_batch:,.0f} rows/s)")
+    print(f"compiled {compiled_batch * 1e3:8.1f} ms   ({len(rows) / compiled_batch:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
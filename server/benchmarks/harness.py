@@ -0,0 +1,211 @@
+"""
+Shared timing, load generation and result helpers for the benchmarks
+"""
+import io
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def summarize(latencies_ms, elapsed=None, errors=0):
+    """Latency percentiles in milliseconds, plus throughput when the wall time is known"""
+    latencies = np.asarray(latencies_ms, dtype=np.float64)
+    summary = {"requests": int(latencies.size), "errors": int(errors)}
+    if latencies.size:
+        summary["mean_ms"] = float(latencies.mean())
+        summary.update({f"p{p}_ms": float(np.percentile(latencies, p)) for p in PERCENTILES})
+        summary["max_ms"] = float(latencies.max())
+    if elapsed:
+        summary["throughput_rps"] = latencies.size / elapsed
+    return summary
+
+
+def time_calls(fn, inputs, warmup=3):
+    """Call fn on each input in turn, returning per-call latencies in milliseconds"""
+    for item in inputs[:warmup]:
+        fn(item)
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return latencies
+
+
+def run_load(send, make_request, requests, concurrency):
+    """Send ``requests`` requests from ``concurrency`` threads
+
+    ``make_request(i)`` builds request i and ``send(request)`` returns True
+    on success. Each thread keeps its own sender state via ``send``.
+    """
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        nonlocal errors
+        own_latencies, own_errors = [], 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            request = make_request(i)
+            start = time.perf_counter()
+            try:
+                ok = send(request)
+            except Exception:
+                ok = False
+            own_latencies.append((time.perf_counter() - start) * 1e3)
+            own_errors += not ok
+        with lock:
+            latencies.extend(own_latencies)
+            errors += own_errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def synthetic_image(rng, size=(256, 256), fmt='JPEG'):
+    """Encode a random leaf-coloured image"""
+    base = np.array([60, 140, 50], dtype=np.int16)
+    pixels = np.clip(base + rng.integers(-50, 50, size=(size[1], size[0], 3)), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt, quality=90)
+    return buffer.getvalue()
+
+
+def encode_multipart(fields, files):
+    """Encode form fields and (name, filename, bytes) files as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, content in files:
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                   f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode())
+        body.write(content)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def http_post(url, fields=None, files=(), timeout=60):
+    """POST a form to a running server, returning the status code"""
+    body, content_type = encode_multipart(fields or {}, files)
+    return http_post_body(url, body, content_type, timeout)[0]
+
+
+def http_post_body(url, body, content_type, timeout=60):
+    """POST a raw body to a running server, returning the status code and response body"""
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def wait_for_server(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout}s")
+
+
+def run_metadata(extra=None):
+    """Describe the machine, code revision and settings a run was taken on"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).parent, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    metadata = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    metadata.update(extra or {})
+    return metadata
+
+
+def write_results(path, results):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {path}")
+
+
+def flatten(results, prefix=''):
+    """Flatten nested result dicts to {"a.b.p50_ms": value}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline_path, results, threshold=0.10):
+    """Print latency and throughput changes against a baseline results file
+
+    Returns the metrics that regressed by more than ``threshold``.
+    """
+    with open(baseline_path) as f:
+        baseline = flatten(json.load(f).get("results", {}))
+    current = flatten(results.get("results", {}))
+
+    regressions = []
+    print(f"\nComparison against {baseline_path}")
+    for name in sorted(set(baseline) & set(current)):
+        if not (name.endswith('_ms') or name.endswith('_rps')) or not baseline[name]:
+            continue
+        change = (current[name] - baseline[name]) / baseline[name]
+        # Lower latency is better, higher throughput is better
+        worse = change > threshold if name.endswith('_ms') else change < -threshold
+        marker = '  REGRESSION' if worse else ''
+        print(f"{name:<60} {baseline[name]:12.3f} -> {current[name]:12.3f} ({change:+.1%}){marker}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def print_summary(name, summary):
+    if not summary.get("requests"):
+        print(f"{name:<40} skipped")
+        return
+    line = (f"{name:<40} p50 {summary['p50_ms']:8.2f} ms  p95 {summary['p95_ms']:8.2f} ms  "
+            f"p99 {summary['p99_ms']:8.2f} ms")
+    if "throughput_rps" in summary:
+        line += f"  {summary['throughput_rps']:9.1f} req/s"
+    if summary.get("errors"):
+        line += f"  errors {summary['errors']}"
+    print(line)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Replay logged prediction traffic against the server or the offline batch engine
+
+Reads the files written with PREDICTION_LOG_ENABLED and sends every logged
+request again: at the recorded pace (--speed 1), faster (--speed 10 sends
+ten times the recorded rate) or as fast as --concurrency allows (--speed 0).
+Latency is measured from each request's scheduled time, so a server that
+falls behind the recorded rate shows it as queueing. Responses are compared
+with the logged ones, ignoring model versions, to count predictions that a
+new model version or configuration changes.
+
+Disease requests were logged with image hashes only; pass --images with a
+directory of the original images to replay them, otherwise they are skipped.
+--target batch instead feeds the logged crop, fertilizer and yield inputs
+through the score.py scorers in chunks and reports rows per second.
+
+Usage:
+    python benchmarks/replay.py logs/predictions                          # in-process test client
+    python benchmarks/replay.py logs/predictions --url http://127.0.0.1:8000 --speed 5
+    python benchmarks/replay.py logs/predictions --gunicorn --workers 4 --speed 0 --concurrency 32
+    python benchmarks/replay.py logs/predictions --target batch --batch-rows 50000
+"""
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_endpoints import start_gunicorn, stop_gunicorn
+from benchmarks.harness import (
+    summarize, encode_multipart, http_post_body, run_metadata, write_results, compare, print_summary
+)
+from src.utils.image_cache import content_hash
+from src.utils.prediction_log import read_prediction_log
+
+# Logged endpoints whose inputs the offline scorers accept, by score.py task
+BATCH_TASKS = {
+    '/predict-crop': 'crop', '/predict-crop/batch': 'crop', '/predict-fertilizer': 'fertilizer',
+    '/predict-yield': 'yield', '/predict-yield/batch': 'yield'
+}
+
+# Response keys that are expected to differ between the logged run and a replay
+IGNORED_KEYS = frozenset({'model_version'})
+
+
+def load_images(directory):
+    """Map content hash to bytes for every file below a directory"""
+    images = {}
+    for path in Path(directory).rglob('*'):
+        if path.is_file():
+            content = path.read_bytes()
+            images[content_hash(content)] = content
+    return images
+
+
+def build_request(row, images):
+    """(path, body, content type) re-creating a logged request, or None when it cannot be replayed"""
+    path = row.endpoint + (f"?{row.query}" if row.query else '')
+    if row.input_format in ('json', 'csv'):
+        if not row.inputs:
+            return None
+        content_type = 'application/json' if row.input_format == 'json' else 'text/csv'
+        return path, row.inputs.encode('utf-8'), content_type
+
+    files = []
+    for image_hash in filter(None, row.image_hash.split(',')):
+        if image_hash not in images:
+            return None
+        files.append(('image', 'image', images[image_hash]))
+    body, content_type = encode_multipart(json.loads(row.inputs or '{}'), files)
+    return path, body, content_type
+
+
+def without_ignored(value):
+    if isinstance(value, dict):
+        return {key: without_ignored(item) for key, item in value.items() if key not in IGNORED_KEYS}
+    if isinstance(value, list):
+        return [without_ignored(item) for item in value]
+    return value
+
+
+def prediction_changed(logged, replayed):
+    """Whether a replayed response differs from the logged one; None when nothing was logged to compare"""
+    if not logged:
+        return None
+    try:
+        return without_ignored(json.loads(logged)) != without_ignored(json.loads(replayed))
+    except ValueError:
+        return None
+
+
+def in_process_sender(app):
+    """Send requests through the Flask test client, one client per thread"""
+    local = threading.local()
+
+    def send(path, body, content_type):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.post(path, data=body, content_type=content_type)
+        return response.status_code, response.get_data()
+
+    return send
+
+
+def http_sender(url):
+    def send(path, body, content_type):
+        return http_post_body(f"{url}{path}", body, content_type)
+    return send
+
+
+def replay(send, requests, speed, concurrency):
+    """Send each (row, request) at its recorded offset divided by ``speed``, or at once when speed is 0
+
+    Returns per-request (endpoint, latency_ms, status_changed, prediction_changed)
+    tuples and the wall time.
+    """
+    start_time = requests[0][0].timestamp if requests else 0.0
+    outcomes = [None] * len(requests)
+
+    def call(i, row, request, scheduled):
+        started = time.perf_counter() if scheduled is None else scheduled
+        try:
+            status, body = send(*request)
+        except Exception:
+            status, body = None, b''
+        latency = (time.perf_counter() - started) * 1e3
+        changed = prediction_changed(row.outputs, body) if status == row.status == 200 else None
+        outcomes[i] = (row.endpoint, latency, status != row.status, changed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for i, (row, request) in enumerate(requests):
+            scheduled = None
+            if speed > 0:
+                scheduled = started + (row.timestamp - start_time) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            executor.submit(call, i, row, request, scheduled)
+    return outcomes, time.perf_counter() - started
+
+
+def summarize_replay(outcomes, elapsed, skipped):
+    results = {}
+    for endpoint in sorted({outcome[0] for outcome in outcomes}):
+        own = [outcome for outcome in outcomes if outcome[0] == endpoint]
+        summary = summarize([latency for _, latency, _, _ in own], elapsed, sum(status for _, _, status, _ in own))
+        compared = [changed for _, _, _, changed in own if changed is not None]
+        summary["compared"] = len(compared)
+        summary["predictions_changed"] = sum(compared)
+        results[endpoint] = summary
+    total = summarize([latency for _, latency, _, _ in outcomes], elapsed, sum(outcome[2] for outcome in outcomes))
+    total["skipped"] = skipped
+    results["all"] = total
+    return results
+
+
+def logged_records(row):
+    """Input records of one logged request, for the offline scorers"""
+    if row.input_format == 'csv':
+        return pd.read_csv(io.StringIO(row.inputs), dtype=str, skipinitialspace=True).to_dict('records')
+    payload = json.loads(row.inputs)
+    if isinstance(payload, dict) and isinstance(payload.get('samples'), list):
+        payload = payload['samples']
+    if isinstance(payload, dict) and payload and all(isinstance(column, list) for column in payload.values()):
+        return pd.DataFrame(payload).to_dict('records')
+    return payload if isinstance(payload, list) else [payload]
+
+
+def replay_batch(log, batch_rows, top_k_classes):
+    """Score the logged inputs of each task through its score.py scorer, batch_rows rows at a time"""
+    from score import build_scorer
+
+    results = {}
+    for task in ('crop', 'fertilizer', 'yield'):
+        rows = log[log['endpoint'].map(BATCH_TASKS).eq(task) & log['inputs'].ne('')]
+        records = [record for row in rows.itertuples(index=False) for record in logged_records(row)]
+        if not records:
+            continue
+        frame = pd.DataFrame.from_records(records)
+        scorer = build_scorer(task, top_k_classes)
+        scorer(frame.iloc[:1])
+
+        latencies = []
+        started = time.perf_counter()
+        for offset in range(0, len(frame), batch_rows):
+            chunk_started = time.perf_counter()
+            scorer(frame.iloc[offset:offset + batch_rows])
+            latencies.append((time.perf_counter() - chunk_started) * 1e3)
+        elapsed = time.perf_counter() - started
+        results[task] = {**summarize(latencies, elapsed), "rows": len(frame), "row_throughput_rps": len(frame) / elapsed}
+        print(f"{task:<12} {len(frame):>9} rows  {len(frame) / elapsed:12.1f} rows/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('logs', nargs='+', help='prediction log files or directories')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='replay against an already running server')
+    target.add_argument('--gunicorn', action='store_true', help='start gunicorn with gunicorn.conf.py')
+    parser.add_argument('--target', choices=('server', 'batch'), default='server',
+                        help='server replays requests; batch scores the logged inputs with score.py')
+    parser.add_argument('--port', type=int, default=8765, help='port for --gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for --gunicorn')
+    parser.add_argument('--speed', type=float, default=1.0, help='multiple of the recorded rate; 0 sends as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=16, help='requests in flight at most')
+    parser.add_argument('--endpoints', help='comma-separated endpoints to replay (default: all logged)')
+    parser.add_argument('--images', help='directory of the original images for disease requests')
+    parser.add_argument('--limit', type=int, help='replay only the first N logged requests')
+    parser.add_argument('--batch-rows', type=int, default=10000, help='rows per scorer call for --target batch')
+    parser.add_argument('--top-k', type=int, default=1, help='top crops scored per row for --target batch')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    log = read_prediction_log(args.logs)
+    if args.endpoints:
+        log = log[log['endpoint'].isin([endpoint.strip() for endpoint in args.endpoints.split(',')])]
+    if args.limit:
+        log = log.iloc[:args.limit]
+    if log.empty:
+        sys.exit("No logged requests to replay")
+    print(f"Replaying {len(log)} logged requests spanning {log['timestamp'].iloc[-1] - log['timestamp'].iloc[0]:.1f}s")
+
+    if args.target == 'batch':
+        results = replay_batch(log, args.batch_rows, args.top_k)
+        target_name = "score.py scorers"
+    else:
+        images = load_images(args.images) if args.images else {}
+        requests = []
+        for row in log.itertuples(index=False):
+            request = build_request(row, images)
+            if request is not None:
+                requests.append((row, request))
+        skipped = len(log) - len(requests)
+
+        process = None
+        if args.gunicorn:
+            process, url = start_gunicorn(args.port, args.workers)
+            target_name = f"gunicorn ({args.workers} workers)"
+        else:
+            url = args.url
+            target_name = url or "in-process test client"
+        try:
+            if url:
+                send = http_sender(url)
+            else:
+                from src.app import create_app
+                send = in_process_sender(create_app())
+            outcomes, elapsed = replay(send, requests, args.speed, args.concurrency)
+        finally:
+            if process is not None:
+                stop_gunicorn(process)
+
+        results = summarize_replay(outcomes, elapsed, skipped)
+        for endpoint, summary in results.items():
+            print_summary(endpoint, summary)
+            if summary.get("compared"):
+                print(f"{'':<40} {summary['predictions_changed']} of {summary['compared']} predictions changed")
+        if skipped:
+            print(f"Skipped {skipped} requests that cannot be replayed (bodies over the log limit or missing images)")
+
+    report = {
+        "metadata": run_metadata({
+            "benchmark": "replay", "target": target_name, "logged_requests": len(log),
+            "speed": args.speed, "concurrency": args.concurrency
+        }),
+        "results": results
+    }
+    if args.output:
+        write_results(args.output, report)
+    if args.compare:
+        regressions = compare(args.compare, report, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Build the crop recommendation lookup index and report its agreement with the model
+
+Usage:
+    python build_crop_index.py --points 200000 --neighbours 8
+
+Samples representative inputs, labels them with crop_recommendation_model.pkl
+and StandardScaler.pkl, and writes a KD-tree next to those files. The index
+only serves the exact model files it was built from; rebuild it after the
+crop model changes and reload the crop group (POST /models/reload) to use it.
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import joblib
+
+from config.settings import CROP_MODEL_PATH, CROP_SCALER_PATH, CROP_INDEX_PATH, CROP_INDEX_NEIGHBOURS
+from src.utils.crop_index import CropLookupIndex
+from src.utils.model_loader import file_fingerprint
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=CROP_MODEL_PATH, help='crop classifier to label points with')
+    parser.add_argument('--scaler', default=CROP_SCALER_PATH, help='feature scaler fitted with the classifier')
+    parser.add_argument('--output', help=f'index file (default: {CROP_INDEX_PATH.name} next to --model)')
+    parser.add_argument('--points', type=int, default=200000, help='labelled points in the index')
+    parser.add_argument('--neighbours', type=int, default=CROP_INDEX_NEIGHBOURS,
+                        help='neighbours that must agree before exact mode answers from the index')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    model, scaler = joblib.load(args.model), joblib.load(args.scaler)
+    index = CropLookupIndex.build(
+        model, scaler, file_fingerprint([args.model, args.scaler]),
+        n_points=args.points, neighbours=args.neighbours, seed=args.seed
+    )
+    output = Path(args.output) if args.output else Path(args.model).with_name(CROP_INDEX_PATH.name)
+    index.save(output)
+
+    print(f"Wrote {output} ({args.points} points, built in {index.metadata['build_seconds']:.1f}s)")
+    print(f"Rows farther than {index.max_distance:.3f} (scaled) from every point fall back to the model")
+    print(json.dumps(index.metadata['agreement'], indent=2))
+
+if __name__ == "__main__":
+    main()
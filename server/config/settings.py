@@ -16,27 +16,220 @@ LOGS_DIR = BASE_DIR / "logs"
 CROP_MODEL_PATH = MODELS_DIR / "crop_recommendation_model.pkl"
 CROP_SCALER_PATH = MODELS_DIR / "StandardScaler.pkl"
 DISEASE_MODEL_PATH = MODELS_DIR / "trained_model.h5"
+DISEASE_TFLITE_MODEL_PATH = Path(os.getenv('DISEASE_TFLITE_MODEL_PATH', MODELS_DIR / "trained_model.tflite"))
 DISEASE_CLASSES_PATH = MODELS_DIR / "plant_disease.json"
 YIELD_MODEL_PATH = MODELS_DIR / "dtr.pkl"
 YIELD_PREPROCESSOR_PATH = MODELS_DIR / "preprocesser.pkl"
+# Optional nearest-neighbour index answering /predict-crop without sklearn,
+# built by build_crop_index.py next to the crop model files. 'exact' answers
+# from the index only where the CROP_INDEX_NEIGHBOURS nearest labelled points
+# agree and falls back to the model near decision boundaries; 'nearest'
+# answers from the nearest point; 'off' ignores it. Rows outside the sampled
+# feature ranges or far from every point always go to the model.
+CROP_INDEX_PATH = MODELS_DIR / "crop_index.joblib"
+CROP_INDEX_MODE = os.getenv('CROP_INDEX_MODE', 'exact')
+CROP_INDEX_NEIGHBOURS = int(os.getenv('CROP_INDEX_NEIGHBOURS', 8))
+
+# Versioned models: <MODEL_REGISTRY_DIR>/<group>/<version>/ holds a full copy
+# of a group's files, <group>/CURRENT names the active version. Groups without
+# versions use the files above. Each process polls for a changed active
+# version (or changed flat files) every MODEL_WATCH_INTERVAL seconds; 0 disables.
+MODEL_REGISTRY_DIR = Path(os.getenv('MODEL_REGISTRY_DIR', MODELS_DIR / "registry"))
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 10))
+# Token required by POST /models/reload; the endpoint is disabled when unset
+MODEL_ADMIN_TOKEN = os.getenv('MODEL_ADMIN_TOKEN', '')
+
+# Model loading: 'eager' loads everything at startup, 'lazy' loads each model on
+# first use, 'background' warms all models concurrently without blocking startup
+MODEL_LOADING_MODE = os.getenv('MODEL_LOADING_MODE', 'eager').lower()
+MODEL_WARMUP_WORKERS = int(os.getenv('MODEL_WARMUP_WORKERS', 3))
+
+# Disease model backend: 'keras' serves trained_model.h5 through TensorFlow,
+# 'tflite' serves the converted model (see convert_disease_model.py) through
+# the TFLite interpreter
+DISEASE_MODEL_BACKEND = os.getenv('DISEASE_MODEL_BACKEND', 'keras').lower()
+DISEASE_TFLITE_THREADS = int(os.getenv('DISEASE_TFLITE_THREADS', 0)) or None
+# Keras backend execution: 'predict' calls Model.predict, 'function' (default)
+# runs the forward pass as one compiled tf.function call, 'per_thread' gives
+# each inference thread its own compiled copy of the model. per_thread and
+# DISEASE_BATCHING_ENABLED are mutually exclusive: per_thread turns batching
+# off, since the batcher would run every forward pass on one thread.
+DISEASE_KERAS_EXECUTION = os.getenv('DISEASE_KERAS_EXECUTION', 'function').lower()
+
+# Inference threading per process. TensorFlow and the BLAS/OpenMP libraries
+# behind NumPy, SciPy and sklearn each start one thread per core by default,
+# which oversubscribes the CPU once several workers or request threads run
+# inference; 0 keeps the library default. Size them so that
+# workers x (threads per worker) roughly matches the cores
+# (benchmarks/bench_layout.py measures the options).
+TF_INTRA_OP_THREADS = int(os.getenv('TF_INTRA_OP_THREADS', 0))
+TF_INTER_OP_THREADS = int(os.getenv('TF_INTER_OP_THREADS', 0))
+INFERENCE_BLAS_THREADS = int(os.getenv('INFERENCE_BLAS_THREADS', 0))
+
+# Yield engine: 'sklearn' runs the pickled preprocessor and tree, 'compiled'
+# evaluates them as flat NumPy arrays with identical predictions
+YIELD_ENGINE = os.getenv('YIELD_ENGINE', 'sklearn').lower()
+
+# Directory for memory-mapped copies of the joblib models (empty disables).
+# Worker processes then share one copy of the model arrays via the page cache.
+MODEL_MMAP_DIR = os.getenv('MODEL_MMAP_DIR', '')
+
+# Model groups loaded in the gunicorn master before workers fork (see
+# gunicorn.conf.py); remaining groups load lazily in each worker
+PRELOAD_MODEL_GROUPS = [
+    group.strip() for group in os.getenv('PRELOAD_MODEL_GROUPS', 'crop,yield').split(',') if group.strip()
+]
 
 # Data file paths
 FERTILIZER_DATA_PATH = DATA_DIR / "fertilizer.csv"
 PLANT_DISEASE_DATA_PATH = DATA_DIR / "plant_disease_updated.json"
 
+# How often (seconds) data files are checked for changes before reloading
+DATA_RELOAD_CHECK_SECONDS = float(os.getenv('DATA_RELOAD_CHECK_SECONDS', 1.0))
+
 # API Configuration
 DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', 5000))
 
+# Batch prediction limits
+CROP_BATCH_MAX_ROWS = int(os.getenv('CROP_BATCH_MAX_ROWS', 100000))
+YIELD_BATCH_MAX_ROWS = int(os.getenv('YIELD_BATCH_MAX_ROWS', 100000))
+YIELD_GRID_MAX_POINTS = int(os.getenv('YIELD_GRID_MAX_POINTS', 1000000))
+# Grid points scored and streamed per chunk
+YIELD_GRID_CHUNK_ROWS = int(os.getenv('YIELD_GRID_CHUNK_ROWS', 20000))
+
+# Request body limit for every endpoint except job archive uploads; larger
+# bodies are refused with 413 before they are read. Disease images are also
+# refused from their header when they exceed DISEASE_MAX_IMAGE_PIXELS.
+MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+DISEASE_MAX_IMAGE_PIXELS = int(os.getenv('DISEASE_MAX_IMAGE_PIXELS', 40_000_000))
+
+# Disease inference micro-batching
+DISEASE_BATCHING_ENABLED = os.getenv('DISEASE_BATCHING_ENABLED', 'True').lower() == 'true'
+DISEASE_BATCH_MAX_SIZE = int(os.getenv('DISEASE_BATCH_MAX_SIZE', 16))
+DISEASE_BATCH_MAX_WAIT_MS = float(os.getenv('DISEASE_BATCH_MAX_WAIT_MS', 5))
+
+# Bounded inference pools. Disease detection, batch crop and batch/grid yield
+# scoring run on WORKERS threads per model with at most QUEUE more requests
+# waiting; beyond that requests get 429 with a Retry-After estimate, so a
+# flood of slow requests cannot take every server thread from cheap routes.
+INFERENCE_POOLS_ENABLED = os.getenv('INFERENCE_POOLS_ENABLED', 'True').lower() == 'true'
+DISEASE_POOL_WORKERS = int(os.getenv('DISEASE_POOL_WORKERS', 8))
+DISEASE_POOL_QUEUE = int(os.getenv('DISEASE_POOL_QUEUE', 32))
+CROP_POOL_WORKERS = int(os.getenv('CROP_POOL_WORKERS', 2))
+CROP_POOL_QUEUE = int(os.getenv('CROP_POOL_QUEUE', 8))
+YIELD_POOL_WORKERS = int(os.getenv('YIELD_POOL_WORKERS', 2))
+YIELD_POOL_QUEUE = int(os.getenv('YIELD_POOL_QUEUE', 8))
+# Threads allowed inside each model group's inference calls at once, across
+# every route, batcher and job thread (0 = unbounded). Disease inference
+# defaults to one slot per pool thread so DISEASE_KERAS_EXECUTION=per_thread
+# can run its copies side by side; set it to 1 to serialise the model when it
+# already uses every intra-op thread it is given.
+CROP_MODEL_CONCURRENCY = int(os.getenv('CROP_MODEL_CONCURRENCY', 0))
+DISEASE_MODEL_CONCURRENCY = int(os.getenv('DISEASE_MODEL_CONCURRENCY', DISEASE_POOL_WORKERS))
+YIELD_MODEL_CONCURRENCY = int(os.getenv('YIELD_MODEL_CONCURRENCY', 0))
+# ASGI mode (src/asgi.py): request threads per process; 0 sizes the pool to
+# every inference pool slot plus ASGI_LIGHT_THREADS kept for cheap routes
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 0))
+ASGI_LIGHT_THREADS = int(os.getenv('ASGI_LIGHT_THREADS', 8))
+
+# Combined field report (/field-report): its crop, fertilizer, yield and
+# disease sections run concurrently on FIELD_REPORT_WORKERS threads, with at
+# most FIELD_REPORT_QUEUE more sections waiting before a section gets 429
+FIELD_REPORT_WORKERS = int(os.getenv('FIELD_REPORT_WORKERS', 16))
+FIELD_REPORT_QUEUE = int(os.getenv('FIELD_REPORT_QUEUE', 32))
+
 # Logging configuration
 LOGGING_LEVEL = os.getenv('LOGGING_LEVEL', 'INFO')
 LOG_FILE = LOGS_DIR / "api.log"
 
+# Metrics exposed at /metrics; when disabled instrumentation is a no-op
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+
+# Request error logs: at most LOG_SAMPLE_BURST lines per event per window,
+# further occurrences are counted and reported with the next logged one
+LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', 10))
+LOG_SAMPLE_WINDOW_SECONDS = float(os.getenv('LOG_SAMPLE_WINDOW_SECONDS', 60))
+
+# Prediction log for replay (benchmarks/replay.py): inputs, outputs, model
+# versions and stage timings of every prediction request, written by a
+# background thread in compressed 'npz' or 'parquet' (needs pyarrow) segment
+# files of up to FLUSH_ROWS rows, at least every FLUSH_SECONDS. Uploaded
+# images are logged as content hashes, and bodies over MAX_BODY_BYTES are
+# left out. Requests arriving while QUEUE entries are waiting are dropped
+# rather than delayed. The oldest files beyond MAX_FILES are deleted (0 keeps all).
+PREDICTION_LOG_ENABLED = os.getenv('PREDICTION_LOG_ENABLED', 'False').lower() == 'true'
+PREDICTION_LOG_DIR = Path(os.getenv('PREDICTION_LOG_DIR', LOGS_DIR / "predictions"))
+PREDICTION_LOG_FORMAT = os.getenv('PREDICTION_LOG_FORMAT', 'npz').lower()
+PREDICTION_LOG_FLUSH_ROWS = int(os.getenv('PREDICTION_LOG_FLUSH_ROWS', 5000))
+PREDICTION_LOG_FLUSH_SECONDS = float(os.getenv('PREDICTION_LOG_FLUSH_SECONDS', 60))
+PREDICTION_LOG_QUEUE = int(os.getenv('PREDICTION_LOG_QUEUE', 10000))
+PREDICTION_LOG_MAX_FILES = int(os.getenv('PREDICTION_LOG_MAX_FILES', 1000))
+PREDICTION_LOG_MAX_BODY_BYTES = int(os.getenv('PREDICTION_LOG_MAX_BODY_BYTES', 65536))
+
+# Prediction result cache for crop, yield and fertilizer requests. Set
+# PREDICTION_CACHE_SHARED_PATH (e.g. /dev/shm/agri-ml-cache.sqlite) to share
+# cached results between gunicorn workers on the same host.
+PREDICTION_CACHE_ENABLED = os.getenv('PREDICTION_CACHE_ENABLED', 'True').lower() == 'true'
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 10000))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', 3600))
+PREDICTION_CACHE_SHARED_PATH = os.getenv('PREDICTION_CACHE_SHARED_PATH', '')
+
+# Threads dedicated to decoding uploaded images (0 decodes on the request thread)
+IMAGE_DECODE_WORKERS = int(os.getenv('IMAGE_DECODE_WORKERS', 2))
+
+# Disease result cache keyed on a hash of the uploaded image bytes. The
+# perceptual hash also matches re-encoded copies of the same photo.
+DISEASE_CACHE_ENABLED = os.getenv('DISEASE_CACHE_ENABLED', 'True').lower() == 'true'
+DISEASE_CACHE_MAX_ENTRIES = int(os.getenv('DISEASE_CACHE_MAX_ENTRIES', 50000))
+DISEASE_CACHE_MAX_BYTES = int(os.getenv('DISEASE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+DISEASE_CACHE_PERCEPTUAL_HASH = os.getenv('DISEASE_CACHE_PERCEPTUAL_HASH', 'False').lower() == 'true'
+
+# Bulk disease screening jobs. State lives in a SQLite file under JOBS_DIR
+# shared by every process; each serving process runs JOB_WORKERS threads.
+# JOB_INPUT_ROOT enables JSON manifest/directory jobs for files below it.
+JOBS_DIR = Path(os.getenv('JOBS_DIR', BASE_DIR / "jobs"))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+JOB_BATCH_SIZE = int(os.getenv('JOB_BATCH_SIZE', 32))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS', 300))
+JOB_INPUT_ROOT = os.getenv('JOB_INPUT_ROOT', '')
+JOB_ARCHIVE_MAX_BYTES = int(os.getenv('JOB_ARCHIVE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
 # Crop mapping
 CROP_CLASSES = {
     0: "apple", 1: "banana", 2: "blackgram", 3: "chickpea", 4: "coconut", 5: "coffee",
     6: "cotton", 7: "grapes", 8: "jute", 9: "kidneybeans", 10: "lentil", 11: "maize",
     12: "mango", 13: "mothbeans", 14: "mungbean", 15: "muskmelon", 16: "orange",
     17: "papaya", 18: "pigeonpeas", 19: "pomegranate", 20: "rice", 21: "watermelon"
-}
\ No newline at end of file
+}
+
+# Top-k results for crop and disease predictions: classes returned by default
+# (clients may ask for up to TOP_K_MAX with ?top_k=), and the top-1
+# probabilities labelled High and Medium confidence. A temperature above 1
+# softens an overconfident model's probabilities before they are reported.
+TOP_K_DEFAULT = int(os.getenv('TOP_K_DEFAULT', 3))
+TOP_K_MAX = int(os.getenv('TOP_K_MAX', 10))
+CONFIDENCE_HIGH = float(os.getenv('CONFIDENCE_HIGH', 0.8))
+CONFIDENCE_MEDIUM = float(os.getenv('CONFIDENCE_MEDIUM', 0.5))
+CROP_CONFIDENCE_TEMPERATURE = float(os.getenv('CROP_CONFIDENCE_TEMPERATURE', 1.0))
+DISEASE_CONFIDENCE_TEMPERATURE = float(os.getenv('DISEASE_CONFIDENCE_TEMPERATURE', 1.0))
+
+# Disease model output classes, in class index order
+DISEASE_CLASS_NAMES = [
+    'Apple___Apple_scab', 'Apple___Black_rot', 'Apple___Cedar_apple_rust', 'Apple___healthy',
+    'Blueberry___healthy', 'Cherry_(including_sour)___Powdery_mildew',
+    'Cherry_(including_sour)___healthy', 'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot',
+    'Corn_(maize)___Common_rust_', 'Corn_(maize)___Northern_Leaf_Blight', 'Corn_(maize)___healthy',
+    'Grape___Black_rot', 'Grape___Esca_(Black_Measles)', 'Grape___Leaf_blight_(Isariopsis_Leaf_Spot)',
+    'Grape___healthy', 'Orange___Haunglongbing_(Citrus_greening)', 'Peach___Bacterial_spot',
+    'Peach___healthy', 'Pepper,_bell___Bacterial_spot', 'Pepper,_bell___healthy',
+    'Potato___Early_blight', 'Potato___Late_blight', 'Potato___healthy',
+    'Raspberry___healthy', 'Soybean___healthy', 'Squash___Powdery_mildew',
+    'Strawberry___Leaf_scorch', 'Strawberry___healthy', 'Tomato___Bacterial_spot',
+    'Tomato___Early_blight', 'Tomato___Late_blight', 'Tomato___Leaf_Mold',
+    'Tomato___Septoria_leaf_spot', 'Tomato___Spider_mites Two-spotted_spider_mite',
+    'Tomato___Target_Spot', 'Tomato___Tomato_Yellow_Leaf_Curl_Virus', 'Tomato___Tomato_mosaic_virus',
+    'Tomato___healthy'
+]
\ No newline at end of file
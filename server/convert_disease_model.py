@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Convert the Keras disease model to TensorFlow Lite and check accuracy parity
+
+Usage:
+    python convert_disease_model.py --quantize dynamic --samples path/to/leaf_images
+
+Serve the result with DISEASE_MODEL_BACKEND=tflite.
+"""
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from config.settings import DISEASE_MODEL_PATH, DISEASE_TFLITE_MODEL_PATH
+from src.utils.image_preprocessing import ImagePreprocessor, IMAGE_SUFFIXES, model_input_shape
+from src.utils.model_loader import ModelLoader
+from src.utils.tflite_backend import QUANTIZATION_MODES, TFLiteModel, convert_keras_model, parity_check
+
+def load_samples(sample_dir, input_shape, max_samples):
+    """Decode sample images, or fall back to random inputs when no directory is given"""
+    if sample_dir is None:
+        logging.warning("No --samples directory given; checking parity on random inputs")
+        rng = np.random.default_rng(0)
+        return rng.uniform(0, 255, (32,) + input_shape).astype(np.float32)
+
+    paths = sorted(p for p in Path(sample_dir).rglob('*') if p.suffix.lower() in IMAGE_SUFFIXES)[:max_samples]
+    if not paths:
+        raise SystemExit(f"No images found under {sample_dir}")
+    preprocessor = ImagePreprocessor()
+    return np.stack([preprocessor.decode(path.read_bytes(), input_shape) for path in paths])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=DISEASE_MODEL_PATH, help='Keras model to convert')
+    parser.add_argument('--output', default=DISEASE_TFLITE_MODEL_PATH, help='where to write the .tflite file')
+    parser.add_argument('--quantize', choices=QUANTIZATION_MODES, default='none')
+    parser.add_argument('--samples', help='directory of leaf images for calibration and the parity check')
+    parser.add_argument('--max-samples', type=int, default=200)
+    parser.add_argument('--min-agreement', type=float, default=0.98,
+                        help='fail if top-1 agreement with the Keras model is below this')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    model = ModelLoader(mode='lazy').load_keras_disease_model(args.model)
+    input_shape = model_input_shape(model)
+    samples = load_samples(args.samples, input_shape, args.max_samples)
+
+    flat_buffer = convert_keras_model(model, args.quantize, representative_samples=samples)
+    output = Path(args.output)
+    # Checked before it replaces the output, which may be the served model the loader watches
+    candidate = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    candidate.write_bytes(flat_buffer)
+    try:
+        report = parity_check(model, TFLiteModel(candidate), samples)
+    except BaseException:
+        candidate.unlink(missing_ok=True)
+        raise
+
+    print(f"Parity on {report['samples']} samples: {report['top1_agreement']:.2%} top-1 agreement, "
+          f"max output difference {report['max_abs_diff']:.4g}")
+    if report['top1_agreement'] < args.min_agreement:
+        candidate.unlink(missing_ok=True)
+        print(f"Agreement below --min-agreement {args.min_agreement:.2%}; {output} left unchanged", file=sys.stderr)
+        sys.exit(1)
+
+    os.replace(candidate, output)
+    source_size = Path(args.model).stat().st_size
+    print(f"Wrote {output} ({len(flat_buffer) / 1e6:.1f} MB, Keras model {source_size / 1e6:.1f} MB, "
+          f"quantization: {args.quantize})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Gunicorn configuration for the Agricultural ML API
+
+    gunicorn -c gunicorn.conf.py
+
+Models are loaded once in the master (preload_app) and shared copy-on-write
+with the forked workers.
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = "src.wsgi:app"
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# Size the native thread pools before the app imports NumPy and TensorFlow so
+# workers x threads does not oversubscribe the cores
+if int(os.getenv('INFERENCE_BLAS_THREADS', 0)) > 0:
+    for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(name, os.environ['INFERENCE_BLAS_THREADS'])
+
+# Load the app, and with it the models in PRELOAD_MODEL_GROUPS, before forking
+preload_app = True
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the GC's reach so collections in
+    # the workers do not write to (and un-share) the preloaded model pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    from src.utils.process_stats import memory_usage
+    server.log.info(f"Worker {worker.pid} started: {memory_usage()}")
+
+def when_ready(server):
+    from src.utils.process_stats import memory_usage
+    server.log.info(f"Master ready with models preloaded: {memory_usage()}")
+
+def worker_exit(server, worker):
+    # Write out prediction log entries still buffered in the worker
+    from src.utils.prediction_log import flush_all
+    flush_all()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+List, publish and activate model versions in the model registry
+
+Usage:
+    python manage_models.py list
+    python manage_models.py publish yield --from path/to/new_models --version 2024-06 [--activate]
+    python manage_models.py activate yield 2024-06
+
+A published version holds a full copy of the group's files under their usual
+names. Running servers pick up a newly activated version within
+MODEL_WATCH_INTERVAL seconds, or at once through POST /models/reload.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from config.settings import MODEL_REGISTRY_DIR
+from src.utils.model_loader import MODEL_FILES
+from src.utils.model_registry import ModelRegistry
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registry', default=MODEL_REGISTRY_DIR, help='model registry directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='show published and active versions')
+
+    publish = commands.add_parser('publish', help='copy model files in as a new version')
+    publish.add_argument('group', choices=sorted(MODEL_FILES))
+    publish.add_argument('--from', dest='source', required=True,
+                         help='directory holding the group files under their usual names')
+    publish.add_argument('--version', help='version name (default: a timestamp)')
+    publish.add_argument('--activate', action='store_true', help='make the new version active')
+
+    activate = commands.add_parser('activate', help='make a published version active')
+    activate.add_argument('group', choices=sorted(MODEL_FILES))
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == 'list':
+        for group in MODEL_FILES:
+            active = registry.active_version(group)
+            versions = [f"{version}*" if version == active else version for version in registry.versions(group)]
+            print(f"{group:<8} {', '.join(versions) or '(flat files in MODELS_DIR)'}")
+        return
+
+    if args.command == 'publish':
+        files = [Path(args.source) / Path(path).name for path in MODEL_FILES[args.group]]
+        missing = [str(path) for path in files if not path.exists()]
+        if missing:
+            sys.exit(f"Missing model files: {', '.join(missing)}")
+        version = registry.publish(args.group, files, args.version, activate=args.activate)
+        print(f"Published {args.group} version {version}{' (active)' if args.activate else ''}")
+        return
+
+    try:
+        registry.activate(args.group, args.version)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Activated {args.group} version {args.version}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Score CSV or Parquet files offline with the crop, yield and fertilizer models
+
+Usage:
+    python score.py crop soil_samples.csv crops.csv --top-k 3
+    python score.py yield scenarios.parquet yields.parquet --workers 4
+    python score.py fertilizer samples.csv.gz recommendations.ndjson
+
+Input is read in chunks of --chunk-rows rows and every chunk is validated and
+scored in one vectorised pass with the same rules as the /predict-crop/batch,
+/predict-yield/batch and /predict-fertilizer endpoints. Each output row holds
+the input columns followed by the prediction columns and an ``error`` column
+for rows that failed validation, in input order. Chunks are written as they
+finish, so memory stays bounded by --chunk-rows (times the number of chunks
+in flight with --workers) however large the file is.
+
+Formats follow the file extension: .csv (optionally .gz, .bz2 or .xz compressed),
+.parquet, and .ndjson/.jsonl for output. Parquet needs the optional pyarrow
+package.
+"""
+import argparse
+import bz2
+import gzip
+import logging
+import lzma
+import multiprocessing
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    CROP_CLASSES, FERTILIZER_DATA_PATH, CROP_CONFIDENCE_TEMPERATURE, CONFIDENCE_HIGH, CONFIDENCE_MEDIUM
+)
+from src.api.routes import (
+    validate_crop_rows, crop_probabilities, yield_categories, validate_yield_rows, yield_prediction_batch
+)
+from src.api.schemas import FERTILIZER_SCHEMA
+from src.utils.fertilizer_kb import FertilizerKnowledgeBase
+from src.utils.inference_limits import limit_native_threads
+from src.utils.model_loader import ModelLoader
+from src.utils.topk import calibrate, top_k, confidence_labels
+
+# Scorer and output format of a --workers process, set by init_worker
+_worker = None
+
+
+class CropScorer:
+    """Top crop, confidence and optionally the top-k crops per row"""
+
+    def __init__(self, model_loader, k=1):
+        self.model_loader = model_loader
+        self.k = k
+
+    def __call__(self, frame):
+        features, row_errors = validate_crop_rows(frame)
+        valid = np.array([error is None for error in row_errors], dtype=bool)
+        scaler, model, index = self.model_loader.get_models('crop_scaler', 'crop_model', 'crop_index')
+        labels = np.array([CROP_CLASSES.get(label, "Unknown") for label in model.classes_.tolist()], dtype=object)
+
+        output = frame.copy()
+        k = max(1, min(self.k, len(labels)))
+        crops = np.full((len(frame), k), None, dtype=object)
+        scores = np.full((len(frame), k), np.nan)
+        if valid.any():
+            probabilities = calibrate(crop_probabilities(features[valid], scaler, model, index), CROP_CONFIDENCE_TEMPERATURE)
+            indices, values = top_k(probabilities, k)
+            crops[valid], scores[valid] = labels[indices], values
+
+        output['prediction'] = crops[:, 0]
+        output['confidence'] = np.where(valid, confidence_labels(scores[:, 0], CONFIDENCE_HIGH, CONFIDENCE_MEDIUM), None)
+        output['confidence_score'] = scores[:, 0]
+        if self.k > 1:
+            for j in range(k):
+                output[f'crop_{j + 1}'] = crops[:, j]
+                output[f'probability_{j + 1}'] = scores[:, j]
+        output['error'] = pd.Series(row_errors, index=frame.index, dtype=object)
+        return output
+
+
+class YieldScorer:
+    """Predicted yield in tonnes per hectare per row"""
+
+    def __init__(self, model_loader):
+        self.model_loader = model_loader
+
+    def __call__(self, frame):
+        numeric, areas, items, row_errors = validate_yield_rows(frame, yield_categories(self.model_loader))
+        valid = np.array([error is None for error in row_errors], dtype=bool)
+
+        output = frame.copy()
+        predictions = np.full(len(frame), np.nan)
+        if valid.any():
+            predictions[valid] = yield_prediction_batch(numeric[valid], areas[valid], items[valid], self.model_loader)
+        output['prediction'] = predictions
+        output['error'] = pd.Series(row_errors, index=frame.index, dtype=object)
+        return output
+
+
+class FertilizerScorer:
+    """Recommendation key, primary nutrient and N/P/K differences per row
+
+    Rows are validated with the /predict-fertilizer schema. The
+    recommendation text for each key is in FERTILIZER_RECOMMENDATIONS.
+    """
+
+    def __init__(self, knowledge_base):
+        self.knowledge_base = knowledge_base
+
+    def __call__(self, frame):
+        levels, text, row_errors = FERTILIZER_SCHEMA.parse_batch(frame)
+        crop_names = text['cropname']
+        keys, primary, diffs = self.knowledge_base.deficiency_keys(crop_names, *levels.T)
+        for i in np.flatnonzero((crop_names != None) & (keys == None)):  # noqa: E711 - elementwise on object arrays
+            message = f"Crop '{crop_names[i]}' not found in database"
+            row_errors[i] = message if row_errors[i] is None else f"{row_errors[i]}; {message}"
+
+        valid = np.array([error is None for error in row_errors], dtype=bool)
+        output = frame.copy()
+        output['recommendation_key'] = np.where(valid, keys, None)
+        output['primary_deficiency'] = np.where(valid, primary, None)
+        for j, nutrient in enumerate('NPK'):
+            output[f'{nutrient}_diff'] = np.where(valid, diffs[:, j], np.nan)
+        output['error'] = pd.Series(row_errors, index=frame.index, dtype=object)
+        return output
+
+
+def build_scorer(task, top_k_classes=1):
+    """Create the chunk scorer for a task, loading only the models it needs"""
+    if task == 'fertilizer':
+        return FertilizerScorer(FertilizerKnowledgeBase(FERTILIZER_DATA_PATH, check_interval=float('inf')))
+    model_loader = ModelLoader(mode='lazy')
+    model = {'crop': 'crop_model', 'yield': 'yield_model'}[task]
+    if not model_loader.is_model_available(model):
+        raise RuntimeError(f"The {task} model could not be loaded")
+    return CropScorer(model_loader, top_k_classes) if task == 'crop' else YieldScorer(model_loader)
+
+
+def init_worker(task, top_k_classes, fmt):
+    global _worker
+    # One native thread per worker process; parallelism comes from the processes
+    limit_native_threads(1)
+    _worker = (build_scorer(task, top_k_classes), fmt)
+
+
+def score_chunk(frame):
+    scorer, fmt = _worker
+    return encode_chunk(scorer(frame), fmt)
+
+
+def file_format(path):
+    """Format of a data file from its extension, ignoring a compression suffix"""
+    suffixes = [suffix.lower().lstrip('.') for suffix in Path(path).suffixes]
+    if suffixes and suffixes[-1] in ('gz', 'bz2', 'xz', 'zst'):
+        suffixes.pop()
+    fmt = suffixes[-1] if suffixes else ''
+    return 'ndjson' if fmt == 'jsonl' else fmt
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet files need the optional pyarrow package: pip install pyarrow") from e
+    return pyarrow
+
+
+def read_chunks(path, chunk_rows):
+    """Yield DataFrames of at most ``chunk_rows`` rows with a running row index
+
+    CSV columns are read as strings, as the batch endpoints read uploads.
+    """
+    fmt = file_format(path)
+    start = 0
+    if fmt == 'csv':
+        chunks = pd.read_csv(path, dtype=str, skipinitialspace=True, chunksize=chunk_rows)
+    elif fmt == 'parquet':
+        pyarrow = import_pyarrow()
+        chunks = (batch.to_pandas() for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    else:
+        raise ValueError(f"Unsupported input format for {path} (expected .csv or .parquet)")
+
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+# Text openers for compressed CSV/NDJSON output, by final suffix
+COMPRESSED_OPENERS = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+
+def encode_chunk(frame, fmt):
+    """A scored chunk as ``(rows, failed rows, columns, payload)``
+
+    CSV and NDJSON payloads are already formatted text without a header, so
+    with --workers the formatting runs in the worker processes instead of
+    the single process writing the file.
+    """
+    failed = int(frame['error'].notna().sum())
+    if fmt == 'csv':
+        payload = frame.to_csv(index=False, header=False)
+    elif fmt == 'ndjson':
+        payload = frame.to_json(orient='records', lines=True).rstrip('\n') + '\n' if len(frame) else ''
+    else:
+        payload = frame
+    return len(frame), failed, list(frame.columns), payload
+
+
+class ChunkWriter:
+    """Append encoded chunks to a CSV, NDJSON or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fmt = file_format(path)
+        if self.fmt not in ('csv', 'ndjson', 'parquet'):
+            raise ValueError(f"Unsupported output format for {path} (expected .csv, .ndjson or .parquet)")
+        self._handle = None
+        self._writer = None
+        self._pyarrow = import_pyarrow() if self.fmt == 'parquet' else None
+
+    def write(self, columns, payload):
+        if self.fmt == 'parquet':
+            pyarrow = self._pyarrow
+            if self._writer is None:
+                table = pyarrow.Table.from_pandas(payload, preserve_index=False)
+                # An all-valid first chunk would otherwise fix the error column as null-typed
+                table = table.cast(pyarrow.schema([
+                    field.with_type(pyarrow.string()) if field.name == 'error' else field for field in table.schema
+                ]))
+                self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            else:
+                table = pyarrow.Table.from_pandas(payload, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+            return
+
+        if self._handle is None:
+            opener = COMPRESSED_OPENERS.get(Path(self.path).suffix.lower().lstrip('.'), open)
+            self._handle = opener(self.path, 'wt', newline='')
+            if self.fmt == 'csv':
+                self._handle.write(pd.DataFrame(columns=columns).to_csv(index=False))
+        self._handle.write(payload)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._handle is not None:
+            self._handle.close()
+
+
+def score_file(task, input_path, output_path, chunk_rows=100000, workers=1, top_k_classes=1):
+    """Score ``input_path`` chunk by chunk into ``output_path``; returns (rows, failed rows)"""
+    writer = ChunkWriter(output_path)
+    chunks = read_chunks(input_path, chunk_rows)
+    rows = failed = 0
+    started = time.perf_counter()
+    pool = None
+    try:
+        if workers > 1:
+            pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(task, top_k_classes, writer.fmt))
+            encoded = ordered_imap(pool, score_chunk, chunks, max_pending=2 * workers)
+        else:
+            scorer = build_scorer(task, top_k_classes)
+            encoded = (encode_chunk(scorer(chunk), writer.fmt) for chunk in chunks)
+
+        for n_rows, n_failed, columns, payload in encoded:
+            writer.write(columns, payload)
+            rows += n_rows
+            failed += n_failed
+            logging.info(f"Scored {rows} rows ({rows / (time.perf_counter() - started):.0f} rows/s)")
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return rows, failed
+
+
+def ordered_imap(pool, fn, items, max_pending):
+    """Like Pool.imap, but reads at most ``max_pending`` items ahead of the results
+
+    Pool.imap consumes its input as fast as it can, which would pull the
+    whole file into memory when scoring is slower than reading.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(fn, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('task', choices=['crop', 'yield', 'fertilizer'])
+    parser.add_argument('input', help='CSV or Parquet file to score')
+    parser.add_argument('output', help='CSV, NDJSON or Parquet file to write')
+    parser.add_argument('--chunk-rows', type=int, default=100000, help='rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=1, help='processes scoring chunks in parallel')
+    parser.add_argument('--top-k', type=int, default=1, help='crop: also write the k most likely crops')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    try:
+        rows, failed = score_file(
+            args.task, args.input, args.output,
+            chunk_rows=args.chunk_rows, workers=args.workers, top_k_classes=args.top_k
+        )
+    except (ImportError, OSError, ValueError, RuntimeError) as e:
+        sys.exit(str(e))
+    print(f"Scored {rows} rows into {args.output} ({failed} failed validation)")
+
+if __name__ == "__main__":
+    main()
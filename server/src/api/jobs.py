@@ -0,0 +1,137 @@
+"""
+Bulk disease screening job API
+"""
+import json
+import tarfile
+import uuid
+import zipfile
+from pathlib import Path
+
+from flask import request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from config.settings import (
+    JOBS_DIR, JOB_WORKERS, JOB_BATCH_SIZE, JOB_POLL_INTERVAL, JOB_STALE_SECONDS, JOB_INPUT_ROOT, JOB_ARCHIVE_MAX_BYTES,
+    LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW_SECONDS
+)
+from src.utils.job_store import JobStore
+from src.utils.job_worker import JobWorkerPool, list_job_images, is_image_name
+from src.utils.structured_log import SampledLogger
+
+ARCHIVE_KINDS = {'.zip': 'zip', '.tar': 'tar', '.tgz': 'tar', '.tar.gz': 'tar', '.tar.bz2': 'tar', '.tar.xz': 'tar'}
+MAX_RESULTS_PAGE = 1000
+
+job_log = SampledLogger(burst=LOG_SAMPLE_BURST, window_seconds=LOG_SAMPLE_WINDOW_SECONDS)
+
+def create_job_routes(app, score_images):
+    """Create the /jobs routes and start a job worker pool in each serving process
+
+    ``score_images`` takes a list of image bytes and returns one
+    ``(result, error)`` pair per image.
+    """
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    store = JobStore(JOBS_DIR / "jobs.sqlite", stale_seconds=JOB_STALE_SECONDS)
+    pool = JobWorkerPool(
+        store, score_images, workers=JOB_WORKERS, batch_size=JOB_BATCH_SIZE, poll_interval=JOB_POLL_INTERVAL
+    )
+
+    @app.before_request
+    def start_job_workers():
+        # Started on first request so workers forked from a preloading master get their own threads
+        pool.ensure_started()
+
+    @app.route("/jobs", methods=["POST"])
+    def create_job():
+        # An uploaded archive is deleted again unless a job is queued for it
+        saved = None
+        try:
+            # Archives may be far larger than the app-wide MAX_CONTENT_LENGTH
+            request.max_content_length = JOB_ARCHIVE_MAX_BYTES
+            if 'archive' in request.files:
+                source_kind, source = save_archive(request.files['archive'])
+                saved = Path(source)
+            elif request.is_json:
+                source_kind, source = read_local_source(request.get_json(silent=True) or {})
+            else:
+                return jsonify({"error": "Upload a zip/tar 'archive' or send a JSON manifest"}), 400
+
+            names = list_job_images(source_kind, source)
+            if not names:
+                return jsonify({"error": "No images found in job source"}), 400
+
+            job_id = store.create_job(source_kind, source, len(names))
+            saved = None
+            return jsonify({
+                "job_id": job_id,
+                "status": "queued",
+                "total": len(names),
+                "status_url": f"/jobs/{job_id}"
+            }), 202
+
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            return jsonify({"error": f"Could not read archive: {e}"}), 400
+        except RequestEntityTooLarge:
+            raise
+        except Exception as e:
+            job_log.error('job_creation_failed', e, endpoint=request.path)
+            return jsonify({"error": "Error creating job"}), 500
+        finally:
+            if saved is not None:
+                saved.unlink(missing_ok=True)
+
+    @app.route("/jobs/<job_id>", methods=["GET"])
+    def get_job(job_id):
+        try:
+            offset = max(0, int(request.args.get('offset', 0)))
+            limit = min(MAX_RESULTS_PAGE, max(0, int(request.args.get('limit', 100))))
+        except ValueError:
+            return jsonify({"error": "offset and limit must be integers"}), 400
+
+        job = store.get_job(job_id, offset=offset, limit=limit)
+        if job is None:
+            return jsonify({"error": f"Job '{job_id}' not found"}), 404
+        return jsonify(job)
+
+    return store, pool
+
+def save_archive(file):
+    """Stream an uploaded archive to the jobs directory"""
+    name = Path(file.filename or '').name.lower()
+    suffix = next((suffix for suffix in ARCHIVE_KINDS if name.endswith(suffix)), None)
+    if suffix is None:
+        raise ValueError("Archive must be a .zip, .tar, .tgz or .tar.gz/.bz2/.xz file")
+
+    uploads = JOBS_DIR / "uploads"
+    uploads.mkdir(parents=True, exist_ok=True)
+    path = uploads / f"{uuid.uuid4().hex}{suffix}"
+    file.save(path)
+    return ARCHIVE_KINDS[suffix], str(path)
+
+def read_local_source(payload):
+    """Validate a manifest or directory job against JOB_INPUT_ROOT"""
+    if not JOB_INPUT_ROOT:
+        raise ValueError("Server-side manifests are disabled; set JOB_INPUT_ROOT or upload an archive")
+    root = Path(JOB_INPUT_ROOT).resolve()
+
+    def resolve(path):
+        resolved = (root / path).resolve()
+        if not resolved.is_relative_to(root):
+            raise ValueError(f"Path outside JOB_INPUT_ROOT: {path}")
+        return resolved
+
+    if 'directory' in payload:
+        directory = resolve(payload['directory'])
+        if not directory.is_dir():
+            raise ValueError(f"Not a directory: {payload['directory']}")
+        return 'directory', str(directory)
+
+    manifest = payload.get('manifest')
+    if not isinstance(manifest, list) or not manifest:
+        raise ValueError("Expected a non-empty 'manifest' list of image paths or a 'directory'")
+    paths = [resolve(path) for path in manifest]
+    for path, name in zip(paths, manifest):
+        if not path.is_file() or not is_image_name(path.name):
+            raise ValueError(f"Not an image file: {name}")
+    return 'manifest', json.dumps([str(path) for path in paths])
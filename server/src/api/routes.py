@@ -1,21 +1,284 @@
 """
 API route handlers
 """
+import hmac
 import logging
 import numpy as np
 import pandas as pd
 import json
 import os
-from flask import request, jsonify
-from PIL import Image
+import time
+from flask import request, jsonify, Response, stream_with_context, g
+from werkzeug.exceptions import RequestEntityTooLarge
 import io
-import tensorflow as tf
 from markupsafe import Markup
-from config.settings import CROP_CLASSES, FERTILIZER_DATA_PATH, PLANT_DISEASE_DATA_PATH
+from config.settings import (
+    CROP_CLASSES, CROP_BATCH_MAX_ROWS, FERTILIZER_DATA_PATH, DATA_RELOAD_CHECK_SECONDS,
+    PLANT_DISEASE_DATA_PATH, DISEASE_CLASSES_PATH, DISEASE_CLASS_NAMES,
+    DISEASE_BATCHING_ENABLED, DISEASE_BATCH_MAX_SIZE, DISEASE_BATCH_MAX_WAIT_MS,
+    DISEASE_MODEL_BACKEND, DISEASE_KERAS_EXECUTION,
+    PREDICTION_CACHE_ENABLED, PREDICTION_CACHE_MAX_ENTRIES, PREDICTION_CACHE_TTL_SECONDS,
+    PREDICTION_CACHE_SHARED_PATH, DISEASE_CACHE_ENABLED, DISEASE_CACHE_MAX_ENTRIES,
+    DISEASE_CACHE_MAX_BYTES, DISEASE_CACHE_PERCEPTUAL_HASH, IMAGE_DECODE_WORKERS,
+    YIELD_BATCH_MAX_ROWS, YIELD_GRID_MAX_POINTS, YIELD_GRID_CHUNK_ROWS,
+    LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW_SECONDS, MODEL_ADMIN_TOKEN, DISEASE_MAX_IMAGE_PIXELS,
+    TOP_K_DEFAULT, TOP_K_MAX, CONFIDENCE_HIGH, CONFIDENCE_MEDIUM,
+    CROP_CONFIDENCE_TEMPERATURE, DISEASE_CONFIDENCE_TEMPERATURE,
+    INFERENCE_POOLS_ENABLED, DISEASE_POOL_WORKERS, DISEASE_POOL_QUEUE,
+    CROP_POOL_WORKERS, CROP_POOL_QUEUE, YIELD_POOL_WORKERS, YIELD_POOL_QUEUE, CROP_INDEX_MODE,
+    FIELD_REPORT_WORKERS, FIELD_REPORT_QUEUE, PREDICTION_LOG_ENABLED, PREDICTION_LOG_DIR, PREDICTION_LOG_FORMAT,
+    PREDICTION_LOG_FLUSH_ROWS, PREDICTION_LOG_FLUSH_SECONDS, PREDICTION_LOG_QUEUE, PREDICTION_LOG_MAX_FILES,
+    PREDICTION_LOG_MAX_BODY_BYTES
+)
+from src.utils.inference_batcher import InferenceBatcher
+from src.utils.inference_pool import InferencePool, Overloaded
+from src.utils.prediction_cache import PredictionCache
+from src.utils.image_cache import ImageResultCache, content_hash, perceptual_hash
+from src.utils.image_preprocessing import ImagePreprocessor, ImageRejected, model_input_shape
+from src.utils.process_stats import memory_usage
+from src.utils.model_loader import MODEL_GROUPS
+from src.utils.yield_engine import YIELD_NUMERIC_FIELDS, YIELD_CATEGORICAL_FIELDS
+from src.utils.yield_scenarios import ScenarioGrid, GridTooLarge, YIELD_FIELDS
+from src.utils.fertilizer_kb import FertilizerKnowledgeBase, FERTILIZER_RECOMMENDATIONS
+from src.utils.disease_catalog import DiseaseCatalog, normalize_class_name, extract_disease_name
+from src.utils.metrics import registry as metrics, time_stage, collect_stages, stop_collecting_stages
+from src.utils.prediction_log import PredictionLogger
+from src.utils.structured_log import SampledLogger
+from src.utils.topk import as_probabilities, calibrate, ranked_predictions
+from src.api.jobs import create_job_routes
+from src.api.schemas import (
+    SchemaError, CROP_SCHEMA, FERTILIZER_SCHEMA, YIELD_SCHEMA, FIELD_REPORT_SCHEMA
+)
+
+# Inline decoder for callers that do not pass their own preprocessor
+default_preprocessor = ImagePreprocessor()
+
+# Structured request error log, rate-limited per event
+request_log = SampledLogger(burst=LOG_SAMPLE_BURST, window_seconds=LOG_SAMPLE_WINDOW_SECONDS)
+
+request_seconds = metrics.histogram(
+    'request_duration_seconds', 'Request latency by endpoint', ('endpoint', 'method', 'status')
+)
+requests_in_flight = metrics.gauge('requests_in_flight', 'Requests currently being served', ('endpoint',))
+request_errors = metrics.counter('request_errors_total', 'Unhandled errors by event', ('event',))
+crop_index_lookups = metrics.counter(
+    'crop_index_lookups_total', 'Crop rows answered by the lookup index or left to the model', ('result',)
+)
+
+# Streamed response formats for batch and scenario endpoints
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Routes recorded by the prediction log
+LOGGED_ROUTE_PREFIXES = ('/predict-', '/field-report')
+
+# Form fields expected by the crop recommendation model, in feature order
+CROP_FEATURE_FIELDS = ['Nitrogen', 'Phosporus', 'Potassium', 'Temperature', 'Humidity', 'pH', 'Rainfall']
+
+# Fields of a /field-report record by section, named as on the single-model
+# endpoints; fertilizer reads N/P/K from the crop fields
+FIELD_REPORT_SECTIONS = {
+    'crop': CROP_FEATURE_FIELDS,
+    'fertilizer': ['cropname', 'Nitrogen', 'Phosporus', 'Potassium'],
+    'yield': list(YIELD_NUMERIC_FIELDS) + list(YIELD_CATEGORICAL_FIELDS)
+}
+
+
+class ReportSectionError(Exception):
+    """A field report section that cannot be produced, with the status its own endpoint would return"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
 
 def create_routes(app, model_loader):
     """Create all API routes"""
+
+    fertilizer_kb = FertilizerKnowledgeBase(FERTILIZER_DATA_PATH, check_interval=DATA_RELOAD_CHECK_SECONDS)
+    disease_catalog = DiseaseCatalog(
+        DISEASE_CLASS_NAMES, PLANT_DISEASE_DATA_PATH, DISEASE_CLASSES_PATH,
+        check_interval=DATA_RELOAD_CHECK_SECONDS
+    )
+
+    prediction_cache = None
+    if PREDICTION_CACHE_ENABLED:
+        prediction_cache = PredictionCache(
+            max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+            shared_path=PREDICTION_CACHE_SHARED_PATH
+        )
+        model_loader.add_reload_listener(lambda group, version: prediction_cache.invalidate(group))
+
+    def cached_prediction(namespace, version, features, compute):
+        """Serve a deterministic prediction from the cache, computing it on a miss"""
+        if prediction_cache is None:
+            return compute()
+        return prediction_cache.get_or_compute(namespace, version, features, compute)
+
+    disease_cache = None
+    if DISEASE_CACHE_ENABLED:
+        disease_cache = ImageResultCache(
+            max_entries=DISEASE_CACHE_MAX_ENTRIES,
+            max_bytes=DISEASE_CACHE_MAX_BYTES,
+            use_perceptual_hash=DISEASE_CACHE_PERCEPTUAL_HASH
+        )
+
+        def clear_disease_cache(group, version):
+            if group == 'disease':
+                disease_cache.clear()
+
+        model_loader.add_reload_listener(clear_disease_cache)
+
+    image_preprocessor = ImagePreprocessor(decode_workers=IMAGE_DECODE_WORKERS, max_pixels=DISEASE_MAX_IMAGE_PIXELS)
+
+    def predict_disease_batch(batch):
+        with time_stage('disease', 'batched_predict'):
+            return model_loader.get_model('disease_model').predict(batch, verbose=0)
+
+    disease_batcher = None
+    per_thread = DISEASE_MODEL_BACKEND == 'keras' and DISEASE_KERAS_EXECUTION == 'per_thread'
+    if DISEASE_BATCHING_ENABLED and per_thread:
+        # The batcher runs every forward pass on its one thread, which would leave a single replica
+        logging.warning("DISEASE_KERAS_EXECUTION=per_thread disables DISEASE_BATCHING_ENABLED; "
+                        "disease requests run their own forward passes")
+    elif DISEASE_BATCHING_ENABLED:
+        disease_batcher = InferenceBatcher(
+            predict_disease_batch,
+            max_batch_size=DISEASE_BATCH_MAX_SIZE,
+            max_wait_ms=DISEASE_BATCH_MAX_WAIT_MS,
+            name='disease_model'
+        )
     
+    inference_pools = {}
+    if INFERENCE_POOLS_ENABLED:
+        inference_pools = {
+            'disease': InferencePool('disease', DISEASE_POOL_WORKERS, DISEASE_POOL_QUEUE),
+            'crop': InferencePool('crop', CROP_POOL_WORKERS, CROP_POOL_QUEUE),
+            'yield': InferencePool('yield', YIELD_POOL_WORKERS, YIELD_POOL_QUEUE)
+        }
+
+    # Sections of a field report run side by side on their own threads; their
+    # heavy calls still go through offload and the per-model pools
+    report_pool = InferencePool('field_report', FIELD_REPORT_WORKERS, FIELD_REPORT_QUEUE)
+
+    def offload(model, fn, *args, **kwargs):
+        """Run heavy inference on the model's bounded pool, or inline when pools are disabled"""
+        pool = inference_pools.get(model)
+        if pool is None:
+            return fn(*args, **kwargs)
+        return pool.run(fn, *args, **kwargs)
+
+    def crop_report(features, k):
+        """Top-k crop recommendation for one feature list in CROP_FEATURE_FIELDS order"""
+        N, P, K, temp, humidity, ph, rainfall = features
+        version = model_loader.get_model_version('crop')
+
+        def compute():
+            single_pred = np.array(features).reshape(1, -1)
+
+            # Make prediction, from the lookup index when one is loaded
+            scaler, model, index = model_loader.get_models('crop_scaler', 'crop_model', 'crop_index')
+            probabilities = crop_probabilities(single_pred, scaler, model, index)
+
+            with time_stage('crop', 'rank'):
+                ranked = crop_ranking(probabilities, model, k)[0]
+
+            crop = ranked["top_k"][0]["crop"]
+            result = f"{crop.capitalize()} is the best crop to be cultivated."
+
+            return {
+                "prediction": crop,
+                "message": result,
+                **ranked,
+                "input_features": {
+                    "nitrogen": N, "phosphorus": P, "potassium": K,
+                    "temperature": temp, "humidity": humidity, "ph": ph, "rainfall": rainfall
+                },
+                "model_version": version
+            }
+
+        return cached_prediction('crop', version, list(features) + [k], compute)
+
+    def fertilizer_report(crop_name, N, P, K):
+        """Fertilizer recommendation for one soil sample, or None for unknown crops"""
+        def compute():
+            with time_stage('fertilizer', 'lookup'):
+                return fertilizer_kb.recommend(crop_name, N, P, K)
+
+        return cached_prediction('fertilizer', fertilizer_kb.version, (crop_name, N, P, K), compute)
+
+    def yield_report(Year, rainfall, pesticides, avg_temp, Area, Item):
+        """Yield prediction for one record"""
+        version = model_loader.get_model_version('yield')
+
+        def compute():
+            # Make prediction, through the compiled engine when it is enabled
+            engine = model_loader.get_model('yield_engine')
+            if engine is not None:
+                with time_stage('yield', 'predict'):
+                    prediction = engine.predict_one(Year, rainfall, pesticides, avg_temp, Area, Item)
+            else:
+                with time_stage('yield', 'predict'):
+                    prediction = yield_prediction_batch(
+                        np.array([[Year, rainfall, pesticides, avg_temp]]), [Area], [Item], model_loader
+                    )[0]
+
+            return {
+                "prediction": float(prediction),
+                "unit": "tonnes per hectare",
+                "input_features": {
+                    "year": Year, "rainfall": rainfall, "pesticides": pesticides,
+                    "avg_temperature": avg_temp, "area": Area, "item": Item
+                },
+                "model_version": version
+            }
+
+        return cached_prediction('yield', version, (Year, rainfall, pesticides, avg_temp, Area, Item), compute)
+
+    def disease_report(image_source, raw, k):
+        """Top-k disease classes with catalog details for one uploaded image"""
+        # Werkzeug has already spooled the upload (bounded by MAX_CONTENT_LENGTH);
+        # decode from that stream rather than copying it into bytes
+        probabilities = offload(
+            'disease', disease_probabilities,
+            image_source, model_loader, disease_batcher, disease_cache, image_preprocessor, raw=raw
+        )
+
+        # Precomputed prediction, disease name and detailed info for the top class
+        with time_stage('disease', 'postprocess'):
+            ranked = disease_ranking(probabilities, disease_catalog.class_names, k)[0]
+            response = disease_response(disease_catalog, ranked)
+
+        return {**response, "model_version": model_loader.get_model_version('disease')}
+
+    def score_disease_images(images):
+        """Score a chunk of job images in one forward pass"""
+        probabilities, errors = disease_probabilities_batch(images, model_loader, image_preprocessor)
+        ranked = iter(disease_ranking(probabilities, disease_catalog.class_names, TOP_K_DEFAULT))
+        return [
+            (None, error) if error is not None else (disease_response(disease_catalog, next(ranked)), None)
+            for error in errors
+        ]
+
+    create_job_routes(app, score_disease_images)
+
+    prediction_logger = None
+    if PREDICTION_LOG_ENABLED:
+        try:
+            prediction_logger = PredictionLogger(
+                PREDICTION_LOG_DIR, PREDICTION_LOG_FORMAT, flush_rows=PREDICTION_LOG_FLUSH_ROWS,
+                flush_seconds=PREDICTION_LOG_FLUSH_SECONDS, max_queue=PREDICTION_LOG_QUEUE,
+                max_files=PREDICTION_LOG_MAX_FILES, max_body_bytes=PREDICTION_LOG_MAX_BODY_BYTES
+            )
+            log_predictions(app, prediction_logger)
+        except (ImportError, ValueError) as e:
+            logging.error(f"Prediction log disabled: {e}")
+
+    instrument_requests(app)
+    register_state_metrics(
+        model_loader, prediction_cache, disease_cache, disease_batcher, {**inference_pools, 'field_report': report_pool}
+    )
+
     @app.route("/", methods=["GET"])
     def home():
         return jsonify({
@@ -23,121 +286,169 @@ def create_routes(app, model_loader):
             "version": "1.0.0",
             "endpoints": {
                 "/predict-crop": "POST - Crop recommendation",
+                "/predict-crop/batch": "POST - Batch crop recommendation (JSON or CSV rows)",
                 "/predict-fertilizer": "POST - Fertilizer recommendation", 
-                "/predict-disease": "POST - Disease detection",
+                "/predict-disease": "POST - Disease detection (image upload, or raw pixels with format=raw)",
                 "/predict-yield": "POST - Yield prediction",
-                "/health": "GET - Health check"
+                "/predict-yield/batch": "POST - Batch yield prediction (JSON or CSV rows)",
+                "/predict-yield/grid": "POST - Yield scenario sweep streamed as NDJSON or CSV",
+                "/field-report": "POST - Crop, fertilizer, yield and disease results for one field in one call",
+                "/jobs": "POST - Queue a bulk disease screening job (archive upload or manifest)",
+                "/jobs/<job_id>": "GET - Job progress and paginated results",
+                "/models": "GET - Loaded, active and published model versions",
+                "/models/reload": "POST - Load and swap in a model group's active version (admin token)",
+                "/health": "GET - Health check",
+                "/metrics": "GET - Prometheus metrics"
             }
         })
 
     @app.route("/health", methods=["GET"])
     def health_check():
-        return jsonify({
+        status = {
             "status": "healthy",
-            "models": model_loader.get_model_status()
-        })
+            "models": model_loader.get_model_status(),
+            "readiness": model_loader.get_model_readiness(),
+            "process": memory_usage()
+        }
+        if prediction_cache is not None:
+            status["prediction_cache"] = prediction_cache.get_stats()
+        if disease_cache is not None:
+            status["disease_cache"] = disease_cache.get_stats()
+        if disease_batcher is not None:
+            status["inference_batching"] = disease_batcher.get_stats()
+        crop_index = model_loader.models.get('crop_index')
+        if crop_index is not None:
+            status["crop_index"] = {"mode": CROP_INDEX_MODE, **crop_index.metadata}
+        status["inference_pools"] = {
+            name: pool.get_stats() for name, pool in {**inference_pools, 'field_report': report_pool}.items()
+        }
+        if prediction_logger is not None:
+            status["prediction_log"] = prediction_logger.get_stats()
+        return jsonify(status)
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def upload_too_large(e):
+        return jsonify({"error": f"Upload too large (max {request.max_content_length} bytes)"}), 413
+
+    @app.before_request
+    def start_model_watcher():
+        model_loader.start_watcher()
+
+    @app.route("/models", methods=["GET"])
+    def model_versions():
+        return jsonify(model_loader.get_model_versions())
+
+    @app.route("/models/reload", methods=["POST"])
+    def reload_models():
+        if not MODEL_ADMIN_TOKEN:
+            return jsonify({"error": "Model reloads are disabled (MODEL_ADMIN_TOKEN is not set)"}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), MODEL_ADMIN_TOKEN):
+            return jsonify({"error": "Invalid admin token"}), 403
+
+        payload = request.get_json(silent=True) or {}
+        group = payload.get('group')
+        if group not in MODEL_GROUPS:
+            return jsonify({"error": f"Unknown model group: {group}. Expected one of: {', '.join(MODEL_GROUPS)}"}), 400
+
+        version = payload.get('version')
+        try:
+            if version is not None:
+                # Other workers pick the new version up through their watcher
+                model_loader.registry.activate(group, str(version))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        model_loader.reload(group)
+
+        return jsonify({
+            "group": group,
+            "loaded": model_loader.get_model_version(group),
+            "active": model_loader.registry.active_version(group),
+            "status": "reloading"
+        }), 202
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        if not metrics.enabled:
+            return jsonify({"error": "Metrics are disabled"}), 404
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
     @app.route("/predict-crop", methods=["POST"])
     def predict_crop():
         try:
-            # Validate input
-            required_fields = ['Nitrogen', 'Phosporus', 'Potassium', 'Temperature', 'Humidity', 'pH', 'Rainfall']
-            for field in required_fields:
-                if field not in request.form:
-                    return jsonify({"error": f"Missing required field: {field}"}), 400
-            
-            # Extract features
-            N = float(request.form['Nitrogen'])
-            P = float(request.form['Phosporus'])
-            K = float(request.form['Potassium'])
-            temp = float(request.form['Temperature'])
-            humidity = float(request.form['Humidity'])
-            ph = float(request.form['pH'])
-            rainfall = float(request.form['Rainfall'])
-
-            feature_list = [N, P, K, temp, humidity, ph, rainfall]
-            single_pred = np.array(feature_list).reshape(1, -1)
+            features, _ = CROP_SCHEMA.parse(request_record())
+            k = requested_top_k()
 
             # Check if models are available
             if not model_loader.is_model_available('crop_model'):
                 return jsonify({"error": "Crop recommendation model not available"}), 503
-            
-            # Make prediction
-            scaler = model_loader.get_model('crop_scaler')
-            model = model_loader.get_model('crop_model')
-            
-            sc_mx_features = scaler.transform(single_pred)
-            prediction = model.predict(sc_mx_features)
 
-            crop = CROP_CLASSES.get(prediction[0], "Unknown")
-            result = f"{crop.capitalize()} is the best crop to be cultivated."
-            
+            return jsonify(crop_report(features.tolist(), k))
+
+        except SchemaError as e:
+            return jsonify({"error": str(e)}), 400
+        except ValueError as e:
+            return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+        except Exception as e:
+            log_request_error('crop_prediction_failed', e)
+            return jsonify({"error": "Internal server error"}), 500
+
+    @app.route("/predict-crop/batch", methods=["POST"])
+    def predict_crop_batch():
+        try:
+            frame = read_batch_rows(CROP_BATCH_MAX_ROWS)
+            if frame is None:
+                return jsonify({"error": "Expected a JSON list of samples or CSV rows"}), 400
+
+            k = requested_top_k()
+            with time_stage('crop_batch', 'validate'):
+                features, row_errors = validate_crop_rows(frame)
+
+            if not model_loader.is_model_available('crop_model'):
+                return jsonify({"error": "Crop recommendation model not available"}), 503
+
+            valid_rows = np.flatnonzero([error is None for error in row_errors])
+            with time_stage('crop_batch', 'predict'):
+                ranked = offload('crop', crop_prediction_batch, features[valid_rows], model_loader, k)
+
+            results = [{"row": i, "error": error} for i, error in enumerate(row_errors)]
+            for i, row in zip(valid_rows.tolist(), ranked):
+                results[i] = {"row": i, "prediction": row["top_k"][0]["crop"], **row}
+
             return jsonify({
-                "prediction": crop,
-                "message": result,
-                "confidence": "High",
-                "input_features": {
-                    "nitrogen": N, "phosphorus": P, "potassium": K,
-                    "temperature": temp, "humidity": humidity, "ph": ph, "rainfall": rainfall
-                }
+                "results": results,
+                "total": len(results),
+                "succeeded": len(valid_rows),
+                "failed": len(results) - len(valid_rows),
+                "model_version": model_loader.get_model_version('crop')
             })
-            
+
+        except BatchTooLarge as e:
+            return jsonify({"error": str(e)}), 413
         except ValueError as e:
-            return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+            return jsonify({"error": f"Invalid batch data: {str(e)}"}), 400
+        except Overloaded as e:
+            return overloaded_response(e)
         except Exception as e:
-            logging.error(f"Error in crop prediction: {e}")
+            log_request_error('crop_batch_prediction_failed', e)
             return jsonify({"error": "Internal server error"}), 500
 
     @app.route('/predict-fertilizer', methods=['POST'])
     def predict_fertilizer():
         try:
-            # Validate input
-            required_fields = ['cropname', 'nitrogen', 'phosphorous', 'pottasium']
-            for field in required_fields:
-                if field not in request.form:
-                    return jsonify({"error": f"Missing required field: {field}"}), 400
-            
-            crop_name = str(request.form['cropname'])
-            N = int(request.form['nitrogen'])
-            P = int(request.form['phosphorous'])
-            K = int(request.form['pottasium'])
+            levels, text = FERTILIZER_SCHEMA.parse(request_record())
+            crop_name = text['cropname']
+            N, P, K = (int(level) for level in levels)
 
-            # Load fertilizer data
-            df = pd.read_csv(FERTILIZER_DATA_PATH)
-            
-            if crop_name not in df['Crop'].values:
+            result = fertilizer_report(crop_name, N, P, K)
+            if result is None:
                 return jsonify({"error": f"Crop '{crop_name}' not found in database"}), 400
-                
-            nr, pr, kr = df[df['Crop'] == crop_name][['N', 'P', 'K']].iloc[0]
 
-            n, p, k = nr - N, pr - P, kr - K
-            temp = {abs(n): "N", abs(p): "P", abs(k): "K"}
-            max_value = temp[max(temp.keys())]
-
-            if max_value == "N":
-                key = 'NHigh' if n < 0 else "Nlow"
-            elif max_value == "P":
-                key = 'PHigh' if p < 0 else "Plow"
-            else:
-                key = 'KHigh' if k < 0 else "Klow"
+            return jsonify(result)
 
-            # Get fertilizer recommendations
-            recommendations = get_fertilizer_recommendations()
-            response = recommendations.get(key, "No recommendation available")
-            
-            return jsonify({
-                "recommendation": response,
-                "nutrient_analysis": {
-                    "required_N": nr, "current_N": N, "N_diff": n,
-                    "required_P": pr, "current_P": P, "P_diff": p,
-                    "required_K": kr, "current_K": K, "K_diff": k
-                },
-                "primary_deficiency": max_value,
-                "crop": crop_name
-            })
-            
+        except SchemaError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in fertilizer prediction: {e}")
+            log_request_error('fertilizer_prediction_failed', e)
             return jsonify({"error": "Error processing fertilizer recommendation"}), 500
 
     @app.route('/predict-disease', methods=['POST'])
@@ -148,170 +459,760 @@ def create_routes(app, model_loader):
         file = request.files['image']
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
-
         try:
-            img_bytes = file.read()
-            result_index = model_prediction(img_bytes, model_loader)
-            
-            class_names = [
-                'Apple___Apple_scab', 'Apple___Black_rot', 'Apple___Cedar_apple_rust', 'Apple___healthy',
-                'Blueberry___healthy', 'Cherry_(including_sour)___Powdery_mildew', 
-                'Cherry_(including_sour)___healthy', 'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot', 
-                'Corn_(maize)___Common_rust_', 'Corn_(maize)___Northern_Leaf_Blight', 'Corn_(maize)___healthy', 
-                'Grape___Black_rot', 'Grape___Esca_(Black_Measles)', 'Grape___Leaf_blight_(Isariopsis_Leaf_Spot)', 
-                'Grape___healthy', 'Orange___Haunglongbing_(Citrus_greening)', 'Peach___Bacterial_spot',
-                'Peach___healthy', 'Pepper,_bell___Bacterial_spot', 'Pepper,_bell___healthy', 
-                'Potato___Early_blight', 'Potato___Late_blight', 'Potato___healthy', 
-                'Raspberry___healthy', 'Soybean___healthy', 'Squash___Powdery_mildew', 
-                'Strawberry___Leaf_scorch', 'Strawberry___healthy', 'Tomato___Bacterial_spot', 
-                'Tomato___Early_blight', 'Tomato___Late_blight', 'Tomato___Leaf_Mold', 
-                'Tomato___Septoria_leaf_spot', 'Tomato___Spider_mites Two-spotted_spider_mite', 
-                'Tomato___Target_Spot', 'Tomato___Tomato_Yellow_Leaf_Curl_Virus', 'Tomato___Tomato_mosaic_virus',
-                'Tomato___healthy'
-            ]
-            
-            predicted_class = class_names[result_index]
+            k = requested_top_k()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not model_loader.is_model_available('disease_model'):
+            return jsonify({"error": "Disease detection model not available"}), 503
 
-            # Load disease data and match with predicted class
-            disease_info = load_disease_info(predicted_class)
-            
-            # Extract clean disease name
-            clean_disease_name = extract_disease_name(predicted_class)
-            
-            response = {
-                "prediction": predicted_class,
-                "disease": clean_disease_name,
-                "class_index": int(result_index),
-                "total_classes": len(class_names)
-            }
-            
-            # Add detailed disease info if found in database
-            if disease_info:
-                response.update({
-                    "cause": disease_info["cause"],
-                    "cure": disease_info["cure"],
-                    "html": disease_info.get("html", "")
-                })
-            
-            return jsonify(response)
+        try:
+            # Werkzeug has already spooled the upload (bounded by MAX_CONTENT_LENGTH);
+            # decode from that stream rather than copying it into bytes
+            return jsonify(disease_report(file.stream, request.form.get('format') == 'raw', k))
             
+        except ImageRejected as e:
+            return jsonify({'error': str(e)}), 400
+        except Overloaded as e:
+            return overloaded_response(e)
         except Exception as e:
-            logging.error(f"Error in disease prediction: {e}")
+            log_request_error('disease_prediction_failed', e)
             return jsonify({'error': str(e)}), 500
 
     @app.route("/predict-yield", methods=["POST"])
     def predict_yield():
         try:
-            # Validate input
-            required_fields = ['Year', 'average_rain_fall_mm_per_year', 'pesticides_tonnes', 'avg_temp', 'Area', 'Item']
-            for field in required_fields:
-                if field not in request.form:
-                    return jsonify({"error": f"Missing required field: {field}"}), 400
-            
-            Year = int(request.form['Year'])
-            rainfall = float(request.form['average_rain_fall_mm_per_year'])
-            pesticides = float(request.form['pesticides_tonnes'])
-            avg_temp = float(request.form['avg_temp'])
-            Area = request.form['Area']
-            Item = request.form['Item']
+            record = request_record()
+            if not model_loader.is_model_available('yield_model'):
+                return jsonify({"error": "Yield prediction model not available"}), 503
+
+            numeric, text = YIELD_SCHEMA.parse(
+                record, choices=dict(zip(YIELD_CATEGORICAL_FIELDS, yield_categories(model_loader)))
+            )
+            Year, rainfall, pesticides, avg_temp = numeric.tolist()
+            return jsonify(yield_report(int(Year), rainfall, pesticides, avg_temp, text['Area'], text['Item']))
+
+        except SchemaError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            log_request_error('yield_prediction_failed', e)
+            return jsonify({"error": "Error processing yield prediction"}), 500
+
+    @app.route("/predict-yield/batch", methods=["POST"])
+    def predict_yield_batch():
+        try:
+            fmt = requested_format('json')
+            frame = read_batch_rows(YIELD_BATCH_MAX_ROWS)
+            if frame is None:
+                return jsonify({"error": "Expected a JSON list of samples or CSV rows"}), 400
 
             if not model_loader.is_model_available('yield_model'):
                 return jsonify({"error": "Yield prediction model not available"}), 503
-            
-            # Make prediction
-            features = np.array([[Year, rainfall, pesticides, avg_temp, Area, Item]], dtype=object)
-            preprocessor = model_loader.get_model('yield_preprocessor')
-            model = model_loader.get_model('yield_model')
-            
-            transformed = preprocessor.transform(features)
-            prediction = model.predict(transformed)[0]
+
+            with time_stage('yield_batch', 'validate'):
+                numeric, areas, items, row_errors = validate_yield_rows(frame, yield_categories(model_loader))
+            valid_rows = np.flatnonzero([error is None for error in row_errors])
+            with time_stage('yield_batch', 'predict'):
+                predictions = offload(
+                    'yield', yield_prediction_batch,
+                    numeric[valid_rows], areas[valid_rows], items[valid_rows], model_loader
+                )
+
+            if fmt != 'json':
+                output = pd.DataFrame(numeric, columns=list(YIELD_NUMERIC_FIELDS))
+                output['Area'] = areas
+                output['Item'] = items
+                output['prediction'] = np.nan
+                output.loc[valid_rows, 'prediction'] = predictions
+                output['error'] = row_errors
+                chunks = (output.iloc[start:start + YIELD_GRID_CHUNK_ROWS]
+                          for start in range(0, len(output), YIELD_GRID_CHUNK_ROWS))
+                response = Response(stream_records(chunks, fmt), mimetype=STREAM_FORMATS[fmt])
+                response.headers['X-Model-Version'] = str(model_loader.get_model_version('yield'))
+                return response
+
+            results = [{"row": i, "error": error} for i, error in enumerate(row_errors)]
+            for i, prediction in zip(valid_rows.tolist(), predictions.tolist()):
+                results[i] = {"row": i, "prediction": prediction}
 
             return jsonify({
-                "prediction": float(prediction),
+                "results": results,
                 "unit": "tonnes per hectare",
-                "input_features": {
-                    "year": Year, "rainfall": rainfall, "pesticides": pesticides,
-                    "avg_temperature": avg_temp, "area": Area, "item": Item
-                }
+                "total": len(results),
+                "succeeded": len(valid_rows),
+                "failed": len(results) - len(valid_rows),
+                "model_version": model_loader.get_model_version('yield')
             })
-            
+
+        except BatchTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except ValueError as e:
+            return jsonify({"error": f"Invalid batch data: {str(e)}"}), 400
+        except Overloaded as e:
+            return overloaded_response(e)
         except Exception as e:
-            logging.error(f"Error in yield prediction: {e}")
-            return jsonify({"error": "Error processing yield prediction"}), 500
+            log_request_error('yield_batch_prediction_failed', e)
+            return jsonify({"error": "Internal server error"}), 500
 
-def model_prediction(image_bytes, model_loader):
-    """Predict disease from image bytes"""
-    image = Image.open(io.BytesIO(image_bytes)).resize((128, 128))
-    input_arr = tf.keras.preprocessing.image.img_to_array(image)
-    input_arr = np.expand_dims(input_arr, axis=0)  # batch dimension
-    
-    # Load the disease model
+    @app.route("/predict-yield/grid", methods=["POST"])
+    def predict_yield_grid():
+        try:
+            fmt = requested_format('ndjson', allowed=('ndjson', 'csv'))
+            payload = request.get_json(silent=True)
+            if not isinstance(payload, dict) or not isinstance(payload.get('base', {}), dict):
+                return jsonify({"error": "Expected a JSON object with 'base' and 'ranges'"}), 400
+
+            grid = ScenarioGrid(
+                payload.get('base', {}), payload.get('ranges'), max_points=YIELD_GRID_MAX_POINTS,
+                fields={field.name: field for field in YIELD_SCHEMA.fields}
+            )
+
+            if not model_loader.is_model_available('yield_model'):
+                return jsonify({"error": "Yield prediction model not available"}), 503
+
+            # Reject unknown categories before the response starts streaming
+            for field, known in zip(YIELD_CATEGORICAL_FIELDS, yield_categories(model_loader)):
+                unknown = [value for value in grid.axes[field] if value not in known]
+                if unknown:
+                    return jsonify({"error": f"Unknown {field}: {', '.join(unknown)}"}), 400
+
+            chunks = yield_grid_predictions(grid, model_loader)
+            if 'yield' in inference_pools:
+                chunks = inference_pools['yield'].stream(chunks)
+            response = Response(
+                stream_with_context(stream_records(chunks, fmt)),
+                mimetype=STREAM_FORMATS[fmt]
+            )
+            response.headers['X-Grid-Points'] = str(grid.size)
+            response.headers['X-Model-Version'] = str(model_loader.get_model_version('yield'))
+            return response
+
+        except GridTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except ValueError as e:
+            return jsonify({"error": f"Invalid scenario grid: {str(e)}"}), 400
+        except Overloaded as e:
+            return overloaded_response(e)
+        except Exception as e:
+            log_request_error('yield_grid_failed', e)
+            return jsonify({"error": "Internal server error"}), 500
+
+    @app.route("/field-report", methods=["POST"])
+    def field_report():
+        try:
+            k = requested_top_k()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        record = request_record()
+
+        # Every field is parsed once, whichever sections read it
+        values, field_errors = FIELD_REPORT_SCHEMA.parse_fields(record)
+        present = set(values) | set(field_errors)
+        image = request.files.get('image')
+        raw = record.get('format') == 'raw'
+
+        def crop_section(*features):
+            if not model_loader.is_model_available('crop_model'):
+                raise ReportSectionError("Crop recommendation model not available", 503)
+            return crop_report(list(features), k)
+
+        def fertilizer_section(crop_name, N, P, K):
+            result = fertilizer_report(crop_name, whole(N), whole(P), whole(K))
+            if result is None:
+                raise ReportSectionError(f"Crop '{crop_name}' not found in database")
+            return result
+
+        def yield_section(Year, rainfall, pesticides, avg_temp, Area, Item):
+            if not model_loader.is_model_available('yield_model'):
+                raise ReportSectionError("Yield prediction model not available", 503)
+            for field, value, known in zip(YIELD_CATEGORICAL_FIELDS, (Area, Item), yield_categories(model_loader)):
+                if value not in known:
+                    raise ReportSectionError(f"Unknown {field}: {value}")
+            return yield_report(Year, rainfall, pesticides, avg_temp, Area, Item)
+
+        def disease_section(image_source):
+            if not model_loader.is_model_available('disease_model'):
+                raise ReportSectionError("Disease detection model not available", 503)
+            return disease_report(image_source, raw, k)
+
+        requested = {
+            'crop': bool(present & {'Temperature', 'Humidity', 'pH', 'Rainfall'}),
+            'fertilizer': bool(present & set(FIELD_REPORT_SECTIONS['fertilizer'])),
+            'yield': bool(present & set(FIELD_REPORT_SECTIONS['yield'])),
+            'disease': image is not None
+        }
+        if not any(requested.values()):
+            return jsonify({
+                "error": "Expected the fields of at least one section: crop, fertilizer, yield or disease (image)"
+            }), 400
+        # Without a cropname, fertilizer advice is for the recommended crop
+        fertilizer_follows_crop = requested['crop'] and requested['fertilizer'] and 'cropname' not in present
+
+        results, errors, futures = {}, {}, {}
+        runners = {'crop': crop_section, 'fertilizer': fertilizer_section, 'yield': yield_section}
+        for section, run in runners.items():
+            if not requested[section] or (section == 'fertilizer' and fertilizer_follows_crop):
+                continue
+            try:
+                inputs = section_inputs(FIELD_REPORT_SECTIONS[section], values, field_errors)
+                futures[section] = report_pool.submit(run, *inputs)
+            except (ReportSectionError, Overloaded) as e:
+                errors[section] = section_error(e)
+        if requested['disease']:
+            try:
+                if image.filename == '':
+                    raise ReportSectionError("No selected file")
+                futures['disease'] = report_pool.submit(disease_section, image.stream)
+            except (ReportSectionError, Overloaded) as e:
+                errors['disease'] = section_error(e)
+
+        # Wait for every section; one failing leaves the others' results in place
+        for section, future in futures.items():
+            try:
+                results[section] = future.result()
+            except (ReportSectionError, ImageRejected, Overloaded) as e:
+                errors[section] = section_error(e)
+            except Exception as e:
+                log_request_error(f'field_report_{section}_failed', e)
+                errors[section] = {"error": "Internal server error", "status": 500}
+
+        if fertilizer_follows_crop:
+            try:
+                if 'crop' not in results:
+                    raise ReportSectionError("Missing required field: cropname")
+                inputs = section_inputs(FIELD_REPORT_SECTIONS['fertilizer'][1:], values, field_errors)
+                results['fertilizer'] = fertilizer_section(results['crop']['prediction'], *inputs)
+            except ReportSectionError as e:
+                errors['fertilizer'] = section_error(e)
+            except Exception as e:
+                log_request_error('field_report_fertilizer_failed', e)
+                errors['fertilizer'] = {"error": "Internal server error", "status": 500}
+
+        response = jsonify({
+            **results,
+            "sections": [section for section, wanted in requested.items() if wanted],
+            "errors": errors,
+            "partial": bool(errors)
+        })
+        if not results:
+            # Nothing to show: report the most serious section failure
+            response.status_code = max(error["status"] for error in errors.values())
+        retry_after = [error["retry_after"] for error in errors.values() if "retry_after" in error]
+        if response.status_code == 429 and retry_after:
+            response.headers['Retry-After'] = str(max(retry_after))
+        return response
+
+def overloaded_response(error):
+    """429 telling the client when to retry a request refused by a full inference pool"""
+    request_errors.inc(event=f"{error.name}_overloaded")
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def log_request_error(event, error, **fields):
+    """Count an unhandled request error and write a sampled structured log line"""
+    request_errors.inc(event=event)
+    request_log.error(event, error, endpoint=request.path, **fields)
+
+def instrument_requests(app):
+    """Record per-endpoint latency and in-flight requests"""
+    if not metrics.enabled:
+        return
+
+    def endpoint_label():
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        requests_in_flight.inc(endpoint=endpoint_label())
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            request_seconds.observe(
+                time.perf_counter() - started,
+                endpoint=endpoint_label(), method=request.method, status=response.status_code
+            )
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        requests_in_flight.dec(endpoint=endpoint_label())
+
+def log_predictions(app, logger):
+    """Record every prediction request's inputs, outputs, model version and stage timings
+
+    Runs on the request thread, so it only gathers what the request already
+    holds: the JSON or CSV body, the parsed form fields, a content hash of
+    each uploaded image and the JSON response bytes. Decoding and writing
+    happen on the logger's thread.
+    """
+    def logged():
+        rule = request.url_rule.rule if request.url_rule is not None else ''
+        return request.method == 'POST' and rule.startswith(LOGGED_ROUTE_PREFIXES)
+
+    @app.before_request
+    def start_prediction_record():
+        if logged():
+            stages, g.prediction_stages_token = collect_stages()
+            g.prediction_record = (time.time(), time.perf_counter(), stages)
+
+    @app.after_request
+    def record_prediction(response):
+        started = g.pop('prediction_record', None)
+        if started is None:
+            return response
+        timestamp, perf_started, stages = started
+        try:
+            inputs, input_format, image_hashes = request_inputs(logger.max_body_bytes)
+            outputs = None
+            if response.is_json and not response.is_streamed and (response.content_length or 0) <= logger.max_body_bytes:
+                outputs = response.get_data()
+            logger.record({
+                'timestamp': timestamp,
+                'endpoint': request.url_rule.rule,
+                'query': request.query_string.decode('utf-8', 'replace'),
+                'status': response.status_code,
+                'latency_ms': (time.perf_counter() - perf_started) * 1e3,
+                'worker': os.getpid(),
+                'model_version': response.headers.get('X-Model-Version', ''),
+                'input_format': input_format,
+                'inputs': inputs,
+                'image_hash': ','.join(image_hashes),
+                'outputs': outputs,
+                'stages': stages
+            })
+        except Exception as e:
+            request_log.error('prediction_log_failed', e, endpoint=request.path)
+        return response
+
+    @app.teardown_request
+    def stop_prediction_record(error=None):
+        token = g.pop('prediction_stages_token', None)
+        if token is not None:
+            stop_collecting_stages(token)
+
+def request_inputs(max_bytes):
+    """The request's inputs as (body or form fields, format, image hashes)
+
+    JSON and CSV bodies are kept as sent, up to ``max_bytes``. Uploaded
+    images are identified by content hash only; a CSV uploaded as ``file``
+    is kept like a CSV body.
+    """
+    too_large = (request.content_length or 0) > max_bytes
+    if request.is_json:
+        return (None if too_large else request.get_data()), 'json', []
+    if request.mimetype == 'text/csv':
+        return (None if too_large else request.get_data()), 'csv', []
+
+    image_hashes, inputs, input_format = [], request.form.to_dict(), 'form'
+    for name, upload in request.files.items():
+        if name == 'file':
+            upload.stream.seek(0)
+            inputs, input_format = (None if too_large else upload.stream.read()), 'csv'
+            upload.stream.seek(0)
+        else:
+            upload.stream.seek(0)
+            image_hashes.append(content_hash(upload.stream))
+    return inputs, input_format, image_hashes
+
+def register_state_metrics(model_loader, prediction_cache, disease_cache, disease_batcher, inference_pools=None):
+    """Expose model readiness, cache hit rates, batching and inference pool state, read at scrape time"""
+    metrics.gauge_callback(
+        'model_ready', 'Whether each model group is loaded (1) or not (0)', ('group',),
+        lambda: {group: float(state == 'ready') for group, state in model_loader.get_model_readiness().items()}
+    )
+
+    caches = {}
+    if prediction_cache is not None:
+        caches['prediction'] = prediction_cache
+    if disease_cache is not None:
+        caches['disease'] = disease_cache
+    if caches:
+        metrics.gauge_callback(
+            'cache_hit_ratio', 'Cache hits over lookups since start', ('cache',),
+            lambda: {name: cache.get_stats()['hit_rate'] for name, cache in caches.items()}
+        )
+        metrics.gauge_callback(
+            'cache_entries', 'Entries held in each cache', ('cache',),
+            lambda: {name: cache.get_stats()['entries'] for name, cache in caches.items()}
+        )
+
+    if disease_batcher is not None:
+        metrics.gauge_callback(
+            'inference_queue_depth', 'Images waiting for a batched forward pass', ('model',),
+            lambda: {disease_batcher.name: disease_batcher.get_stats()['queue_depth']}
+        )
+
+    if inference_pools:
+        metrics.gauge_callback(
+            'inference_pool_pending', 'Requests running or queued on each inference pool', ('model',),
+            lambda: {name: pool.get_stats()['pending'] for name, pool in inference_pools.items()}
+        )
+        metrics.gauge_callback(
+            'inference_pool_rejected', 'Requests refused with 429 by each inference pool since start', ('model',),
+            lambda: {name: pool.get_stats()['rejected'] for name, pool in inference_pools.items()}
+        )
+
+def section_inputs(fields, values, errors):
+    """Values of a section's fields in order, or ReportSectionError naming the invalid and missing ones"""
+    messages = [errors[field] for field in fields if field in errors]
+    messages += [f"Missing required field: {field}" for field in fields if field not in values and field not in errors]
+    if messages:
+        raise ReportSectionError("; ".join(messages))
+    return [values[field] for field in fields]
+
+def section_error(error):
+    """Error entry for a failed field report section, with the status its own endpoint would return"""
+    if isinstance(error, Overloaded):
+        request_errors.inc(event=f"{error.name}_overloaded")
+        return {"error": str(error), "status": 429, "retry_after": error.retry_after}
+    return {"error": str(error), "status": getattr(error, 'status', 400)}
+
+def whole(number):
+    """An integral float as an int, so results match the integer form fields of /predict-fertilizer"""
+    return int(number) if float(number).is_integer() else number
+
+def request_record():
+    """The single record of a request: a JSON object body or the form fields"""
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        return payload if isinstance(payload, dict) else {}
+    return request.form
+
+class BatchTooLarge(ValueError):
+    """Raised by read_batch_rows before a batch over its row limit becomes a DataFrame"""
+
+def read_batch_rows(max_rows):
+    """Read at most ``max_rows`` batch rows from a JSON body or CSV upload into a DataFrame
+
+    Accepts a JSON list of objects (optionally wrapped as {"samples": [...]}),
+    a columnar JSON object of equal-length lists ({"Nitrogen": [...], ...}),
+    a CSV file uploaded as the ``file`` form field, or a raw text/csv body.
+    Returns None when the request carries none of these. The body itself is
+    bounded by MAX_CONTENT_LENGTH; JSON rows are counted before a DataFrame
+    is built and CSV parsing stops one row past the limit, raising
+    BatchTooLarge either way.
+    """
+    def check(rows):
+        if rows > max_rows:
+            raise BatchTooLarge(f"Batch too large: {rows} rows (max {max_rows})")
+
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict) and 'samples' not in payload:
+            columns = list(payload.values())
+            if not columns or not all(isinstance(column, list) and len(column) == len(columns[0]) for column in columns):
+                return None
+            check(len(columns[0]))
+            return pd.DataFrame(payload)
+        if isinstance(payload, dict):
+            payload = payload.get('samples')
+        if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+            return None
+        check(len(payload))
+        return pd.DataFrame.from_records(payload)
+
+    if 'file' in request.files:
+        source = request.files['file'].stream
+    elif request.mimetype == 'text/csv':
+        # Cached, so the prediction log can still record the body
+        source = io.BytesIO(request.get_data())
+    else:
+        return None
+
+    frame = pd.read_csv(source, dtype=str, skipinitialspace=True, nrows=max_rows + 1)
+    if len(frame) > max_rows:
+        raise BatchTooLarge(f"Batch too large: more than {max_rows} rows (max {max_rows})")
+    return frame
+
+def validate_crop_rows(frame):
+    """Validate all crop rows at once
+
+    Returns a float64 feature matrix in CROP_FEATURE_FIELDS order and a list
+    holding None for valid rows or an error message for invalid ones.
+    """
+    features, _, row_errors = CROP_SCHEMA.parse_batch(frame)
+    return features, row_errors
+
+def crop_ranking(probabilities, model, k):
+    """Top-k crops with probabilities for rows of ``predict_proba`` output"""
+    labels = [CROP_CLASSES.get(label, "Unknown") for label in model.classes_.tolist()]
+    return ranked_predictions(
+        calibrate(probabilities, CROP_CONFIDENCE_TEMPERATURE), labels, k, label_key='crop',
+        high=CONFIDENCE_HIGH, medium=CONFIDENCE_MEDIUM
+    )
+
+def crop_probabilities(features, scaler, model, index=None):
+    """``predict_proba`` for raw feature rows, answered from the lookup index where it can be
+
+    Rows the index leaves to the model (all rows without an index) are
+    scaled and scored in a single scaler/model call.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    if index is None:
+        hits, probabilities = np.zeros(len(features), dtype=bool), None
+    else:
+        with time_stage('crop', 'index_lookup'):
+            probabilities, hits = index.lookup(features, CROP_INDEX_MODE)
+        answered = int(hits.sum())
+        crop_index_lookups.inc(answered, result='hit')
+        crop_index_lookups.inc(len(hits) - answered, result='fallback')
+        if answered == len(hits):
+            return probabilities
+
+    misses = ~hits
+    with time_stage('crop', 'scale'):
+        scaled = scaler.transform(features[misses])
+    with time_stage('crop', 'predict'):
+        model_probabilities = model.predict_proba(scaled)
+    if probabilities is None:
+        return model_probabilities
+    probabilities[misses] = model_probabilities
+    return probabilities
+
+def crop_prediction_batch(features, model_loader, k=None):
+    """Predict crops for a feature matrix in a single lookup and scaler/model call
+
+    Returns crop names, or with ``k`` the top-k ranking of each row from
+    the same probabilities.
+    """
+    if len(features) == 0:
+        return []
+    scaler, model, index = model_loader.get_models('crop_scaler', 'crop_model', 'crop_index')
+    probabilities = crop_probabilities(features, scaler, model, index)
+
+    if k is not None:
+        return crop_ranking(probabilities, model, k)
+    labels = model.classes_[probabilities.argmax(axis=1)]
+    return [CROP_CLASSES.get(label, "Unknown") for label in labels.tolist()]
+
+def yield_categories(model_loader):
+    """Get the Area and Item labels the yield preprocessor was fitted on"""
+    engine = model_loader.get_model('yield_engine')
+    if engine is not None:
+        return tuple(set(columns) for columns in engine.category_columns)
+    encoder = model_loader.get_model('yield_preprocessor').named_transformers_['OneHotEncode']
+    return tuple(set(categories) for categories in encoder.categories_)
+
+def validate_yield_rows(frame, categories):
+    """Validate all yield rows at once
+
+    Returns the (n, 4) numeric matrix, the Area and Item label arrays and a
+    list holding None for valid rows or an error message for invalid ones.
+    Non-integer years and categories unknown to the model are invalid.
+    """
+    numeric, text, row_errors = YIELD_SCHEMA.parse_batch(frame, choices=dict(zip(YIELD_CATEGORICAL_FIELDS, categories)))
+    return numeric, text['Area'], text['Item'], row_errors
+
+def yield_prediction_batch(numeric, areas, items, model_loader):
+    """Predict yields for many rows in a single pass
+
+    Uses the compiled engine when it is enabled, otherwise one
+    preprocessor.transform and model.predict call over all rows.
+    """
+    if len(numeric) == 0:
+        return np.empty(0, dtype=np.float64)
+    engine = model_loader.get_model('yield_engine')
+    if engine is not None:
+        return engine.predict(numeric, areas, items)
+
+    rows = np.empty((len(numeric), len(YIELD_FIELDS)), dtype=object)
+    rows[:, :len(YIELD_NUMERIC_FIELDS)] = numeric
+    rows[:, -2] = areas
+    rows[:, -1] = items
+    preprocessor, model = model_loader.get_models('yield_preprocessor', 'yield_model')
+    return model.predict(preprocessor.transform(rows))
+
+def yield_grid_predictions(grid, model_loader, chunk_rows=YIELD_GRID_CHUNK_ROWS):
+    """Score a scenario grid chunk by chunk, yielding DataFrames of inputs and predictions
+
+    Grid points are ordered by Area, Item and then the numeric fields.
+    With the compiled engine the numeric grid is scaled once and each
+    Area x Item pair is encoded once, so a chunk is a single tree pass.
+    """
+    numeric = grid.numeric_grid()
+    pairs = list(grid.pairs())
+    pair_areas = np.array([area for area, _ in pairs], dtype=object)
+    pair_items = np.array([item for _, item in pairs], dtype=object)
+
+    engine = model_loader.get_model('yield_engine')
+    if engine is not None:
+        scaled = engine.scale_numeric(numeric)
+        area_columns, item_columns = engine.encode_categories(pair_areas, pair_items)
+
+    n_points = len(numeric)
+    for start in range(0, grid.size, chunk_rows):
+        index = np.arange(start, min(start + chunk_rows, grid.size))
+        pair_index, point_index = np.divmod(index, n_points)
+
+        if engine is not None:
+            predictions = engine.predict_encoded(
+                scaled[point_index], area_columns[pair_index], item_columns[pair_index]
+            )
+        else:
+            predictions = yield_prediction_batch(
+                numeric[point_index], pair_areas[pair_index], pair_items[pair_index], model_loader
+            )
+
+        frame = pd.DataFrame(numeric[point_index], columns=list(YIELD_NUMERIC_FIELDS))
+        frame['Year'] = frame['Year'].astype(np.int64)
+        frame['Area'] = pair_areas[pair_index]
+        frame['Item'] = pair_items[pair_index]
+        frame['prediction'] = predictions
+        yield frame
+
+def stream_records(frames, fmt):
+    """Stream DataFrames as NDJSON lines or one CSV document"""
+    header = True
+    for frame in frames:
+        if fmt == 'csv':
+            yield frame.to_csv(index=False, header=header)
+            header = False
+        else:
+            yield frame.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+
+def requested_format(default, allowed=STREAM_FORMATS):
+    """Pick the response format from ?format= or the Accept header"""
+    fmt = request.args.get('format')
+    if fmt is None:
+        accept = request.accept_mimetypes
+        fmt = next((name for name, mimetype in STREAM_FORMATS.items()
+                    if name in allowed and accept.best == mimetype), default)
+    if fmt not in allowed:
+        raise ValueError(f"Unsupported format '{fmt}' (expected one of: {', '.join(allowed)})")
+    return fmt
+
+def requested_top_k(default=TOP_K_DEFAULT):
+    """Read ``top_k`` from the query string or form, default TOP_K_DEFAULT"""
+    value = request.args.get('top_k', request.form.get('top_k'))
+    if value is None:
+        return default
+    try:
+        k = int(value)
+    except ValueError:
+        raise ValueError(f"top_k must be an integer, got '{value}'")
+    if not 1 <= k <= TOP_K_MAX:
+        raise ValueError(f"top_k must be between 1 and {TOP_K_MAX}")
+    return k
+
+def disease_ranking(probabilities, class_names, k):
+    """Top-k disease classes with probabilities for each row of model output"""
+    return ranked_predictions(
+        calibrate(as_probabilities(probabilities), DISEASE_CONFIDENCE_TEMPERATURE), class_names, k,
+        label_key='class', high=CONFIDENCE_HIGH, medium=CONFIDENCE_MEDIUM
+    )
+
+def disease_response(catalog, ranked):
+    """Catalog response for the top class, with the ranking and disease names for each candidate"""
+    for entry in ranked["top_k"]:
+        entry["disease"] = extract_disease_name(entry["class"])
+    index = catalog.class_names.index(ranked["top_k"][0]["class"])
+    return {**catalog.response_for(index), **ranked}
+
+def model_prediction(image_source, model_loader, batcher=None, image_cache=None, preprocessor=None, raw=False):
+    """Predict the disease class index from image bytes or a seekable upload stream"""
+    return int(np.argmax(disease_probabilities(image_source, model_loader, batcher, image_cache, preprocessor, raw)))
+
+def disease_probabilities(image_source, model_loader, batcher=None, image_cache=None, preprocessor=None, raw=False):
+    """Get the disease model's class scores for image bytes or a seekable upload stream
+
+    The image header is checked first, so unsupported or oversized images
+    raise ImageRejected before anything is hashed or decoded. With ``raw``
+    the upload holds uint8 pixels already at the model's input size and is
+    not decoded at all. When a batcher is given the image is queued and
+    scored together with other concurrent uploads instead of in its own
+    forward pass. When an image cache is given, repeated uploads are
+    answered without running the model. Decoding runs on the
+    preprocessor's decode pool if it has one.
+    """
+    preprocessor = preprocessor or default_preprocessor
+    if not raw:
+        with time_stage('disease', 'inspect'):
+            preprocessor.inspect(image_source)
+
+    if image_cache is not None:
+        with time_stage('disease', 'cache_lookup'):
+            version = model_loader.get_model_version('disease')
+            image_hash = content_hash(image_source)
+            cached = image_cache.get_by_content(image_hash, version)
+        if cached is not None:
+            return cached
+
+    # Decode straight to the loaded model's input shape
     model = model_loader.get_model('disease_model')
-    predictions = model.predict(input_arr)
-    return np.argmax(predictions)
+    with time_stage('disease', 'decode'):
+        input_arr = preprocessor.preprocess(image_source, model_input_shape(model), raw=raw)
+
+    phash = None
+    if image_cache is not None and image_cache.use_perceptual_hash:
+        with time_stage('disease', 'perceptual_hash'):
+            phash = perceptual_hash(input_arr)
+            cached = image_cache.get_by_perceptual(phash, version)
+        if cached is not None:
+            return cached
+
+    # Includes queueing for a shared batch when a batcher is used
+    with time_stage('disease', 'predict'):
+        if batcher is not None:
+            scores = batcher.predict(input_arr)
+        else:
+            input_arr = np.expand_dims(input_arr, axis=0)  # batch dimension
+            scores = model.predict(input_arr)[0]
+    # Cached as a small float32 vector so a hit can still report top-k
+    scores = np.array(scores, dtype=np.float32).ravel()
+
+    if image_cache is not None:
+        image_cache.put(image_hash, version, scores, phash)
+    return scores
+
+def disease_probabilities_batch(images, model_loader, preprocessor=None):
+    """Get class scores for a list of image bytes in a single model call
+
+    Returns ``(scores, errors)``: ``scores`` has one row per decodable image,
+    in order; an image that cannot be decoded gets an error message instead.
+    """
+    model = model_loader.get_model('disease_model')
+    if model is None:
+        raise RuntimeError("Disease detection model not available")
+    preprocessor = preprocessor or default_preprocessor
+    input_shape = model_input_shape(model)
+
+    batch = np.empty((len(images),) + input_shape, dtype=np.float32)
+    errors, decoded = [None] * len(images), []
+    for i, image_bytes in enumerate(images):
+        try:
+            preprocessor.decode(image_bytes, input_shape, out=batch[i])
+            decoded.append(i)
+        except Exception as e:
+            errors[i] = f"Could not decode image: {e}"
+
+    if not decoded:
+        return np.empty((0, 0), dtype=np.float32), errors
+    return np.asarray(model.predict(batch[decoded], verbose=0)), errors
 
 def get_fertilizer_recommendations():
     """Get fertilizer recommendation dictionary"""
-    return {
-        'NHigh': """The N value of soil is high and might give rise to weeds.
-        Please consider the following suggestions:
-        1. Manure – adding manure is one of the simplest ways to amend your soil with nitrogen.
-        2. Coffee grounds – use your morning addiction to feed your gardening habit!
-        3. Plant nitrogen fixing plants – planting vegetables in Fabaceae family like peas, beans and soybeans.
-        4. Plant 'green manure' crops like cabbage, corn and broccoli.
-        5. Use mulch (wet grass) while growing crops.""",
-
-        'Nlow': """The N value of your soil is low.
-        Please consider the following suggestions:
-        1. Add sawdust or fine woodchips to your soil.
-        2. Plant heavy nitrogen feeding plants – tomatoes, corn, broccoli, cabbage and spinach.
-        3. Water – soaking your soil with water will help leach the nitrogen deeper.
-        4. Add composted manure to the soil.
-        5. Plant Nitrogen fixing plants like peas or beans.
-        6. Use NPK fertilizers with high N value.""",
-
-        'PHigh': """The P value of your soil is high.
-        Please consider the following suggestions:
-        1. Avoid adding manure – manure contains high levels of phosphorous.
-        2. Use only phosphorus-free fertilizer.
-        3. Water your soil liberally to drive phosphorous out.
-        4. Plant nitrogen fixing vegetables to increase nitrogen without increasing phosphorous.
-        5. Use crop rotations to decrease high phosphorous levels.""",
-
-        'Plow': """The P value of your soil is low.
-        Please consider the following suggestions:
-        1. Bone meal – a fast acting source made from ground animal bones.
-        2. Rock phosphate – a slower acting source.
-        3. Phosphorus Fertilizers – applying fertilizer with high phosphorous content.
-        4. Organic compost – adding quality organic compost.
-        5. Manure – excellent source of phosphorous.
-        6. Ensure proper soil pH – having pH in 6.0 to 7.0 range.""",
-
-        'KHigh': """The K value of your soil is high.
-        Please consider the following suggestions:
-        1. Loosen the soil deeply and water thoroughly to dissolve water-soluble potassium.
-        2. Remove as many rocks as possible from soil.
-        3. Stop applying potassium-rich commercial fertilizer.
-        4. Mix crushed eggshells, seashells, wood ash to add calcium.
-        5. Use NPK fertilizers with low K levels.""",
-
-        'Klow': """The K value of your soil is low.
-        Please consider the following suggestions:
-        1. Mix in muricate of potash or sulphate of potash.
-        2. Try kelp meal or seaweed.
-        3. Try Sul-Po-Mag.
-        4. Bury banana peels an inch below the soil surface.
-        5. Use Potash fertilizers since they contain high potassium values."""
-    }
-
-def load_disease_info(predicted_class):
-    """Load disease information from JSON file and match with predicted class"""
+    return FERTILIZER_RECOMMENDATIONS
+
+def load_disease_info(predicted_class, catalog=None):
+    """Load disease information and match with predicted class
+
+    Uses the indexed catalog when one is given, otherwise scans the JSON file.
+    """
+    if catalog is not None:
+        return catalog.get_info(predicted_class)
+
     try:
         # Convert class name format to match JSON (handle different naming conventions)
         normalized_class = normalize_class_name(predicted_class)
         
         # Load disease data using the configured path
-        with open(PLANT_DISEASE_DATA_PATH, 'r') as f:
+        with time_stage('disease', 'info_file_scan'), open(PLANT_DISEASE_DATA_PATH, 'r') as f:
             disease_data = json.load(f)
         
         # Find matching disease info
@@ -323,39 +1224,4 @@ def load_disease_info(predicted_class):
         return None
     except Exception as e:
         logging.error(f"Error loading disease info: {e}")
-        return None
-
-def normalize_class_name(class_name):
-    """Normalize class names for better matching"""
-    # Handle different naming conventions between model output and JSON
-    replacements = {
-        'Cherry_(including_sour)___Powdery_mildew': 'Cherry___Powdery_mildew',
-        'Cherry_(including_sour)___healthy': 'Cherry___healthy',
-        'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot': 'Corn___Cercospora_leaf_spot Gray_leaf_spot',
-        'Corn_(maize)___Common_rust_': 'Corn___Common_rust',
-        'Corn_(maize)___Northern_Leaf_Blight': 'Corn___Northern_Leaf_Blight',
-        'Corn_(maize)___healthy': 'Corn___healthy',
-        'Pepper,_bell___Bacterial_spot': 'Pepper,_bell___Bacterial_spot',
-        'Pepper,_bell___healthy': 'Pepper,_bell___healthy'
-    }
-    
-    normalized = replacements.get(class_name, class_name)
-    return normalized
-
-def extract_disease_name(class_name):
-    """Extract clean disease name from class name (remove fruit/plant prefix)"""
-    # Split by ___ and take the disease part
-    if '___' in class_name:
-        parts = class_name.split('___')
-        if len(parts) >= 2:
-            disease_name = parts[1]
-            # Clean up common patterns
-            disease_name = disease_name.replace('_', ' ').strip()
-            # Handle special cases
-            if disease_name.lower() == 'healthy':
-                plant_name = parts[0].replace('_', ' ').replace('(', '').replace(')', '').replace(',', '').strip()
-                return f"Healthy {plant_name}"
-            return disease_name
-    
-    # Fallback: just clean up underscores
-    return class_name.replace('_', ' ').strip()
\ No newline at end of file
+        return None
\ No newline at end of file
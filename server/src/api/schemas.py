@@ -0,0 +1,207 @@
+"""
+Declarative input schemas for the predict routes
+
+A schema lists its fields once (name, bounds, whether it is an integer or a
+text label) and is compiled to arrays of bounds, so a single form or JSON
+record and a whole columnar batch go through the same checks and produce
+the same error messages. Numeric fields come out as one typed NumPy row or
+matrix in field order, ready for the models.
+"""
+import numpy as np
+import pandas as pd
+
+from src.utils.yield_engine import YIELD_CATEGORICAL_FIELDS
+
+
+class SchemaError(ValueError):
+    """Raised when a single record fails validation; ``errors`` lists every problem found"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class Field:
+    """One input field: a number within [minimum, maximum], optionally whole, or a text label"""
+
+    def __init__(self, name, minimum=-np.inf, maximum=np.inf, integer=False, text=False):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.integer = integer
+        self.text = text
+
+    def range_message(self):
+        if np.isinf(self.maximum):
+            return f"Value out of range for field: {self.name} (expected at least {self.minimum:g})"
+        return f"Value out of range for field: {self.name} (expected {self.minimum:g} to {self.maximum:g})"
+
+
+class Schema:
+    """Compiled validation for a set of fields
+
+    ``parse`` handles one form or JSON record and raises SchemaError with
+    every problem at once; ``parse_batch`` handles a DataFrame of rows and
+    returns one error message (or None) per row. Text fields can be checked
+    against sets of known labels passed as ``choices``.
+    """
+
+    def __init__(self, fields, dtype=np.float64):
+        self.fields = list(fields)
+        self.dtype = dtype
+        self.numeric = [field for field in self.fields if not field.text]
+        self.text = [field for field in self.fields if field.text]
+        self.numeric_names = [field.name for field in self.numeric]
+        self.minimum = np.array([field.minimum for field in self.numeric], dtype=np.float64)
+        self.maximum = np.array([field.maximum for field in self.numeric], dtype=np.float64)
+        self.integer = np.array([field.integer for field in self.numeric], dtype=bool)
+
+    def check(self, values, missing, invalid):
+        """Apply the bounds and integer checks to an (n, fields) matrix of parsed numbers
+
+        Returns the invalid and out-of-range masks; cells already missing or
+        invalid are not checked again.
+        """
+        invalid = invalid | (~missing & ~np.isfinite(values))
+        ok = ~missing & ~invalid
+        with np.errstate(invalid='ignore'):
+            invalid |= ok & self.integer & (values != np.round(values))
+            out_of_range = ok & ~invalid & ((values < self.minimum) | (values > self.maximum))
+        return invalid, out_of_range
+
+    def messages(self, missing, invalid, out_of_range):
+        """Error messages for one row's masks, in field order per kind of problem"""
+        messages = [f"Missing required field: {self.numeric_names[j]}" for j in np.flatnonzero(missing)]
+        messages += [f"Invalid value for field: {self.numeric_names[j]}" for j in np.flatnonzero(invalid)]
+        messages += [self.numeric[j].range_message() for j in np.flatnonzero(out_of_range)]
+        return messages
+
+    def text_message(self, field, value, choices):
+        """Error message for one text value, or None when it is acceptable"""
+        if value is None:
+            return f"Missing required field: {field.name}"
+        known = (choices or {}).get(field.name)
+        if known is not None and value not in known:
+            return f"Unknown {field.name}: {value}"
+        return None
+
+    def parse_fields(self, record, choices=None):
+        """Parse the fields present in one record into ``(values, errors)`` keyed by field name
+
+        Numbers are floats (ints for integer fields) and text is stripped.
+        Absent or blank fields appear in neither dict.
+        """
+        values, errors = {}, {}
+        for field in self.fields:
+            value = record.get(field.name)
+            if value is None or (isinstance(value, str) and not value.strip()):
+                continue
+            if field.text:
+                value = str(value).strip()
+                message = self.text_message(field, value, choices)
+                if message is None:
+                    values[field.name] = value
+                else:
+                    errors[field.name] = message
+                continue
+
+            try:
+                number = np.nan if isinstance(value, bool) else float(value)
+            except (TypeError, ValueError):
+                number = np.nan
+            if not np.isfinite(number) or (field.integer and not number.is_integer()):
+                errors[field.name] = f"Invalid value for field: {field.name}"
+            elif not field.minimum <= number <= field.maximum:
+                errors[field.name] = field.range_message()
+            else:
+                values[field.name] = int(number) if field.integer else number
+        return values, errors
+
+    def parse(self, record, choices=None):
+        """Parse one form or JSON record
+
+        Returns the numeric fields as a 1-d array of ``dtype`` in field order
+        and a dict of the text fields; raises SchemaError listing every
+        missing or invalid field.
+        """
+        values, errors = self.parse_fields(record, choices)
+        messages = [f"Missing required field: {field.name}" for field in self.fields
+                    if field.name not in values and field.name not in errors]
+        messages += [errors[field.name] for field in self.fields if field.name in errors]
+        if messages:
+            raise SchemaError(messages)
+        row = np.array([values[name] for name in self.numeric_names], dtype=self.dtype)
+        return row, {field.name: values[field.name] for field in self.text}
+
+    def parse_batch(self, frame, choices=None):
+        """Parse all rows of a DataFrame at once
+
+        Returns an (n, numeric fields) matrix of ``dtype``, a dict of text
+        columns as object arrays and a list holding None for valid rows or an
+        error message for invalid ones. Invalid cells are left as NaN.
+        """
+        n_rows = len(frame)
+        values = np.full((n_rows, len(self.numeric)), np.nan, dtype=np.float64)
+        missing = np.zeros(values.shape, dtype=bool)
+        invalid = np.zeros(values.shape, dtype=bool)
+
+        for j, name in enumerate(self.numeric_names):
+            if name not in frame.columns:
+                missing[:, j] = True
+                continue
+            column = frame[name]
+            parsed = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            is_null = column.isna().to_numpy().copy()
+            # Only cells that failed to parse can be blank, so strip just those
+            unparsed = np.flatnonzero(np.isnan(parsed) & ~is_null)
+            if len(unparsed):
+                is_null[unparsed] = (column.iloc[unparsed].astype(str).str.strip() == '').to_numpy()
+            missing[:, j] = is_null
+            invalid[:, j] = np.isnan(parsed) & ~is_null
+            values[:, j] = parsed
+
+        invalid, out_of_range = self.check(values, missing, invalid)
+        row_errors = [None] * n_rows
+        for i in np.flatnonzero((missing | invalid | out_of_range).any(axis=1)):
+            row_errors[i] = "; ".join(self.messages(missing[i], invalid[i], out_of_range[i]))
+
+        text = {}
+        for field in self.text:
+            column = frame[field.name] if field.name in frame.columns else pd.Series([None] * n_rows, index=frame.index)
+            is_null = column.isna().to_numpy()
+            labels = column.astype(str).str.strip().to_numpy(dtype=object)
+            labels[is_null] = None
+            known = (choices or {}).get(field.name)
+            bad = is_null.copy()
+            if known is not None:
+                bad |= ~is_null & ~np.fromiter((label in known for label in labels), dtype=bool, count=n_rows)
+            for i in np.flatnonzero(bad):
+                message = self.text_message(field, labels[i], choices)
+                row_errors[i] = message if row_errors[i] is None else f"{row_errors[i]}; {message}"
+            text[field.name] = labels
+
+        values[missing | invalid] = np.nan
+        return values.astype(self.dtype, copy=False), text, row_errors
+
+
+# Bounds are physical limits that catch unit and typing mistakes, not the
+# ranges the models were trained on
+CROP_SCHEMA = Schema([
+    Field('Nitrogen', 0, 1000), Field('Phosporus', 0, 1000), Field('Potassium', 0, 1000),
+    Field('Temperature', -60, 60), Field('Humidity', 0, 100), Field('pH', 0, 14), Field('Rainfall', 0, 10000)
+])
+
+FERTILIZER_SCHEMA = Schema([
+    Field('cropname', text=True),
+    Field('nitrogen', 0, 1000, integer=True), Field('phosphorous', 0, 1000, integer=True),
+    Field('pottasium', 0, 1000, integer=True)
+])
+
+YIELD_SCHEMA = Schema([
+    Field('Year', 1900, 2100, integer=True), Field('average_rain_fall_mm_per_year', 0, 15000),
+    Field('pesticides_tonnes', 0), Field('avg_temp', -60, 60),
+    *(Field(name, text=True) for name in YIELD_CATEGORICAL_FIELDS)
+])
+
+# Every field of a /field-report record; fertilizer reads N/P/K from the crop fields
+FIELD_REPORT_SCHEMA = Schema(CROP_SCHEMA.fields + [FERTILIZER_SCHEMA.fields[0]] + YIELD_SCHEMA.fields)
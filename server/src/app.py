@@ -12,22 +12,32 @@ import sys
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from config.settings import DEBUG, HOST, PORT, LOGS_DIR, LOG_FILE
+from config.settings import DEBUG, HOST, PORT, LOGS_DIR, LOG_FILE, MAX_CONTENT_LENGTH, INFERENCE_BLAS_THREADS
 from src.utils.model_loader import ModelLoader
 from src.api.routes import create_routes
+from src.utils.inference_limits import limit_native_threads
 
-def create_app():
-    """Application factory pattern"""
+def create_app(model_loader=None):
+    """Application factory pattern
+
+    Pass a ModelLoader to reuse models that were already loaded, e.g. in the
+    gunicorn master before forking workers.
+    """
     app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
     
     # Enable CORS
     CORS(app)
     
     # Configure logging
     setup_logging()
+
+    # Cap BLAS/OpenMP threads before any model runs; forked workers inherit it
+    limit_native_threads(INFERENCE_BLAS_THREADS)
     
     # Initialize model loader
-    model_loader = ModelLoader()
+    if model_loader is None:
+        model_loader = ModelLoader()
     print(model_loader.get_model_status())
     
     # Create routes
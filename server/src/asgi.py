@@ -0,0 +1,33 @@
+"""
+ASGI entry point for event-loop servers
+
+    uvicorn src.asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+Connections are accepted and read on the event loop; each request is handed
+to the Flask app on a thread pool of ASGI_THREADS threads (a2wsgi). Heavy
+inference then runs on the bounded per-model pools, which refuse excess work
+with 429, so the threads not tied up by slow models keep serving /health,
+/predict-fertilizer and the other cheap routes. The default pool size leaves
+ASGI_LIGHT_THREADS threads free even when every inference pool is full.
+
+Requires the optional a2wsgi and uvicorn packages.
+"""
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError as e:
+    raise ImportError("ASGI serving needs the optional a2wsgi package: pip install a2wsgi uvicorn") from e
+
+from config.settings import (
+    INFERENCE_POOLS_ENABLED, DISEASE_POOL_WORKERS, DISEASE_POOL_QUEUE,
+    CROP_POOL_WORKERS, CROP_POOL_QUEUE, YIELD_POOL_WORKERS, YIELD_POOL_QUEUE,
+    ASGI_THREADS, ASGI_LIGHT_THREADS
+)
+from src.wsgi import app as wsgi_app
+
+# Threads that can be waiting on inference pools when they are all full
+INFERENCE_THREADS = (
+    DISEASE_POOL_WORKERS + DISEASE_POOL_QUEUE + CROP_POOL_WORKERS + CROP_POOL_QUEUE
+    + YIELD_POOL_WORKERS + YIELD_POOL_QUEUE
+) if INFERENCE_POOLS_ENABLED else 0
+
+app = WSGIMiddleware(wsgi_app, workers=ASGI_THREADS or INFERENCE_THREADS + ASGI_LIGHT_THREADS)
@@ -0,0 +1,146 @@
+"""
+Nearest-neighbour lookup index for crop recommendation
+"""
+import logging
+import time
+
+import joblib
+import numpy as np
+from scipy.spatial import cKDTree
+
+INDEX_MODES = ('off', 'nearest', 'exact')
+
+# Agronomically valid ranges of the crop features, in CROP_FEATURE_FIELDS order
+# (N, P, K, temperature, humidity, pH, rainfall); sampled points are clipped to them
+FEATURE_RANGES = np.array([
+    [0.0, 140.0], [5.0, 145.0], [5.0, 205.0], [8.0, 44.0], [14.0, 100.0], [3.5, 10.0], [20.0, 300.0]
+])
+
+
+class CropLookupIndex:
+    """KD-tree over representative inputs labelled offline by the crop model
+
+    Points are sampled where the model expects inputs (its per-class
+    Gaussians for naive Bayes, the valid feature ranges otherwise), scaled
+    and labelled with the model's ``predict_proba``. A lookup scales the raw
+    features with plain NumPy and returns the stored probabilities of the
+    nearest point, so no sklearn code runs. In ``exact`` mode a row is only
+    answered from the index when its ``neighbours`` nearest points share a
+    top class; rows near a decision boundary are left to the model.
+
+    In both modes rows outside ``FEATURE_RANGES``, or farther than
+    ``max_distance`` (scaled units) from their nearest point, are left to
+    the model: the sampled points say nothing about them.
+    """
+
+    def __init__(self, points, probabilities, mean, scale, source_version, neighbours=8, max_distance=np.inf,
+                 metadata=None):
+        self.tree = cKDTree(points)
+        self.probabilities = probabilities
+        self.labels = probabilities.argmax(axis=1).astype(np.uint8)
+        self.mean = mean
+        self.scale = scale
+        self.source_version = source_version
+        self.neighbours = neighbours
+        self.max_distance = max_distance
+        self.metadata = metadata or {}
+
+    @classmethod
+    def build(cls, model, scaler, source_version, n_points=200000, neighbours=8, seed=0, distance_quantile=0.99):
+        """Sample and label representative points, then measure agreement with the model
+
+        ``max_distance`` is set to the ``distance_quantile`` of the distances
+        from fresh samples to their nearest point, so only rows as close to
+        the index as typical inputs are answered from it.
+        """
+        started = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        mean, scale = np.asarray(scaler.mean_, dtype=np.float64), np.asarray(scaler.scale_, dtype=np.float64)
+        points = (sample_inputs(model, scaler, n_points, rng) - mean) / scale
+        probabilities = model.predict_proba(points).astype(np.float16)
+
+        index = cls(points, probabilities, mean, scale, source_version, neighbours)
+        distances, _ = index.tree.query(index.scale_features(sample_inputs(model, scaler, 20000, rng)), k=1)
+        index.max_distance = float(np.quantile(distances, distance_quantile))
+        index.metadata = {
+            "points": n_points,
+            "neighbours": neighbours,
+            "max_distance": index.max_distance,
+            "build_seconds": time.perf_counter() - started,
+            "agreement": index.agreement(model, scaler, rng=np.random.default_rng(seed + 1))
+        }
+        return index
+
+    def scale_features(self, features):
+        """Standardise raw feature rows as the fitted StandardScaler does"""
+        return (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+
+    def lookup(self, features, mode='exact'):
+        """Index probabilities for raw feature rows and a mask of rows the index answered
+
+        Rows outside the mask are left as zeros for the caller to score
+        with the model.
+        """
+        features = np.atleast_2d(features)
+        scaled = self.scale_features(features)
+        k = self.neighbours if mode == 'exact' else 1
+        distances, neighbours = self.tree.query(scaled, k=k)
+        distances, neighbours = distances.reshape(len(scaled), k), neighbours.reshape(len(scaled), k)
+
+        labels = self.labels[neighbours]
+        hits = (labels == labels[:, :1]).all(axis=1)
+        hits &= distances[:, 0] <= self.max_distance
+        hits &= ((features >= FEATURE_RANGES[:, 0]) & (features <= FEATURE_RANGES[:, 1])).all(axis=1)
+        probabilities = np.zeros((len(scaled), self.probabilities.shape[1]), dtype=np.float64)
+        probabilities[hits] = self.probabilities[neighbours[hits, 0]]
+        return probabilities, hits
+
+    def agreement(self, model, scaler, n_samples=20000, rng=None):
+        """Top-1 agreement with the model on fresh samples, per lookup mode"""
+        rng = rng or np.random.default_rng()
+        features = sample_inputs(model, scaler, n_samples, rng)
+        truth = model.predict_proba(scaler.transform(features)).argmax(axis=1)
+
+        report = {"samples": n_samples}
+        for mode in ('nearest', 'exact'):
+            probabilities, hits = self.lookup(features, mode)
+            agree = probabilities[hits].argmax(axis=1) == truth[hits]
+            report[mode] = {
+                "agreement": float(agree.mean()) if hits.any() else 0.0,
+                "answered": float(hits.mean())
+            }
+        return report
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path, source_version):
+        """Load an index, or None when it was built from different model files"""
+        index = joblib.load(path)
+        if not hasattr(index, 'max_distance'):
+            logging.warning(f"Ignoring crop lookup index {path}: it has no distance limit; rebuild it with build_crop_index.py")
+            return None
+        if index.source_version != source_version:
+            logging.warning(
+                f"Ignoring crop lookup index {path}: built for models {index.source_version}, "
+                f"loaded models are {source_version}; rebuild it with build_crop_index.py"
+            )
+            return None
+        return index
+
+
+def sample_inputs(model, scaler, n_samples, rng):
+    """Raw feature rows where the model expects inputs, clipped to the valid ranges
+
+    Gaussian naive Bayes exposes its per-class means and variances in scaled
+    space; sampling from them (widened so boundaries are covered) puts the
+    points where real inputs fall. Other models get uniform samples.
+    """
+    if hasattr(model, 'theta_') and hasattr(model, 'var_'):
+        classes = rng.choice(len(model.classes_), n_samples, p=model.class_prior_)
+        scaled = rng.normal(model.theta_[classes], 1.5 * np.sqrt(model.var_[classes]))
+        features = scaler.inverse_transform(scaled)
+    else:
+        features = rng.uniform(FEATURE_RANGES[:, 0], FEATURE_RANGES[:, 1], (n_samples, len(FEATURE_RANGES)))
+    return np.clip(features, FEATURE_RANGES[:, 0], FEATURE_RANGES[:, 1])
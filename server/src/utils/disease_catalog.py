@@ -0,0 +1,144 @@
+"""
+Indexed plant disease catalog
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+
+def normalize_class_name(class_name):
+    """Normalize class names for better matching"""
+    # Handle different naming conventions between model output and JSON
+    replacements = {
+        'Cherry_(including_sour)___Powdery_mildew': 'Cherry___Powdery_mildew',
+        'Cherry_(including_sour)___healthy': 'Cherry___healthy',
+        'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot': 'Corn___Cercospora_leaf_spot Gray_leaf_spot',
+        'Corn_(maize)___Common_rust_': 'Corn___Common_rust',
+        'Corn_(maize)___Northern_Leaf_Blight': 'Corn___Northern_Leaf_Blight',
+        'Corn_(maize)___healthy': 'Corn___healthy',
+        'Pepper,_bell___Bacterial_spot': 'Pepper,_bell___Bacterial_spot',
+        'Pepper,_bell___healthy': 'Pepper,_bell___healthy'
+    }
+
+    normalized = replacements.get(class_name, class_name)
+    return normalized
+
+
+def extract_disease_name(class_name):
+    """Extract clean disease name from class name (remove fruit/plant prefix)"""
+    # Split by ___ and take the disease part
+    if '___' in class_name:
+        parts = class_name.split('___')
+        if len(parts) >= 2:
+            disease_name = parts[1]
+            # Clean up common patterns
+            disease_name = disease_name.replace('_', ' ').strip()
+            # Handle special cases
+            if disease_name.lower() == 'healthy':
+                plant_name = parts[0].replace('_', ' ').replace('(', '').replace(')', '').replace(',', '').strip()
+                return f"Healthy {plant_name}"
+            return disease_name
+
+    # Fallback: just clean up underscores
+    return class_name.replace('_', ' ').strip()
+
+
+class DiseaseCatalog:
+    """Disease information indexed by model class index and normalized name
+
+    Built from the detailed disease data (with html) and the model's class
+    info file, which fills in entries missing from the former. Response
+    fragments are precomputed per class, and the catalog is rebuilt when
+    either source file changes on disk.
+    """
+
+    def __init__(self, class_names, info_path, classes_path=None, check_interval=1.0):
+        self.source_class_names = list(class_names)
+        self.info_path = info_path
+        self.classes_path = classes_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._class_names = tuple(self.source_class_names)
+        self._by_name = {}
+        self._responses = ()
+        self._refresh(force=True)
+
+    @property
+    def class_names(self):
+        """Model output class names, in class index order"""
+        self._refresh()
+        return self._class_names
+
+    def __len__(self):
+        return len(self._class_names)
+
+    def _source_mtimes(self):
+        paths = [self.info_path, self.classes_path]
+        return tuple(os.stat(path).st_mtime_ns if path and os.path.exists(path) else None for path in paths)
+
+    def _load_entries(self, path):
+        if not path or not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _refresh(self, force=False):
+        """Rebuild the index if a source file changed"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        mtimes = self._source_mtimes()
+        if mtimes == self._mtimes:
+            return
+
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            try:
+                by_name = {}
+                # Class info first so the detailed entries override it
+                for path in (self.classes_path, self.info_path):
+                    for disease in self._load_entries(path):
+                        key = normalize_class_name(disease['name'])
+                        by_name[key] = {**by_name.get(key, {}), **disease}
+            except Exception as e:
+                logging.error(f"Error loading disease info: {e}")
+                return
+
+            responses = []
+            for index, class_name in enumerate(self.source_class_names):
+                response = {
+                    "prediction": class_name,
+                    "disease": extract_disease_name(class_name),
+                    "class_index": index,
+                    "total_classes": len(self.source_class_names)
+                }
+                info = by_name.get(normalize_class_name(class_name))
+                if info and "cause" in info and "cure" in info:
+                    response.update({
+                        "cause": info["cause"],
+                        "cure": info["cure"],
+                        "html": info.get("html", "")
+                    })
+                responses.append(response)
+
+            self._by_name = by_name
+            self._responses = tuple(responses)
+            self._mtimes = mtimes
+            logging.info(f"Disease catalog loaded with {len(by_name)} entries")
+
+    def get_info(self, class_name):
+        """Get the raw disease info entry for a class name, or None"""
+        self._refresh()
+        return self._by_name.get(normalize_class_name(class_name))
+
+    def response_for(self, class_index):
+        """Get a copy of the precomputed response fragment for a class index"""
+        self._refresh()
+        return dict(self._responses[class_index])
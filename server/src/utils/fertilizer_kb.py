@@ -0,0 +1,209 @@
+"""
+Fertilizer knowledge base
+"""
+import csv
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+FertilizerRequirement = namedtuple('FertilizerRequirement', ['N', 'P', 'K', 'pH', 'soil_moisture'])
+
+FERTILIZER_RECOMMENDATIONS = {
+    'NHigh': """The N value of soil is high and might give rise to weeds.
+        Please consider the following suggestions:
+        1. Manure – adding manure is one of the simplest ways to amend your soil with nitrogen.
+        2. Coffee grounds – use your morning addiction to feed your gardening habit!
+        3. Plant nitrogen fixing plants – planting vegetables in Fabaceae family like peas, beans and soybeans.
+        4. Plant 'green manure' crops like cabbage, corn and broccoli.
+        5. Use mulch (wet grass) while growing crops.""",
+
+    'Nlow': """The N value of your soil is low.
+        Please consider the following suggestions:
+        1. Add sawdust or fine woodchips to your soil.
+        2. Plant heavy nitrogen feeding plants – tomatoes, corn, broccoli, cabbage and spinach.
+        3. Water – soaking your soil with water will help leach the nitrogen deeper.
+        4. Add composted manure to the soil.
+        5. Plant Nitrogen fixing plants like peas or beans.
+        6. Use NPK fertilizers with high N value.""",
+
+    'PHigh': """The P value of your soil is high.
+        Please consider the following suggestions:
+        1. Avoid adding manure – manure contains high levels of phosphorous.
+        2. Use only phosphorus-free fertilizer.
+        3. Water your soil liberally to drive phosphorous out.
+        4. Plant nitrogen fixing vegetables to increase nitrogen without increasing phosphorous.
+        5. Use crop rotations to decrease high phosphorous levels.""",
+
+    'Plow': """The P value of your soil is low.
+        Please consider the following suggestions:
+        1. Bone meal – a fast acting source made from ground animal bones.
+        2. Rock phosphate – a slower acting source.
+        3. Phosphorus Fertilizers – applying fertilizer with high phosphorous content.
+        4. Organic compost – adding quality organic compost.
+        5. Manure – excellent source of phosphorous.
+        6. Ensure proper soil pH – having pH in 6.0 to 7.0 range.""",
+
+    'KHigh': """The K value of your soil is high.
+        Please consider the following suggestions:
+        1. Loosen the soil deeply and water thoroughly to dissolve water-soluble potassium.
+        2. Remove as many rocks as possible from soil.
+        3. Stop applying potassium-rich commercial fertilizer.
+        4. Mix crushed eggshells, seashells, wood ash to add calcium.
+        5. Use NPK fertilizers with low K levels.""",
+
+    'Klow': """The K value of your soil is low.
+        Please consider the following suggestions:
+        1. Mix in muricate of potash or sulphate of potash.
+        2. Try kelp meal or seaweed.
+        3. Try Sul-Po-Mag.
+        4. Bury banana peels an inch below the soil surface.
+        5. Use Potash fertilizers since they contain high potassium values."""
+}
+
+NUTRIENTS = ("N", "P", "K")
+
+# Recommendation keys indexed by [nutrient][is_high]
+_DEFICIENCY_KEYS = np.array([["Nlow", "NHigh"], ["Plow", "PHigh"], ["Klow", "KHigh"]], dtype=object)
+
+
+def _number(value):
+    """Parse a CSV cell, keeping integral values as ints"""
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def primary_deficiency(n_diff, p_diff, k_diff):
+    """Pick the nutrient with the largest absolute difference and its recommendation key
+
+    Ties resolve in favour of K, then P, matching the original lookup rules.
+    """
+    diffs = (n_diff, p_diff, k_diff)
+    nutrient = max((2, 1, 0), key=lambda i: abs(diffs[i]))
+    return NUTRIENTS[nutrient], _DEFICIENCY_KEYS[nutrient][int(diffs[nutrient] < 0)]
+
+
+class FertilizerKnowledgeBase:
+    """Crop nutrient requirements loaded once from fertilizer.csv
+
+    The CSV is re-read only when its modification time changes, checked at
+    most once every ``check_interval`` seconds.
+    """
+
+    def __init__(self, data_path, check_interval=1.0):
+        self.data_path = data_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._index = {}
+        self._positions = {}
+        self._npk = np.zeros((0, 3), dtype=np.float64)
+        self._refresh(force=True)
+
+    def _refresh(self, force=False):
+        """Reload the CSV if it changed on disk"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.data_path).st_mtime_ns
+        except OSError as e:
+            logging.error(f"Error checking fertilizer data: {e}")
+            return
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            index = {}
+            with open(self.data_path, newline='') as f:
+                for row in csv.DictReader(f):
+                    crop = row['Crop']
+                    if crop in index:
+                        continue
+                    index[crop] = FertilizerRequirement(
+                        _number(row['N']), _number(row['P']), _number(row['K']),
+                        _number(row['pH']), _number(row['soil_moisture'])
+                    )
+
+            crops = list(index)
+            self._positions = {crop: i for i, crop in enumerate(crops)}
+            self._npk = np.array([index[crop][:3] for crop in crops], dtype=np.float64).reshape(-1, 3)
+            self._index = index
+            self._mtime = mtime
+            logging.info(f"Fertilizer knowledge base loaded with {len(index)} crops")
+
+    @property
+    def version(self):
+        """Version of the loaded data, derived from the CSV mtime"""
+        self._refresh()
+        return str(self._mtime)
+
+    def crops(self):
+        """Get the list of known crop names"""
+        self._refresh()
+        return list(self._index)
+
+    def get(self, crop_name):
+        """Get the nutrient requirement for a crop, or None if unknown"""
+        self._refresh()
+        return self._index.get(crop_name)
+
+    def recommend(self, crop_name, N, P, K):
+        """Build the fertilizer recommendation for one soil sample, or None for unknown crops"""
+        requirement = self.get(crop_name)
+        if requirement is None:
+            return None
+
+        nr, pr, kr = requirement.N, requirement.P, requirement.K
+        n, p, k = nr - N, pr - P, kr - K
+        max_value, key = primary_deficiency(n, p, k)
+
+        return {
+            "recommendation": FERTILIZER_RECOMMENDATIONS.get(key, "No recommendation available"),
+            "nutrient_analysis": {
+                "required_N": nr, "current_N": N, "N_diff": n,
+                "required_P": pr, "current_P": P, "P_diff": p,
+                "required_K": kr, "current_K": K, "K_diff": k
+            },
+            "primary_deficiency": max_value,
+            "crop": crop_name
+        }
+
+    def deficiency_keys(self, crop_names, N, P, K):
+        """Compute recommendation keys for many samples at once
+
+        Returns ``(keys, primary, diffs)`` where ``keys`` and ``primary`` are
+        object arrays (None for unknown crops) and ``diffs`` is an (n, 3)
+        array of required minus current N/P/K.
+        """
+        self._refresh()
+        positions = self._positions
+        npk = self._npk
+
+        crop_idx = np.fromiter((positions.get(name, -1) for name in crop_names), dtype=np.intp)
+        known = crop_idx >= 0
+        current = np.column_stack([np.asarray(N, dtype=np.float64),
+                                   np.asarray(P, dtype=np.float64),
+                                   np.asarray(K, dtype=np.float64)])
+
+        diffs = np.full(current.shape, np.nan)
+        diffs[known] = npk[crop_idx[known]] - current[known]
+
+        # argmax on reversed columns so ties prefer K, then P
+        abs_diffs = np.abs(np.nan_to_num(diffs))
+        nutrient = 2 - np.argmax(abs_diffs[:, ::-1], axis=1)
+        is_high = diffs[np.arange(len(diffs)), nutrient] < 0
+
+        keys = _DEFICIENCY_KEYS[nutrient, is_high.astype(np.intp)]
+        primary = np.array(NUTRIENTS, dtype=object)[nutrient]
+        keys[~known] = None
+        primary[~known] = None
+        return keys, primary, diffs
@@ -0,0 +1,143 @@
+"""
+Content-hash deduplication cache for disease image predictions
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_hash(image_source, chunk_size=1 << 16):
+    """Fast hash of the raw uploaded bytes or of a seekable upload stream
+
+    A stream is hashed in chunks and rewound, so it can be decoded next
+    without holding a second copy of the upload in memory.
+    """
+    if isinstance(image_source, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(image_source, digest_size=16).hexdigest()
+    digest = hashlib.blake2b(digest_size=16)
+    start = image_source.tell()
+    for chunk in iter(lambda: image_source.read(chunk_size), b''):
+        digest.update(chunk)
+    image_source.seek(start)
+    return digest.hexdigest()
+
+
+def perceptual_hash(image_array):
+    """64-bit difference hash (dHash) of a decoded image array
+
+    The image is reduced to a 9x8 grayscale grid and each bit records
+    whether a cell is brighter than its right-hand neighbour, so re-encoded
+    or slightly recompressed copies of a photo hash identically.
+    """
+    pixels = np.asarray(image_array, dtype=np.float32)
+    gray = pixels.mean(axis=-1) if pixels.ndim == 3 else pixels
+    rows = np.array_split(np.arange(gray.shape[0]), 8)
+    cols = np.array_split(np.arange(gray.shape[1]), 9)
+    grid = np.array([[gray[np.ix_(r, c)].mean() for c in cols] for r in rows])
+    bits = (grid[:, 1:] > grid[:, :-1]).ravel()
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+class ImageResultCache:
+    """Memory-capped LRU of disease results keyed by image hash and model version
+
+    Entries are looked up by content hash first and, when perceptual hashing
+    is enabled, by the dHash of the decoded image. Eviction starts with the
+    least recently used entry once either the entry or byte budget is hit.
+    """
+
+    def __init__(self, max_entries=50000, max_bytes=16 * 1024 * 1024, use_perceptual_hash=False):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.use_perceptual_hash = use_perceptual_hash
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._content_hits = 0
+        self._perceptual_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_by_content(self, image_hash, version):
+        """Look up a result by raw content hash"""
+        return self._get(('content', version, image_hash), perceptual=False)
+
+    def get_by_perceptual(self, phash, version):
+        """Look up a result by perceptual hash"""
+        if not self.use_perceptual_hash or phash is None:
+            return None
+        return self._get(('perceptual', version, phash), perceptual=True)
+
+    def put(self, image_hash, version, value, phash=None):
+        """Store a result computed after a cache miss"""
+        keys = [('content', version, image_hash)]
+        if self.use_perceptual_hash and phash is not None:
+            keys.append(('perceptual', version, phash))
+
+        with self._lock:
+            self._misses += 1
+            for key in keys:
+                self._store(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """Get hit rate and memory usage"""
+        with self._lock:
+            hits = self._content_hits + self._perceptual_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "perceptual_hash": self.use_perceptual_hash,
+                "content_hits": self._content_hits,
+                "perceptual_hits": self._perceptual_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+    def _get(self, key, perceptual):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            if perceptual:
+                self._perceptual_hits += 1
+            else:
+                self._content_hits += 1
+            return entry[0]
+
+    @staticmethod
+    def _entry_size(key, value):
+        """Approximate memory held by one entry"""
+        size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+        if isinstance(value, np.ndarray):
+            return size + value.nbytes
+        if isinstance(value, dict):
+            return size + sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+        return size + sys.getsizeof(value)
+
+    def _store(self, key, value):
+        """Insert an entry and evict down to the budgets; caller holds the lock"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        size = self._entry_size(key, value)
+        self._entries[key] = (value, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
@@ -0,0 +1,143 @@
+"""
+Image decode and preprocessing for disease detection
+"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+# Used until the disease model reports its own input shape
+DEFAULT_INPUT_SHAPE = (128, 128, 3)
+
+# Formats PIL is allowed to open; anything else is rejected from its header
+SUPPORTED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'BMP', 'TIFF', 'GIF')
+
+# File name suffixes of those formats, for picking images out of archives and directories
+IMAGE_SUFFIXES = frozenset(
+    suffix for suffix, image_format in Image.registered_extensions().items() if image_format in SUPPORTED_FORMATS
+)
+
+
+class ImageRejected(ValueError):
+    """An upload refused before decoding: unsupported format, oversized or malformed raw pixels"""
+
+
+class ImagePreprocessor:
+    """Decodes uploads straight to the model's input shape
+
+    JPEGs are decoded with ``draft`` so libjpeg scales by 1/2-1/8 while
+    decoding instead of materialising the full-resolution photo; other
+    formats are box-reduced before the final resize, and images already at
+    the model's size (e.g. WebP resized by the client) are not resized.
+    Every image is forced to the model's channel count and copied once into
+    a float32 buffer owned by the calling thread. Decoding can run in its
+    own thread pool so it does not compete with inference threads.
+
+    Images are opened from their header first, so unsupported formats and
+    images over ``max_pixels`` are refused before any pixel is decoded.
+    """
+
+    def __init__(self, decode_workers=0, reducing_gap=3.0, max_pixels=None):
+        self.reducing_gap = reducing_gap
+        self.max_pixels = max_pixels
+        self._executor = None
+        if decode_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix='image-decode')
+        self._buffers = threading.local()
+
+    def buffer_for(self, input_shape):
+        """Get the calling thread's reusable float32 buffer for an input shape"""
+        buffers = getattr(self._buffers, 'by_shape', None)
+        if buffers is None:
+            buffers = self._buffers.by_shape = {}
+        buffer = buffers.get(input_shape)
+        if buffer is None:
+            buffer = buffers[input_shape] = np.empty(input_shape, dtype=np.float32)
+        return buffer
+
+    def open(self, image_source):
+        """Open an image from bytes or a file-like object, reading only its header"""
+        if isinstance(image_source, (bytes, bytearray, memoryview)):
+            image_source = io.BytesIO(image_source)
+        try:
+            image = Image.open(image_source, formats=SUPPORTED_FORMATS)
+        except UnidentifiedImageError:
+            raise ImageRejected(f"Unsupported image format (expected {', '.join(SUPPORTED_FORMATS)})")
+        except Image.DecompressionBombError as e:
+            raise ImageRejected(str(e))
+
+        width, height = image.size
+        if self.max_pixels and width * height > self.max_pixels:
+            raise ImageRejected(f"Image too large: {width}x{height} (max {self.max_pixels} pixels)")
+        return image
+
+    def inspect(self, image_source):
+        """Check an upload's header, leaving a stream at the position it started from"""
+        start = None if isinstance(image_source, (bytes, bytearray, memoryview)) else image_source.tell()
+        try:
+            return self.open(image_source).format
+        finally:
+            if start is not None:
+                image_source.seek(start)
+
+    def decode(self, image_source, input_shape=DEFAULT_INPUT_SHAPE, out=None):
+        """Decode image bytes or a file-like object to a (height, width, channels) float32 array"""
+        height, width, channels = input_shape
+        mode = 'L' if channels == 1 else 'RGB'
+
+        image = self.open(image_source)
+        if image.format == 'JPEG':
+            image.draft(mode, (width, height))
+        if image.mode != mode:
+            image = image.convert(mode)
+        if image.size != (width, height):
+            image = image.resize((width, height), reducing_gap=self.reducing_gap)
+
+        if out is None:
+            out = np.empty(input_shape, dtype=np.float32)
+        np.copyto(out.reshape(height, width, channels), np.asarray(image).reshape(height, width, channels))
+        return out
+
+    def decode_raw(self, pixels, input_shape=DEFAULT_INPUT_SHAPE, out=None):
+        """Copy raw uint8 pixels already at the model's size, row-major (height, width, channels)"""
+        if not isinstance(pixels, (bytes, bytearray, memoryview)):
+            pixels = pixels.read(int(np.prod(input_shape)) + 1)
+        array = np.frombuffer(pixels, dtype=np.uint8)
+        if array.size != np.prod(input_shape):
+            height, width, channels = input_shape
+            raise ImageRejected(
+                f"Raw image must be {height}x{width}x{channels} uint8 pixels ({np.prod(input_shape)} bytes), "
+                f"got {array.size} bytes"
+            )
+        if out is None:
+            out = np.empty(input_shape, dtype=np.float32)
+        np.copyto(out, array.reshape(input_shape))
+        return out
+
+    def preprocess(self, image_source, input_shape=DEFAULT_INPUT_SHAPE, raw=False):
+        """Decode into this thread's buffer, on the decode pool when one is configured
+
+        The returned array is reused by the next call from the same thread.
+        With ``raw`` the source holds pixels already at the model's size.
+        """
+        input_shape = tuple(input_shape)
+        out = self.buffer_for(input_shape)
+        if raw:
+            # Nothing to decode, so no need to hand off to the decode pool
+            return self.decode_raw(image_source, input_shape, out)
+        if self._executor is None:
+            return self.decode(image_source, input_shape, out)
+        return self._executor.submit(self.decode, image_source, input_shape, out).result()
+
+
+def model_input_shape(model, default=DEFAULT_INPUT_SHAPE):
+    """Read (height, width, channels) from a loaded model, falling back to the default"""
+    try:
+        shape = tuple(model.input_shape[1:])
+    except (AttributeError, TypeError):
+        return default
+    if len(shape) != 3 or any(dim is None for dim in shape):
+        return default
+    return tuple(int(dim) for dim in shape)
@@ -0,0 +1,122 @@
+"""
+Request-coalescing inference queue
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceBatcher:
+    """Coalesces concurrent single-sample predictions into batched forward passes
+
+    Callers submit one sample at a time. A background thread collects samples
+    until either ``max_batch_size`` is reached or the oldest queued sample has
+    waited ``max_wait_ms``, stacks them into one array, calls ``predict_fn``
+    once and hands each caller its own row of the output.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0, name="model"):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._last_batch_size = 0
+
+    def submit(self, sample):
+        """Queue a single sample and return a Future for its prediction row"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((sample, future, time.perf_counter()))
+        return future
+
+    def predict(self, sample, timeout=None):
+        """Predict a single sample, blocking until its batch has run"""
+        return self.submit(sample).result(timeout=timeout)
+
+    def get_stats(self):
+        """Get batch-size and queue-wait metrics"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "queue_depth": self._queue.qsize(),
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "last_batch_size": self._last_batch_size,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": 1000.0 * self._wait_total / self._items if self._items else 0.0,
+                "max_queue_wait_ms": 1000.0 * self._wait_max
+            }
+
+    def _ensure_worker(self):
+        """Start the batching thread, restarting it after a process fork"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                # Threads do not survive fork; drop anything inherited from the parent
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect(self):
+        """Block for the first sample, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            futures = [future for _, future, _ in batch]
+
+            try:
+                outputs = self.predict_fn(np.stack([sample for sample, _, _ in batch]))
+                for i, future in enumerate(futures):
+                    future.set_result(outputs[i])
+            except Exception as e:
+                logging.error(f"Error in batched {self.name} inference: {e}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+            waits = [started - enqueued for _, _, enqueued in batch]
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                self._wait_total += sum(waits)
+                self._wait_max = max(self._wait_max, max(waits))
+                self._last_batch_size = len(batch)
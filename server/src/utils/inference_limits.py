@@ -0,0 +1,85 @@
+"""
+Per-process inference thread settings and per-model concurrency limits
+"""
+import logging
+import threading
+
+from src.utils.metrics import time_stage
+
+
+def limit_native_threads(threads):
+    """Cap the BLAS/OpenMP thread pools (OpenBLAS, MKL, libgomp) NumPy, SciPy and sklearn use
+
+    Applies to libraries already loaded in this process and is inherited by
+    forked workers. Returns the threadpoolctl limiter, or None when
+    ``threads`` is 0 or threadpoolctl is unavailable.
+    """
+    if threads <= 0:
+        return None
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        logging.warning("threadpoolctl is not installed; BLAS/OpenMP thread limits not applied")
+        return None
+    return threadpool_limits(limits=threads)
+
+
+def configure_tensorflow_threads(tf, intra_op=0, inter_op=0):
+    """Size TensorFlow's intra-op and inter-op pools; 0 keeps TensorFlow's default (all cores)
+
+    Must run before TensorFlow executes its first op; later calls only log
+    a warning.
+    """
+    try:
+        if intra_op > 0:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op > 0:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        logging.warning(f"TensorFlow thread settings not applied: {e}")
+
+
+class GuardedModel:
+    """Lets at most a fixed number of threads run a shared model's inference at once
+
+    Attribute access is forwarded to the wrapped model, so callers use it
+    as the model itself; only the inference methods acquire the semaphore.
+    Every model of a group shares one semaphore, so a scaler and classifier
+    called back to back count as one slot. Time spent waiting for a slot is
+    recorded as the group's ``model_wait`` stage.
+    """
+
+    INFERENCE_METHODS = frozenset({
+        'predict', 'predict_proba', 'predict_one', 'transform', 'scale_numeric', 'predict_encoded'
+    })
+
+    def __init__(self, model, semaphore, group):
+        self._model = model
+        self._semaphore = semaphore
+        self._group = group
+
+    def __getattr__(self, name):
+        attribute = getattr(self._model, name)
+        if name not in self.INFERENCE_METHODS or not callable(attribute):
+            return attribute
+
+        def guarded(*args, **kwargs):
+            if not self._semaphore.acquire(blocking=False):
+                with time_stage(self._group, 'model_wait'):
+                    self._semaphore.acquire()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._semaphore.release()
+
+        return guarded
+
+
+def guard_models(models, names, limit, group):
+    """Wrap the given entries of a freshly loaded model dict to share one semaphore of ``limit`` slots"""
+    if limit <= 0:
+        return
+    semaphore = threading.BoundedSemaphore(limit)
+    for name in names:
+        if models.get(name) is not None:
+            models[name] = GuardedModel(models[name], semaphore, group)
@@ -0,0 +1,136 @@
+"""
+Bounded per-model inference executors with admission control
+"""
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """Raised when a model's inference pool has no room for another request"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} inference is at capacity; retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """Runs one model's CPU-bound inference on a fixed number of threads
+
+    At most ``workers`` calls run at once and at most ``max_queue`` more
+    wait; a request beyond that is refused with Overloaded straight away
+    instead of queueing, carrying a Retry-After estimate from recent
+    service times. Request threads never run the heavy call themselves,
+    so the number of threads a slow model can tie up is bounded and cheap
+    routes keep their own threads. The executor is recreated after a fork.
+    """
+
+    def __init__(self, name, workers=2, max_queue=16):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._service_time = None
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._lock:
+                if self._executor_pid != pid:
+                    # Threads do not survive fork; in-flight counts belong to the parent
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix=f"{self.name}-inference"
+                    )
+                    self._executor_pid = pid
+                    self._pending = 0
+        return self._executor
+
+    def retry_after(self):
+        """Seconds until a slot is likely free, from queue length and mean service time"""
+        with self._lock:
+            pending, service_time = self._pending, self._service_time or 1.0
+        return max(1, math.ceil(service_time * (pending + 1) / self.workers))
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a call and return its Future, or raise Overloaded when the pool is full"""
+        return self._submit(fn, args, kwargs, admit=True)
+
+    def _submit(self, fn, args, kwargs, admit):
+        executor = self._get_executor()
+        with self._lock:
+            if admit and self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                full = True
+            else:
+                self._pending += 1
+                full = False
+        if full:
+            raise Overloaded(self.name, self.retry_after())
+
+        # Run in the caller's context so per-request state such as stage timings follows the call
+        context = contextvars.copy_context()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._pending -= 1
+                    self._completed += 1
+                    # Moving average so the estimate follows load changes
+                    self._service_time = elapsed if self._service_time is None else (
+                        0.8 * self._service_time + 0.2 * elapsed
+                    )
+
+        try:
+            return executor.submit(run)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def run(self, fn, *args, **kwargs):
+        """Run a call on the pool and wait for its result"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stream(self, iterator):
+        """Advance an iterator on the pool, e.g. the chunks of a streamed response
+
+        The first item is admitted like any call, so an overloaded pool
+        refuses the request before the response starts; later items queue
+        behind other work rather than failing a response half way.
+        """
+        sentinel = object()
+        first = self.run(next, iterator, sentinel)
+
+        def items(item):
+            while item is not sentinel:
+                yield item
+                item = self._submit(next, (iterator, sentinel), {}, admit=False).result()
+
+        return items(first)
+
+    def get_stats(self):
+        """Get capacity, queue and rejection counts"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_service_ms": 1000.0 * self._service_time if self._service_time is not None else 0.0
+            }
@@ -0,0 +1,169 @@
+"""
+SQLite-backed store for bulk disease screening jobs
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+
+class JobStore:
+    """Job and per-image result state in a local SQLite file
+
+    Any number of threads and processes can share one store file: jobs are
+    claimed with an atomic UPDATE, and a running job whose heartbeat is older
+    than ``stale_seconds`` can be reclaimed (its recorded items are kept,
+    so processing resumes where it stopped).
+    """
+
+    def __init__(self, path, stale_seconds=300.0):
+        self.path = str(path)
+        self.stale_seconds = stale_seconds
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    source_kind TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    processed INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, idx)
+                );
+            """)
+
+    def _connect(self):
+        """Get this thread's connection, reopening after a fork"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def create_job(self, source_kind, source, total):
+        """Queue a new job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, source_kind, source, total, created_at, updated_at) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, source_kind, source, total, now, now)
+        )
+        return job_id
+
+    def claim_next_job(self, worker):
+        """Atomically claim the oldest queued (or stale running) job, or return None"""
+        connection = self._connect()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND updated_at < ?) ORDER BY created_at LIMIT 1",
+                (now - self.stale_seconds,)
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, updated_at = ? WHERE id = ?",
+                (worker, now, row['id'])
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return dict(row)
+
+    def completed_indices(self, job_id):
+        """Get the item indices already recorded for a job"""
+        rows = self._connect().execute("SELECT idx FROM job_items WHERE job_id = ?", (job_id,))
+        return {row['idx'] for row in rows}
+
+    def record_items(self, job_id, items):
+        """Record a chunk of (index, name, result, error) tuples and bump the job's progress"""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO job_items (job_id, idx, name, result, error) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, idx, name, None if result is None else json.dumps(result), error)
+                 for idx, name, result, error in items]
+            )
+            connection.execute(
+                "UPDATE jobs SET "
+                "processed = (SELECT COUNT(*) FROM job_items WHERE job_id = :id), "
+                "failed = (SELECT COUNT(*) FROM job_items WHERE job_id = :id AND error IS NOT NULL), "
+                "updated_at = :now WHERE id = :id",
+                {"id": job_id, "now": time.time()}
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def finish_job(self, job_id, status='completed', error=None):
+        """Mark a job as completed or failed"""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, error, time.time(), job_id)
+        )
+
+    def get_job(self, job_id, offset=0, limit=100):
+        """Get a job's progress and a page of its results, or None if unknown"""
+        connection = self._connect()
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        items = connection.execute(
+            "SELECT idx, name, result, error FROM job_items WHERE job_id = ? ORDER BY idx LIMIT ? OFFSET ?",
+            (job_id, limit, offset)
+        ).fetchall()
+        results = []
+        for item in items:
+            entry = {"index": item['idx'], "name": item['name']}
+            if item['error'] is not None:
+                entry["error"] = item['error']
+            else:
+                entry.update(json.loads(item['result']))
+            results.append(entry)
+
+        return {
+            "job_id": row['id'],
+            "status": row['status'],
+            "error": row['error'],
+            "progress": {
+                "total": row['total'],
+                "processed": row['processed'],
+                "failed": row['failed'],
+                "fraction": row['processed'] / row['total'] if row['total'] else 1.0
+            },
+            "created_at": row['created_at'],
+            "updated_at": row['updated_at'],
+            "results": results,
+            "offset": offset,
+            "limit": limit
+        }
@@ -0,0 +1,165 @@
+"""
+Background workers for bulk disease screening jobs
+"""
+import json
+import logging
+import os
+import socket
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from src.utils.image_preprocessing import IMAGE_SUFFIXES
+
+
+def is_image_name(name):
+    return Path(name).suffix.lower() in IMAGE_SUFFIXES and not Path(name).name.startswith('.')
+
+
+def list_job_images(source_kind, source):
+    """List the image names in a job source, in processing order
+
+    ``zip`` and ``tar`` sources are archive paths, ``manifest`` is a JSON
+    list of image paths and ``directory`` is a directory searched recursively.
+    """
+    if source_kind == 'zip':
+        with zipfile.ZipFile(source) as archive:
+            return sorted(info.filename for info in archive.infolist()
+                          if not info.is_dir() and is_image_name(info.filename))
+    if source_kind == 'tar':
+        with tarfile.open(source) as archive:
+            return sorted(member.name for member in archive.getmembers()
+                          if member.isfile() and is_image_name(member.name))
+    if source_kind == 'manifest':
+        return list(json.loads(source))
+    if source_kind == 'directory':
+        return sorted(str(path) for path in Path(source).rglob('*') if path.is_file() and is_image_name(path.name))
+    raise ValueError(f"Unknown job source: {source_kind}")
+
+
+def discard_archive(job):
+    """Delete a finished job's uploaded archive; manifest and directory sources are left alone"""
+    if job['source_kind'] not in ('zip', 'tar'):
+        return
+    try:
+        Path(job['source']).unlink(missing_ok=True)
+    except OSError as e:
+        logging.error(f"Could not delete archive for job {job['id']}: {e}")
+
+
+class ImageReader:
+    """Reads image bytes by name from a job source, keeping archives open"""
+
+    def __init__(self, source_kind, source):
+        self.source_kind = source_kind
+        self._archive = None
+        if source_kind == 'zip':
+            self._archive = zipfile.ZipFile(source)
+        elif source_kind == 'tar':
+            self._archive = tarfile.open(source)
+
+    def read(self, name):
+        if self.source_kind == 'zip':
+            return self._archive.read(name)
+        if self.source_kind == 'tar':
+            return self._archive.extractfile(name).read()
+        return Path(name).read_bytes()
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+
+
+class JobWorkerPool:
+    """Threads that claim queued jobs and stream their images through batched scoring
+
+    ``score_images`` takes a list of image bytes and returns one
+    ``(result, error)`` pair per image. Every process that starts a pool
+    competes for jobs in the shared store, so throughput scales with the
+    number of processes.
+    """
+
+    def __init__(self, store, score_images, workers=1, batch_size=32, poll_interval=1.0):
+        self.store = store
+        self.score_images = score_images
+        self.workers = workers
+        self.batch_size = max(1, int(batch_size))
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Start the worker threads in this process (again after a fork)"""
+        if self._pid == os.getpid() or self.workers <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self.run_forever, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        worker = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self._stop.is_set():
+            try:
+                if not self.run_once(worker):
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                logging.error(f"Job worker error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def run_once(self, worker):
+        """Process one job if any is queued; returns False when there was nothing to do"""
+        job = self.store.claim_next_job(worker)
+        if job is None:
+            return False
+
+        job_id = job['id']
+        started = time.perf_counter()
+        try:
+            names = list_job_images(job['source_kind'], job['source'])
+            done = self.store.completed_indices(job_id)
+            pending = [(idx, name) for idx, name in enumerate(names) if idx not in done]
+
+            reader = ImageReader(job['source_kind'], job['source'])
+            try:
+                for start in range(0, len(pending), self.batch_size):
+                    self._process_chunk(job_id, reader, pending[start:start + self.batch_size])
+            finally:
+                reader.close()
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {e}")
+            self.store.finish_job(job_id, 'failed', str(e))
+            discard_archive(job)
+            return True
+
+        self.store.finish_job(job_id)
+        discard_archive(job)
+        logging.info(f"Job {job_id} completed {len(pending)} images in {time.perf_counter() - started:.1f}s")
+        return True
+
+    def _process_chunk(self, job_id, reader, chunk):
+        images, readable, items = [], [], []
+        for idx, name in chunk:
+            try:
+                images.append(reader.read(name))
+                readable.append((idx, name))
+            except Exception as e:
+                items.append((idx, name, None, f"Could not read image: {e}"))
+
+        if images:
+            for (idx, name), (result, error) in zip(readable, self.score_images(images)):
+                items.append((idx, name, result, error))
+        self.store.record_items(job_id, items)
@@ -0,0 +1,62 @@
+"""
+Compiled execution of the Keras disease model
+"""
+import logging
+import threading
+
+import numpy as np
+
+EXECUTION_MODES = ('predict', 'function', 'per_thread')
+
+
+class KerasModel:
+    """Keras-compatible ``predict`` that skips ``Model.predict``'s per-call overhead
+
+    ``Model.predict`` builds a data adapter, callbacks and a step loop on
+    every call, which dominates the cost of the one-image and small batches
+    the API sends. Here the forward pass is traced once as a ``tf.function``
+    with a variable batch dimension and each call is a single graph
+    execution. In ``function`` mode every thread shares that graph. In
+    ``per_thread`` mode each thread gets its own clone of the model (same
+    weights, one extra copy per thread), for runtimes where threads contend
+    on a shared model.
+    """
+
+    def __init__(self, model, mode='function'):
+        if mode not in ('function', 'per_thread'):
+            raise ValueError(f"Unknown Keras execution mode: {mode}")
+        import tensorflow as tf
+
+        self._tf = tf
+        self.model = model
+        self.mode = mode
+        self._local = threading.local()
+        self._forward = self._compile(model)
+
+    @property
+    def input_shape(self):
+        return self.model.input_shape
+
+    def _compile(self, model):
+        tf = self._tf
+        spec = tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)
+
+        @tf.function(input_signature=[spec], autograph=False)
+        def forward(batch):
+            return model(batch, training=False)
+
+        return forward
+
+    def _thread_forward(self):
+        forward = getattr(self._local, 'forward', None)
+        if forward is None:
+            clone = self._tf.keras.models.clone_model(self.model)
+            clone.set_weights(self.model.get_weights())
+            forward = self._local.forward = self._compile(clone)
+            logging.info(f"Created disease model replica for thread {threading.current_thread().name}")
+        return forward
+
+    def predict(self, batch, verbose=0):
+        """Run inference on a (batch, height, width, channels) array"""
+        forward = self._thread_forward() if self.mode == 'per_thread' else self._forward
+        return forward(np.asarray(batch, dtype=np.float32)).numpy()
@@ -0,0 +1,250 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from config.settings import METRICS_ENABLED
+
+# Latency buckets in seconds, from sub-millisecond lookups to slow image inference
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _CallbackGauge(_Metric):
+    """Gauge whose samples are read from a callback at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, callback):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def collect(self):
+        samples = self.callback() or {}
+        return [f"{self.name}{_format_labels(self.labelnames, key if isinstance(key, tuple) else (key,))} "
+                f"{_format_value(value)}" for key, value in sorted(samples.items())]
+
+
+class _NullMetric:
+    """Stand-in returned by a disabled registry; every call is a no-op"""
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    dec = set = observe = inc
+
+    def time(self, **labels):
+        return _NULL_CONTEXT
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in Prometheus text format
+
+    A disabled registry hands out no-op metrics, so instrumented code
+    costs one method call per observation. Metrics are per process: with
+    several gunicorn workers each scrape sees the worker that served it.
+    """
+
+    def __init__(self, enabled=True, namespace='agri'):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, factory):
+        name = f"{self.namespace}_{name}" if self.namespace else name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory(name)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        if not self.enabled:
+            return NULL_METRIC
+        return self._register(name, lambda full: Counter(full, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        if not self.enabled:
+            return NULL_METRIC
+        return self._register(name, lambda full: Gauge(full, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        if not self.enabled:
+            return NULL_METRIC
+        return self._register(name, lambda full: Histogram(full, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, labelnames, callback):
+        """Register a gauge read at scrape time; callback returns {label values: value}"""
+        if not self.enabled:
+            return NULL_METRIC
+        metric = _CallbackGauge(f"{self.namespace}_{name}", documentation, labelnames, callback)
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.collect()
+            except Exception:
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+NULL_METRIC = _NullMetric()
+
+
+# Process-wide registry shared by the routes and the model loader
+registry = MetricsRegistry(enabled=METRICS_ENABLED)
+
+stage_seconds = registry.histogram(
+    'stage_duration_seconds', 'Time spent in each prediction stage', ('model', 'stage')
+)
+
+
+# Per-request stage timings, set while a request is being recorded (see collect_stages)
+_request_stages = contextvars.ContextVar('request_stages', default=None)
+
+
+def time_stage(model, stage):
+    """Context manager timing one stage of a prediction"""
+    stages = _request_stages.get()
+    if stages is None:
+        return stage_seconds.time(model=model, stage=stage)
+    return _recorded_stage(model, stage, stages)
+
+
+@contextmanager
+def _recorded_stage(model, stage, stages):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, model=model, stage=stage)
+        stages.append((f"{model}.{stage}", elapsed))
+
+
+def collect_stages():
+    """Start recording the stages timed in the current context into a list, returned with its reset token
+
+    Work submitted to an InferencePool runs in a copy of the submitting
+    context, so stages timed on pool threads land in the same list.
+    """
+    stages = []
+    return stages, _request_stages.set(stages)
+
+
+def stop_collecting_stages(token):
+    _request_stages.reset(token)
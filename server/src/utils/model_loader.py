@@ -1,116 +1,485 @@
 """
 Model loading utilities
 """
+import hashlib
 import logging
 import joblib
-import tensorflow as tf
 import json
+import numpy as np
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from config.settings import (
     CROP_MODEL_PATH, CROP_SCALER_PATH, DISEASE_MODEL_PATH, 
-    DISEASE_CLASSES_PATH, YIELD_MODEL_PATH, YIELD_PREPROCESSOR_PATH
+    DISEASE_CLASSES_PATH, YIELD_MODEL_PATH, YIELD_PREPROCESSOR_PATH,
+    MODEL_LOADING_MODE, MODEL_WARMUP_WORKERS, YIELD_ENGINE,
+    DISEASE_MODEL_BACKEND, DISEASE_TFLITE_MODEL_PATH, DISEASE_TFLITE_THREADS,
+    MODEL_MMAP_DIR, MODEL_REGISTRY_DIR, MODEL_WATCH_INTERVAL, CROP_INDEX_PATH, CROP_INDEX_MODE,
+    DISEASE_KERAS_EXECUTION, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS,
+    CROP_MODEL_CONCURRENCY, DISEASE_MODEL_CONCURRENCY, YIELD_MODEL_CONCURRENCY
 )
+from src.utils.yield_engine import CompiledYieldModel
+from src.utils.crop_index import CropLookupIndex, INDEX_MODES
+from src.utils.image_preprocessing import model_input_shape
+from src.utils.inference_limits import configure_tensorflow_threads, guard_models
+from src.utils.keras_backend import KerasModel
+from src.utils.model_registry import ModelRegistry
+from src.utils.tflite_backend import TFLiteModel
+from src.utils.metrics import registry as metrics
+
+# Models provided by each loader group
+MODEL_GROUPS = {
+    'crop': ('crop_model', 'crop_scaler', 'crop_index'),
+    'disease': ('disease_model', 'disease_classes'),
+    'yield': ('yield_model', 'yield_preprocessor', 'yield_engine')
+}
+
+# Source files behind each loader group, used to derive model versions
+MODEL_FILES = {
+    'crop': (CROP_MODEL_PATH, CROP_SCALER_PATH),
+    'disease': (
+        DISEASE_TFLITE_MODEL_PATH if DISEASE_MODEL_BACKEND == 'tflite' else DISEASE_MODEL_PATH,
+        DISEASE_CLASSES_PATH
+    ),
+    'yield': (YIELD_MODEL_PATH, YIELD_PREPROCESSOR_PATH)
+}
+
+LOADING_MODES = ('eager', 'lazy', 'background')
+
+# Models whose inference calls share each group's concurrency limit, and the limits
+GUARDED_MODELS = {
+    'crop': ('crop_model', 'crop_scaler'),
+    'disease': ('disease_model',),
+    'yield': ('yield_model', 'yield_preprocessor', 'yield_engine')
+}
+MODEL_CONCURRENCY = {
+    'crop': CROP_MODEL_CONCURRENCY,
+    'disease': DISEASE_MODEL_CONCURRENCY,
+    'yield': YIELD_MODEL_CONCURRENCY
+}
+
+model_load_seconds = metrics.gauge('model_load_seconds', 'Duration of the last load of each model group', ('group',))
+model_loads = metrics.counter('model_loads_total', 'Model group load attempts by result', ('group', 'result'))
+
+def file_fingerprint(paths):
+    """Short hash of file names, sizes and mtimes; identical across workers on one host"""
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{Path(path).name}:missing;".encode())
+    return digest.hexdigest()[:12]
 
 class ModelLoader:
-    """Handles loading and managing ML models"""
+    """Handles loading and managing ML models
+
+    Loading modes:
+        eager      -- load every model in __init__ (default)
+        lazy       -- load each model group on first use
+        background -- start loading all groups concurrently in a thread pool
+                      and return immediately; first use waits for its group
+    """
     
-    def __init__(self):
+    def __init__(self, mode=None, registry=None):
         self.models = {}
-        self.load_all_models()
+        self.mode = mode or MODEL_LOADING_MODE
+        if self.mode not in LOADING_MODES:
+            raise ValueError(f"Unknown model loading mode: {self.mode}")
+
+        self._loaders = {
+            'crop': self.load_crop_models,
+            'disease': self.load_disease_models,
+            'yield': self.load_yield_models
+        }
+        self._model_groups = {name: group for group, names in MODEL_GROUPS.items() for name in names}
+        self._group_locks = {group: threading.Lock() for group in MODEL_GROUPS}
+        # Serialises swaps of self.models so concurrent loads of different groups keep each other's models
+        self._swap_lock = threading.Lock()
+        self._readiness = {group: 'pending' for group in MODEL_GROUPS}
+        self._versions = {group: None for group in MODEL_GROUPS}
+        self._attempted = {group: None for group in MODEL_GROUPS}
+        self._reload_listeners = []
+        self._warmup_executor = None
+        self._watcher_pid = None
+        self._watcher_lock = threading.Lock()
+        self.registry = registry or ModelRegistry(MODEL_REGISTRY_DIR)
+
+        if self.mode == 'eager':
+            self.load_all_models()
+        elif self.mode == 'background':
+            self.warm_up()
     
-    def load_crop_models(self):
+    def load_mmapped(self, name, source_paths, build=None):
+        """Load a joblib artifact, memory-mapping its arrays when MODEL_MMAP_DIR is set
+
+        The artifact is written once, uncompressed, to MODEL_MMAP_DIR under a
+        name derived from its source files' fingerprint, then loaded with
+        mmap_mode='r' so every worker process on the host shares the same
+        page-cache pages for the NumPy arrays instead of holding a copy each.
+        """
+        build = build or (lambda: joblib.load(source_paths[0]))
+        if not MODEL_MMAP_DIR:
+            return build()
+
+        mmap_dir = Path(MODEL_MMAP_DIR)
+        path = mmap_dir / f"{name}-{file_fingerprint(source_paths)}.joblib"
+        if not path.exists():
+            mmap_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            joblib.dump(build(), tmp_path)
+            os.replace(tmp_path, path)
+        return joblib.load(path, mmap_mode='r')
+
+    def _load_target(self, models, paths):
+        """Resolve the dict a loader fills and how it maps flat model paths to files
+
+        Loaders fill ``self.models`` directly unless given a staging dict, and
+        read the flat MODELS_DIR files unless ``paths`` maps them to a
+        registry version.
+        """
+        paths = paths or {}
+        return (self.models if models is None else models), (lambda path: paths.get(path, path))
+
+    def load_crop_models(self, models=None, paths=None):
         """Load crop recommendation models"""
+        models, path = self._load_target(models, paths)
         try:
-            self.models['crop_model'] = joblib.load(CROP_MODEL_PATH)
-            self.models['crop_scaler'] = joblib.load(CROP_SCALER_PATH)
+            models['crop_model'] = self.load_mmapped('crop_model', [path(CROP_MODEL_PATH)])
+            models['crop_scaler'] = self.load_mmapped('crop_scaler', [path(CROP_SCALER_PATH)])
             logging.info("Crop recommendation models loaded successfully")
-            return True
         except Exception as e:
             logging.error(f"Error loading crop models: {e}")
-            self.models['crop_model'] = None
-            self.models['crop_scaler'] = None
+            models['crop_model'] = None
+            models['crop_scaler'] = None
+            models['crop_index'] = None
             return False
+
+        models['crop_index'] = self.load_crop_index(path(CROP_MODEL_PATH), path(CROP_SCALER_PATH))
+        return True
+
+    def load_crop_index(self, model_path, scaler_path):
+        """Load the optional crop lookup index stored next to the crop model files"""
+        index_path = Path(model_path).with_name(CROP_INDEX_PATH.name)
+        if CROP_INDEX_MODE == 'off' or not index_path.exists():
+            return None
+        if CROP_INDEX_MODE not in INDEX_MODES:
+            logging.error(f"Unknown CROP_INDEX_MODE '{CROP_INDEX_MODE}'; expected one of: {', '.join(INDEX_MODES)}")
+            return None
+        try:
+            index = CropLookupIndex.load(index_path, file_fingerprint([model_path, scaler_path]))
+            if index is not None:
+                logging.info(f"Crop lookup index loaded ({index.metadata.get('points')} points)")
+            return index
+        except Exception as e:
+            # The model keeps answering every request without the index
+            logging.error(f"Error loading crop lookup index: {e}")
+            return None
     
-    def load_disease_models(self):
-        """Load disease detection models"""
+    def load_disease_tflite_model(self, models=None, paths=None):
+        """Load the converted TFLite disease model"""
+        models, path = self._load_target(models, paths)
         try:
-            # Try loading with compile=False first to avoid shape issues
-            model = tf.keras.models.load_model(DISEASE_MODEL_PATH, compile=False)
+            models['disease_model'] = TFLiteModel(path(DISEASE_TFLITE_MODEL_PATH), num_threads=DISEASE_TFLITE_THREADS)
+            with open(path(DISEASE_CLASSES_PATH), "r") as f:
+                models['disease_classes'] = json.load(f)
+            logging.info("Disease detection TFLite model loaded successfully")
+            return True
+        except Exception as e:
+            logging.error(f"Error loading TFLite disease model: {e}")
+            models['disease_model'] = None
+            models['disease_classes'] = None
+            return False
+
+    def load_keras_disease_model(self, model_path=DISEASE_MODEL_PATH):
+        """Load the Keras disease model, fixing a grayscale input to RGB"""
+        # Imported here so workers that never serve disease detection skip the TensorFlow import
+        import tensorflow as tf
+        configure_tensorflow_threads(tf, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS)
+
+        # Try loading with compile=False first to avoid shape issues
+        model = tf.keras.models.load_model(model_path, compile=False)
+        
+        # Check if input shape needs fixing
+        if model.input_shape[-1] == 1:
+            logging.info("Fixing model input shape from grayscale to RGB")
+            # Create new input layer with RGB shape
+            new_input = tf.keras.layers.Input(shape=(161, 161, 3), name='input_layer')
+            
+            # Convert grayscale to RGB by repeating channels
+            rgb_input = tf.keras.layers.Lambda(
+                lambda x: tf.repeat(x, 3, axis=-1), 
+                name='grayscale_to_rgb'
+            )(new_input)
             
-            # Check if input shape needs fixing
-            if model.input.shape[-1] == 1:
-                logging.info("Fixing model input shape from grayscale to RGB")
-                # Create new input layer with RGB shape
-                new_input = tf.keras.layers.Input(shape=(161, 161, 3), name='input_layer')
-                
-                # Convert grayscale to RGB by repeating channels
-                rgb_input = tf.keras.layers.Lambda(
-                    lambda x: tf.repeat(x, 3, axis=-1), 
-                    name='grayscale_to_rgb'
-                )(new_input)
-                
-                # Get the output from the original model starting from the second layer
-                x = rgb_input
-                for i, layer in enumerate(model.layers[1:]):
-                    if hasattr(layer, '__call__'):
-                        x = layer(x)
-                
-                # Create new model with fixed input
-                fixed_model = tf.keras.Model(inputs=new_input, outputs=x)
-                self.models['disease_model'] = fixed_model
-            else:
-                self.models['disease_model'] = model
+            # Get the output from the original model starting from the second layer
+            x = rgb_input
+            for i, layer in enumerate(model.layers[1:]):
+                if hasattr(layer, '__call__'):
+                    x = layer(x)
+            
+            # Create new model with fixed input
+            return tf.keras.Model(inputs=new_input, outputs=x)
+        return model
+
+    def load_disease_models(self, models=None, paths=None):
+        """Load disease detection models"""
+        if DISEASE_MODEL_BACKEND == 'tflite':
+            return self.load_disease_tflite_model(models, paths)
+
+        models, path = self._load_target(models, paths)
+        try:
+            models['disease_model'] = self.load_keras_disease_model(path(DISEASE_MODEL_PATH))
+            if DISEASE_KERAS_EXECUTION != 'predict':
+                models['disease_model'] = KerasModel(models['disease_model'], DISEASE_KERAS_EXECUTION)
             
-            with open(DISEASE_CLASSES_PATH, "r") as f:
-                self.models['disease_classes'] = json.load(f)
+            with open(path(DISEASE_CLASSES_PATH), "r") as f:
+                models['disease_classes'] = json.load(f)
             logging.info("Disease detection model loaded successfully")
             return True
         except Exception as e:
             logging.error(f"Error loading disease model: {e}")
             # Fallback: try loading with compile=False only
             try:
-                self.models['disease_model'] = tf.keras.models.load_model(DISEASE_MODEL_PATH, compile=False)
-                with open(DISEASE_CLASSES_PATH, "r") as f:
-                    self.models['disease_classes'] = json.load(f)
+                import tensorflow as tf
+                models['disease_model'] = tf.keras.models.load_model(path(DISEASE_MODEL_PATH), compile=False)
+                with open(path(DISEASE_CLASSES_PATH), "r") as f:
+                    models['disease_classes'] = json.load(f)
                 logging.info("Disease detection model loaded with compile=False fallback")
                 return True
             except Exception as fallback_e:
                 logging.error(f"Fallback loading also failed: {fallback_e}")
-                self.models['disease_model'] = None
-                self.models['disease_classes'] = None
+                models['disease_model'] = None
+                models['disease_classes'] = None
                 return False
     
-    def load_yield_models(self):
+    def load_yield_models(self, models=None, paths=None):
         """Load yield prediction models"""
+        models, path = self._load_target(models, paths)
         try:
-            self.models['yield_model'] = joblib.load(YIELD_MODEL_PATH)
-            self.models['yield_preprocessor'] = joblib.load(YIELD_PREPROCESSOR_PATH)
+            models['yield_model'] = self.load_mmapped('yield_model', [path(YIELD_MODEL_PATH)])
+            models['yield_preprocessor'] = self.load_mmapped('yield_preprocessor', [path(YIELD_PREPROCESSOR_PATH)])
             logging.info("Yield prediction models loaded successfully")
-            return True
         except Exception as e:
             logging.error(f"Error loading yield models: {e}")
-            self.models['yield_model'] = None
-            self.models['yield_preprocessor'] = None
+            models['yield_model'] = None
+            models['yield_preprocessor'] = None
+            models['yield_engine'] = None
             return False
+
+        models['yield_engine'] = None
+        if YIELD_ENGINE == 'compiled':
+            try:
+                models['yield_engine'] = self.load_mmapped(
+                    'yield_engine', [path(YIELD_MODEL_PATH), path(YIELD_PREPROCESSOR_PATH)],
+                    lambda: CompiledYieldModel.from_sklearn(
+                        models['yield_preprocessor'], models['yield_model']
+                    )
+                )
+                logging.info("Compiled yield engine built successfully")
+            except Exception as e:
+                # The sklearn path keeps serving if the tree cannot be compiled
+                logging.error(f"Error compiling yield engine: {e}")
+        return True
     
+    def source_version(self, group):
+        """Get the version a group should serve: the registry's active version, else a file fingerprint"""
+        version = self.registry.active_version(group)
+        return version if version is not None else file_fingerprint(MODEL_FILES[group])
+
+    def warm_group(self, group, models):
+        """Run one dummy inference through freshly loaded models"""
+        if group == 'crop':
+            scaler = models['crop_scaler']
+            models['crop_model'].predict(scaler.transform(np.zeros((1, scaler.n_features_in_))))
+        elif group == 'yield':
+            preprocessor = models['yield_preprocessor']
+            areas, items = preprocessor.named_transformers_['OneHotEncode'].categories_
+            row = np.array([[2000, 0.0, 0.0, 0.0, areas[0], items[0]]], dtype=object)
+            models['yield_model'].predict(preprocessor.transform(row))
+            if models.get('yield_engine') is not None:
+                models['yield_engine'].predict_one(2000, 0.0, 0.0, 0.0, areas[0], items[0])
+        elif group == 'disease':
+            model = models['disease_model']
+            model.predict(np.zeros((1,) + model_input_shape(model), dtype=np.float32), verbose=0)
+
+    def _run_loader(self, group):
+        """Load a group's active version into a staging dict, warm it and swap it in
+
+        Caller holds the group lock. Requests keep using the previous models
+        until the new ones are warm; the swap replaces the ``models`` dict
+        reference in one assignment, so a reader sees either the old or the
+        new set. A failed reload keeps serving the previous version.
+        """
+        reloading = self._readiness[group] == 'ready'
+        if not reloading:
+            self._readiness[group] = 'loading'
+
+        version = self.registry.active_version(group)
+        paths = self.registry.resolve(group, version, MODEL_FILES[group])
+        if version is None:
+            version = file_fingerprint(MODEL_FILES[group])
+
+        # Recorded whether or not the load succeeds, so the watcher only retries a new version
+        self._attempted[group] = version
+
+        staged = {}
+        started = time.perf_counter()
+        loaded = self._loaders[group](staged, paths)
+        if loaded:
+            guard_models(staged, GUARDED_MODELS[group], MODEL_CONCURRENCY[group], group)
+            try:
+                self.warm_group(group, staged)
+            except Exception as e:
+                logging.error(f"Error warming {group} models (version {version}): {e}")
+                loaded = False
+        model_load_seconds.set(time.perf_counter() - started, group=group)
+        model_loads.inc(group=group, result='ready' if loaded else 'failed')
+
+        if not loaded and reloading:
+            logging.error(f"Keeping {group} models at version {self._versions[group]}; reload to {version} failed")
+            return False
+
+        with self._swap_lock:
+            models = dict(self.models)
+            models.update(staged)
+            self.models = models
+        self._readiness[group] = 'ready' if loaded else 'failed'
+        self._versions[group] = version if loaded else None
+        if loaded:
+            logging.info(f"Serving {group} models at version {version}")
+
+        for listener in list(self._reload_listeners):
+            try:
+                listener(group, self._versions[group])
+            except Exception as e:
+                logging.error(f"Error in model reload listener: {e}")
+        return loaded
+
+    def _load_group(self, group):
+        """(Re)load one model group"""
+        with self._group_locks[group]:
+            return self._run_loader(group)
+
+    def reload(self, group, wait=False):
+        """Load a group's active version in the background and swap it in when warm
+
+        Returns a future, or the load result when ``wait`` is true.
+        """
+        future = self._background_executor().submit(self._load_group, group)
+        return future.result() if wait else future
+
+    def check_for_updates(self):
+        """Reload every loaded group whose active version changed on disk
+
+        A group is compared with the version last attempted, not the one
+        serving, so a version that failed to load is not retried until its
+        source changes again or a reload is requested explicitly.
+        """
+        reloads = []
+        for group in MODEL_GROUPS:
+            if self._readiness[group] not in ('ready', 'failed'):
+                continue
+            try:
+                changed = self.source_version(group) != self._attempted[group]
+            except OSError:
+                changed = False
+            if changed and not self._group_locks[group].locked():
+                reloads.append(self.reload(group))
+        return reloads
+
+    def start_watcher(self, interval=MODEL_WATCH_INTERVAL):
+        """Poll the model files for new versions in this process (again after a fork)"""
+        if interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._watcher_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+
+            def watch():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.check_for_updates()
+                    except Exception as e:
+                        logging.error(f"Error checking for model updates: {e}")
+
+            threading.Thread(target=watch, name='model-watcher', daemon=True).start()
+
+    def ensure_loaded(self, group):
+        """Load a model group if it has not been attempted yet"""
+        if self._readiness[group] not in ('ready', 'failed'):
+            with self._group_locks[group]:
+                if self._readiness[group] not in ('ready', 'failed'):
+                    return self._run_loader(group)
+        return self._readiness[group] == 'ready'
+
+    def _background_executor(self):
+        if self._warmup_executor is None:
+            self._warmup_executor = ThreadPoolExecutor(
+                max_workers=MODEL_WARMUP_WORKERS, thread_name_prefix='model-warmup'
+            )
+        return self._warmup_executor
+
+    def warm_up(self):
+        """Load all model groups concurrently in the background"""
+        return [self._background_executor().submit(self.ensure_loaded, group) for group in MODEL_GROUPS]
+
     def load_all_models(self):
         """Load all models"""
-        self.load_crop_models()
-        self.load_disease_models()
-        self.load_yield_models()
+        for group in MODEL_GROUPS:
+            self._load_group(group)
     
     def get_model(self, model_name):
-        """Get a specific model"""
+        """Get a specific model, loading its group on first use"""
+        group = self._model_groups.get(model_name)
+        if group is not None:
+            self.ensure_loaded(group)
         return self.models.get(model_name)
     
+    def get_models(self, *model_names):
+        """Get several models from one version, so a swap cannot split a request across versions"""
+        for group in {self._model_groups[name] for name in model_names if name in self._model_groups}:
+            self.ensure_loaded(group)
+        models = self.models
+        return tuple(models.get(name) for name in model_names)
+
     def is_model_available(self, model_name):
-        """Check if a model is available"""
-        return self.models.get(model_name) is not None
+        """Check if a model is available, loading its group on first use"""
+        return self.get_model(model_name) is not None
     
     def get_model_status(self):
-        """Get status of all models"""
+        """Get status of all models without triggering any loads"""
+        return {
+            "crop_recommendation": self.models.get('crop_model') is not None,
+            "disease_detection": self.models.get('disease_model') is not None,
+            "yield_prediction": self.models.get('yield_model') is not None
+        }
+
+    def get_model_version(self, name):
+        """Get the version of a loaded model group, by group or model name"""
+        group = self._model_groups.get(name, name)
+        return self._versions.get(group)
+
+    def add_reload_listener(self, listener):
+        """Register listener(group, version), called whenever a model group is (re)loaded"""
+        self._reload_listeners.append(listener)
+
+    def get_model_readiness(self):
+        """Get per-group loading state: pending, loading, ready or failed"""
+        return dict(self._readiness)
+
+    def get_model_versions(self):
+        """Get the loaded, active and published versions of every group"""
         return {
-            "crop_recommendation": self.is_model_available('crop_model'),
-            "disease_detection": self.is_model_available('disease_model'),
-            "yield_prediction": self.is_model_available('yield_model')
+            group: {
+                "loaded": self._versions[group],
+                "active": self.registry.active_version(group),
+                "available": self.registry.versions(group)
+            }
+            for group in MODEL_GROUPS
         }
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Versioned on-disk model registry
+"""
+import os
+import shutil
+import time
+from pathlib import Path
+
+
+class ModelRegistry:
+    """Model versions stored as ``<root>/<group>/<version>/<model files>``
+
+    Each version directory holds a complete copy of a group's files under
+    their usual names (e.g. ``dtr.pkl`` and ``preprocesser.pkl`` for yield).
+    ``<root>/<group>/CURRENT`` names the active version; without it the
+    newest version by name is active. Groups with no versions are served
+    from the flat files in MODELS_DIR.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def versions(self, group):
+        """List a group's published versions, oldest first"""
+        group_dir = self.root / group
+        if not group_dir.is_dir():
+            return []
+        return sorted(path.name for path in group_dir.iterdir() if path.is_dir() and not path.name.startswith('.'))
+
+    def active_version(self, group):
+        """Get the version a group should serve, or None when it has no versions"""
+        versions = self.versions(group)
+        if not versions:
+            return None
+        try:
+            current = (self.root / group / 'CURRENT').read_text().strip()
+        except OSError:
+            current = None
+        return current if current in versions else versions[-1]
+
+    def resolve(self, group, version, paths):
+        """Map a group's flat model paths to the files of one version"""
+        if version is None:
+            return {path: path for path in paths}
+        version_dir = self.root / group / version
+        return {path: version_dir / Path(path).name for path in paths}
+
+    def activate(self, group, version):
+        """Make ``version`` the active version of a group"""
+        if version not in self.versions(group):
+            raise ValueError(f"Unknown version '{version}' for model group '{group}'")
+        current = self.root / group / 'CURRENT'
+        tmp_path = current.with_name(f"CURRENT.{os.getpid()}.tmp")
+        tmp_path.write_text(version)
+        os.replace(tmp_path, current)
+
+    def publish(self, group, files, version=None, activate=False):
+        """Copy a complete set of model files in as a new version and return its name
+
+        Files are staged in a hidden directory and renamed into place, so a
+        watcher never sees a partially copied version.
+        """
+        version = version or time.strftime('%Y%m%d-%H%M%S')
+        group_dir = self.root / group
+        target = group_dir / version
+        if target.exists():
+            raise ValueError(f"Version '{version}' already exists for model group '{group}'")
+
+        staging = group_dir / f".{version}.{os.getpid()}.tmp"
+        staging.mkdir(parents=True)
+        try:
+            for path in files:
+                shutil.copy2(path, staging / Path(path).name)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(group, version)
+        return version
@@ -0,0 +1,223 @@
+"""
+Prediction result cache for deterministic tabular models
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonicalize_features(features):
+    """Normalize a feature tuple so equivalent inputs share a cache key
+
+    Numbers compare by float value (2000 == 2000.0, -0.0 == 0.0) and
+    strings are stripped of surrounding whitespace.
+    """
+    canonical = []
+    for value in features:
+        if isinstance(value, bool) or value is None:
+            canonical.append(value)
+        elif isinstance(value, (int, float)):
+            canonical.append(float(value) + 0.0)
+        elif hasattr(value, 'item'):
+            # NumPy scalars
+            canonical.append(float(value.item()) + 0.0)
+        else:
+            canonical.append(str(value).strip())
+    return tuple(canonical)
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache keyed on (namespace, model version, features)
+
+    Entries live in a per-process LRU. When ``shared_path`` is set, entries
+    are also written to a SQLite file (e.g. under /dev/shm) so gunicorn
+    workers on the same host can reuse each other's results. Values must be
+    JSON-serializable.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0, shared_path=None, shared_max_entries=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds) if ttl_seconds else None
+        self.shared_path = str(shared_path) if shared_path else None
+        self.shared_max_entries = int(shared_max_entries or self.max_entries * 10)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shared_writes = 0
+
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._namespace_stats = {}
+
+        if self.shared_path:
+            self._shared_connection()
+
+    @staticmethod
+    def make_key(namespace, version, features):
+        """Build the string cache key for a prediction"""
+        return json.dumps([namespace, version, canonicalize_features(features)], separators=(',', ':'))
+
+    def get(self, namespace, version, features):
+        """Get a cached value, or None on a miss"""
+        key = self.make_key(namespace, version, features)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._record(namespace, hit=True)
+                    return value
+                del self._entries[key]
+
+        value = self._shared_get(key, now)
+        with self._lock:
+            if value is not None:
+                self._store_local(key, value, now)
+                self._shared_hits += 1
+            self._record(namespace, hit=value is not None)
+        return value
+
+    def set(self, namespace, version, features, value):
+        """Cache a value"""
+        key = self.make_key(namespace, version, features)
+        now = time.time()
+        with self._lock:
+            self._store_local(key, value, now)
+        self._shared_set(key, namespace, value, now)
+
+    def get_or_compute(self, namespace, version, features, compute):
+        """Return the cached value or compute, cache and return it"""
+        value = self.get(namespace, version, features)
+        if value is None:
+            value = compute()
+            self.set(namespace, version, features, value)
+        return value
+
+    def invalidate(self, namespace=None):
+        """Drop all entries, or only those of one namespace"""
+        prefix = None if namespace is None else json.dumps([namespace])[:-1] + ','
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key.startswith(prefix)]:
+                    del self._entries[key]
+
+        connection = self._shared_connection()
+        if connection is not None:
+            try:
+                with connection:
+                    if namespace is None:
+                        connection.execute("DELETE FROM predictions")
+                    else:
+                        connection.execute("DELETE FROM predictions WHERE namespace = ?", (namespace,))
+            except sqlite3.Error as e:
+                logging.error(f"Error invalidating shared prediction cache: {e}")
+
+    def get_stats(self):
+        """Get hit/miss counters and cache size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "shared": self.shared_path is not None,
+                "hits": self._hits,
+                "shared_hits": self._shared_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "namespaces": {name: dict(counts) for name, counts in self._namespace_stats.items()}
+            }
+
+    def _record(self, namespace, hit):
+        """Update hit/miss counters; caller holds the lock"""
+        counts = self._namespace_stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        if hit:
+            self._hits += 1
+            counts["hits"] += 1
+        else:
+            self._misses += 1
+            counts["misses"] += 1
+
+    def _store_local(self, key, value, now):
+        """Insert into the LRU, evicting the oldest entries; caller holds the lock"""
+        self._entries[key] = (now + self.ttl if self.ttl else None, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _shared_connection(self):
+        """Get this thread's SQLite connection, reopening after a fork"""
+        if not self.shared_path:
+            return None
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        try:
+            connection = sqlite3.connect(self.shared_path, timeout=1.0, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, namespace TEXT, value TEXT, expires_at REAL)"
+            )
+            connection.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Shared prediction cache unavailable: {e}")
+            return None
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _shared_get(self, key, now):
+        connection = self._shared_connection()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT value, expires_at FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading shared prediction cache: {e}")
+            return None
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return json.loads(row[0])
+
+    def _shared_set(self, key, namespace, value, now):
+        connection = self._shared_connection()
+        if connection is None:
+            return
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO predictions (key, namespace, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, namespace, json.dumps(value), now + self.ttl if self.ttl else None)
+                )
+                self._shared_writes += 1
+                if self._shared_writes % 1000 == 0:
+                    self._prune_shared(connection, now)
+        except sqlite3.Error as e:
+            logging.error(f"Error writing shared prediction cache: {e}")
+
+    def _prune_shared(self, connection, now):
+        """Drop expired rows and keep the shared table within its size bound"""
+        connection.execute("DELETE FROM predictions WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        connection.execute(
+            "DELETE FROM predictions WHERE rowid NOT IN "
+            "(SELECT rowid FROM predictions ORDER BY rowid DESC LIMIT ?)",
+            (self.shared_max_entries,)
+        )
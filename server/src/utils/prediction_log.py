@@ -0,0 +1,289 @@
+"""
+Asynchronous columnar log of prediction requests for replay
+"""
+import atexit
+import importlib.util
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+LOG_FORMATS = ('npz', 'parquet')
+
+# Columns of a log file, in order; STRING_COLUMNS hold UTF-8 text
+COLUMNS = {
+    'timestamp': np.float64, 'endpoint': str, 'query': str, 'status': np.int16, 'latency_ms': np.float32,
+    'worker': np.int32, 'model_version': str, 'input_format': str, 'inputs': str, 'image_hash': str,
+    'outputs': str, 'stages': str
+}
+STRING_COLUMNS = [name for name, dtype in COLUMNS.items() if dtype is str]
+
+_MODEL_VERSION = re.compile(rb'"model_version":\s*("(?:[^"\\]|\\.)*"|[^,}\s]+)')
+_STOP = object()
+
+_loggers = []
+_loggers_lock = threading.Lock()
+
+
+class PredictionLogger:
+    """Buffers prediction records and writes them in batches from a background thread
+
+    ``record`` only puts the raw request and response bytes on a bounded
+    queue; decoding, aggregation and compression happen on the writer
+    thread, so a request never waits for the disk. When the queue is full
+    the record is dropped and counted. Each flush writes one segment file
+    (``predictions-<time>-<pid>-<seq>.npz`` or ``.parquet``) atomically,
+    so readers never see a partial file, and the oldest segments beyond
+    ``max_files`` are deleted.
+    """
+
+    def __init__(self, directory, fmt='npz', flush_rows=5000, flush_seconds=60.0, max_queue=10000,
+                 max_files=1000, max_body_bytes=65536):
+        if fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown prediction log format: {fmt}")
+        if fmt == 'parquet':
+            # Fail at startup rather than on the first flush
+            if importlib.util.find_spec('pyarrow') is None:
+                raise ImportError("Parquet logs need the optional pyarrow package: pip install pyarrow")
+        self.directory = Path(directory)
+        self.fmt = fmt
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = max(0.01, float(flush_seconds))
+        self.max_queue = max(1, int(max_queue))
+        self.max_files = max_files
+        self.max_body_bytes = max_body_bytes
+
+        self._queue = queue.Queue(self.max_queue)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._sequence = 0
+
+        self._recorded = 0
+        self._dropped = 0
+        self._written = 0
+        self._files = 0
+        self._last_error = None
+
+        with _loggers_lock:
+            _loggers.append(self)
+
+    def record(self, entry):
+        """Queue one request's record without blocking; returns False when it was dropped
+
+        ``entry`` holds timestamp, endpoint, query, status, latency_ms,
+        model_version, input_format, inputs (bytes, str or a dict of form
+        fields), image_hash, outputs (bytes) and stages (a list of
+        (stage, seconds) pairs).
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._recorded += 1
+        return True
+
+    def flush(self, timeout=30):
+        """Write everything queued so far and stop the writer; the next record starts a new one"""
+        with self._lock:
+            if self._worker is None or self._worker_pid != os.getpid():
+                return
+            worker, entries = self._worker, self._queue
+            self._worker, self._queue = None, queue.Queue(self.max_queue)
+        if worker.is_alive():
+            entries.put(_STOP)
+            worker.join(timeout)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "format": self.fmt,
+                "directory": str(self.directory),
+                "recorded": self._recorded,
+                "dropped": self._dropped,
+                "written": self._written,
+                "files": self._files,
+                "queue_depth": self._queue.qsize(),
+                "last_error": self._last_error
+            }
+
+    def _ensure_worker(self):
+        """Start the writer thread, restarting it after a process fork"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                # Threads do not survive fork; drop anything inherited from the parent
+                self._queue = queue.Queue(self.max_queue)
+            self._worker = threading.Thread(target=self._run, args=(self._queue,), name="prediction-log", daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _run(self, entries):
+        pending = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                entry = entries.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                entry = None
+            if entry is _STOP:
+                self._write(pending)
+                return
+            if entry is not None:
+                pending.append(entry)
+            if len(pending) >= self.flush_rows or time.monotonic() >= deadline:
+                self._write(pending)
+                pending = []
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _write(self, entries):
+        if not entries:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            columns = self._columns(entries)
+            self._sequence += 1
+            name = f"predictions-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._sequence:05d}.{self.fmt}"
+            path = self.directory / name
+            temporary = self.directory / f".{name}.tmp"
+            if self.fmt == 'npz':
+                write_npz(temporary, columns)
+            else:
+                pd.DataFrame(columns).to_parquet(temporary, engine='pyarrow', compression='zstd', index=False)
+            os.replace(temporary, path)
+            self._prune()
+            with self._lock:
+                self._written += len(entries)
+                self._files += 1
+        except Exception as e:
+            logging.error(f"Error writing prediction log: {e}")
+            with self._lock:
+                self._last_error = str(e)
+
+    def _columns(self, entries):
+        """Decode queued entries into one array per column"""
+        columns = {name: [] for name in COLUMNS}
+        for entry in entries:
+            outputs = entry['outputs'] or b''
+            model_version = entry['model_version']
+            if not model_version and outputs:
+                found = dict.fromkeys(match.strip(b'"').decode('utf-8', 'replace')
+                                      for match in _MODEL_VERSION.findall(outputs))
+                model_version = ','.join(version for version in found if version != 'null')
+            stages = {}
+            for stage, seconds in entry['stages'] or ():
+                stages[stage] = stages.get(stage, 0.0) + seconds * 1e3
+
+            columns['timestamp'].append(entry['timestamp'])
+            columns['endpoint'].append(entry['endpoint'])
+            columns['query'].append(entry['query'])
+            columns['status'].append(entry['status'])
+            columns['latency_ms'].append(entry['latency_ms'])
+            columns['worker'].append(entry['worker'])
+            columns['model_version'].append(model_version or '')
+            columns['input_format'].append(entry['input_format'])
+            columns['inputs'].append(self._text(entry['inputs']))
+            columns['image_hash'].append(entry['image_hash'] or '')
+            columns['outputs'].append(self._text(outputs))
+            columns['stages'].append(json.dumps({stage: round(ms, 3) for stage, ms in stages.items()}) if stages else '')
+        return {name: np.array(values, dtype=object if COLUMNS[name] is str else COLUMNS[name])
+                for name, values in columns.items()}
+
+    def _text(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, dict):
+            value = json.dumps(value)
+        if isinstance(value, (bytes, bytearray)):
+            value = bytes(value).decode('utf-8', 'replace')
+        return value if len(value) <= self.max_body_bytes else ''
+
+    def _prune(self):
+        if self.max_files <= 0:
+            return
+        segments = sorted(self.directory.glob(f"predictions-*.{self.fmt}"))
+        for path in segments[:max(0, len(segments) - self.max_files)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def flush_all():
+    """Flush every logger in this process, e.g. when a worker exits"""
+    with _loggers_lock:
+        loggers = list(_loggers)
+    for logger in loggers:
+        logger.flush()
+
+
+atexit.register(flush_all)
+
+
+def pack_strings(values):
+    """Encode strings as one UTF-8 byte array plus end offsets, so NPZ files need no pickling"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets):
+    raw = data.tobytes()
+    starts = np.concatenate([[0], offsets[:-1]]) if len(offsets) else offsets
+    return np.array([raw[start:end].decode('utf-8') for start, end in zip(starts.tolist(), offsets.tolist())],
+                    dtype=object)
+
+
+def write_npz(path, columns):
+    arrays = {}
+    for name, values in columns.items():
+        if name in STRING_COLUMNS:
+            arrays[f"{name}.data"], arrays[f"{name}.offsets"] = pack_strings(values)
+        else:
+            arrays[name] = values
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+
+def read_npz(path):
+    with np.load(path, allow_pickle=False) as archive:
+        return pd.DataFrame({
+            name: unpack_strings(archive[f"{name}.data"], archive[f"{name}.offsets"]) if name in STRING_COLUMNS
+            else archive[name]
+            for name in COLUMNS
+        })
+
+
+def log_files(paths):
+    """Segment files named by ``paths``, expanding directories, in name (time) order"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(file for fmt in LOG_FORMATS for file in path.glob(f"predictions-*.{fmt}")))
+        else:
+            files.append(path)
+    return files
+
+
+def read_prediction_log(paths):
+    """Read log files or directories into one DataFrame ordered by request time"""
+    frames = [read_npz(path) if path.suffix == '.npz' else pd.read_parquet(path) for path in log_files(paths)]
+    if not frames:
+        return pd.DataFrame({name: pd.Series(dtype=object if dtype is str else dtype) for name, dtype in COLUMNS.items()})
+    frame = pd.concat(frames, ignore_index=True)
+    return frame.sort_values('timestamp', kind='stable', ignore_index=True)
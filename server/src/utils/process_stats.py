@@ -0,0 +1,53 @@
+"""
+Process memory statistics
+"""
+import os
+import resource
+import sys
+
+
+def _read_kb_fields(path, fields):
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                if name in fields:
+                    values[name] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def memory_usage():
+    """Get this process's memory usage in MB
+
+    On Linux, ``shared_mb`` covers pages shared with other processes (such
+    as copy-on-write model memory inherited from the gunicorn master and
+    memory-mapped model files) and ``private_mb`` is what the worker holds
+    on its own; ``pss_mb`` splits shared pages evenly between their users.
+    """
+    usage = {"pid": os.getpid()}
+
+    rollup = _read_kb_fields(
+        '/proc/self/smaps_rollup',
+        {'Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'}
+    )
+    if rollup:
+        usage.update({
+            "rss_mb": rollup.get('Rss', 0) / 1024,
+            "pss_mb": rollup.get('Pss', 0) / 1024,
+            "shared_mb": (rollup.get('Shared_Clean', 0) + rollup.get('Shared_Dirty', 0)) / 1024,
+            "private_mb": (rollup.get('Private_Clean', 0) + rollup.get('Private_Dirty', 0)) / 1024
+        })
+        return usage
+
+    status = _read_kb_fields('/proc/self/status', {'VmRSS'})
+    if status:
+        usage["rss_mb"] = status['VmRSS'] / 1024
+        return usage
+
+    # ru_maxrss is peak RSS: bytes on macOS, kilobytes elsewhere
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage["max_rss_mb"] = max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return usage
@@ -0,0 +1,58 @@
+"""
+Structured, sampled logging for per-request events
+"""
+import json
+import logging
+import threading
+import time
+
+
+class SampledLogger:
+    """Logs events as single-line JSON, at most ``burst`` per event per window
+
+    Once an event exceeds its budget further occurrences are only counted;
+    the next logged occurrence of that event reports how many were
+    suppressed. The JSON is only built for events that are logged.
+    """
+
+    def __init__(self, logger=None, burst=10, window_seconds=60.0):
+        self.logger = logger or logging.getLogger('agri.requests')
+        self.burst = burst
+        self.window = window_seconds
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def _admit(self, event):
+        """Return (should_log, suppressed_count) and advance the event's window"""
+        now = time.monotonic()
+        with self._lock:
+            start, logged, suppressed = self._windows.get(event, (now, 0, 0))
+            if now - start >= self.window:
+                start, logged = now, 0
+            if logged < self.burst:
+                self._windows[event] = (start, logged + 1, 0)
+                return True, suppressed
+            self._windows[event] = (start, logged, suppressed + 1)
+            return False, 0
+
+    def log(self, level, event, error=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        admitted, suppressed = self._admit(event)
+        if not admitted:
+            return
+
+        record = {"event": event}
+        if error is not None:
+            record["error_type"] = type(error).__name__
+            record["error"] = str(error)
+        record.update(fields)
+        if suppressed:
+            record["suppressed"] = suppressed
+        self.logger.log(level, json.dumps(record, default=str))
+
+    def error(self, event, error=None, **fields):
+        self.log(logging.ERROR, event, error, **fields)
+
+    def warning(self, event, error=None, **fields):
+        self.log(logging.WARNING, event, error, **fields)
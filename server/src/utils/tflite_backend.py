@@ -0,0 +1,123 @@
+"""
+TensorFlow Lite backend for the disease model
+"""
+import logging
+import threading
+
+import numpy as np
+
+QUANTIZATION_MODES = ('none', 'dynamic', 'float16', 'int8')
+
+
+def load_interpreter_class():
+    """Prefer a standalone interpreter package, falling back to full TensorFlow"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """Keras-compatible ``predict`` over a TFLite flat-buffer model
+
+    Handles int8-quantized inputs and outputs by applying the tensor's
+    scale and zero point, so callers always pass and receive float32.
+    The interpreter is not thread-safe, so calls are serialized.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        Interpreter = load_interpreter_class()
+        self.model_path = str(model_path)
+        self.interpreter = Interpreter(model_path=self.model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        """Input shape in Keras form, with a None batch dimension"""
+        return (None,) + tuple(int(dim) for dim in self._input['shape'][1:])
+
+    def _quantize(self, batch):
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, output):
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self._output['quantization']
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch, verbose=0):
+        """Run inference on a (batch, height, width, channels) array"""
+        batch = np.asarray(batch)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input['index'], [len(batch)] + list(batch.shape[1:]))
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self._input['index'], self._quantize(batch))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self._output['index'])).copy()
+
+
+def convert_keras_model(model, quantization='none', representative_samples=None):
+    """Convert a Keras model to a TFLite flat buffer
+
+    ``dynamic`` quantizes weights to int8, ``float16`` stores weights as
+    float16, and ``int8`` quantizes weights and activations using the
+    representative samples for calibration.
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {quantization}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    if quantization == 'int8':
+        if representative_samples is None or len(representative_samples) == 0:
+            raise ValueError("int8 quantization needs representative samples")
+
+        def representative_dataset():
+            for sample in representative_samples:
+                yield [np.expand_dims(sample, 0).astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+    return converter.convert()
+
+
+def parity_check(reference_model, candidate_model, samples, batch_size=16):
+    """Compare top-1 agreement and output drift between two models on a sample set"""
+    reference_top, candidate_top, max_diff = [], [], 0.0
+    for start in range(0, len(samples), batch_size):
+        batch = samples[start:start + batch_size]
+        reference = np.asarray(reference_model.predict(batch, verbose=0))
+        candidate = np.asarray(candidate_model.predict(batch, verbose=0))
+        reference_top.append(reference.argmax(axis=1))
+        candidate_top.append(candidate.argmax(axis=1))
+        max_diff = max(max_diff, float(np.abs(reference - candidate).max()))
+
+    reference_top = np.concatenate(reference_top)
+    candidate_top = np.concatenate(candidate_top)
+    agreement = float(np.mean(reference_top == candidate_top))
+    logging.info(f"TFLite parity: {agreement:.2%} top-1 agreement, max output difference {max_diff:.4g}")
+    return {"samples": len(samples), "top1_agreement": agreement, "max_abs_diff": max_diff}
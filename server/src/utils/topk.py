@@ -0,0 +1,64 @@
+"""
+Top-k classes and confidence from one forward pass
+"""
+import numpy as np
+
+
+def as_probabilities(scores):
+    """Return class scores as probabilities
+
+    Rows that already form a distribution (a softmax output layer or
+    ``predict_proba``) are returned unchanged; other rows are treated as
+    logits and passed through a softmax.
+    """
+    scores = np.atleast_2d(np.asarray(scores, dtype=np.float64))
+    if np.all(scores >= 0) and np.allclose(scores.sum(axis=1), 1.0, atol=1e-3):
+        return scores
+    shifted = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+def calibrate(probabilities, temperature=1.0):
+    """Temperature-scale probabilities; a temperature above 1 softens overconfident models"""
+    if temperature == 1.0:
+        return probabilities
+    logits = np.log(np.clip(probabilities, 1e-12, 1.0)) / temperature
+    return as_probabilities(logits - logits.max(axis=1, keepdims=True))
+
+
+def top_k(probabilities, k):
+    """Indices and probabilities of the k most likely classes per row, best first
+
+    Ties keep the lower class index first, so the top entry always matches
+    ``argmax``.
+    """
+    probabilities = np.atleast_2d(probabilities)
+    k = max(1, min(int(k), probabilities.shape[1]))
+    indices = np.argsort(-probabilities, axis=1, kind='stable')[:, :k]
+    return indices, np.take_along_axis(probabilities, indices, axis=1)
+
+
+def confidence_label(probability, high=0.8, medium=0.5):
+    """Bucket a top-1 probability as High, Medium or Low"""
+    if probability >= high:
+        return "High"
+    return "Medium" if probability >= medium else "Low"
+
+
+def confidence_labels(probabilities, high=0.8, medium=0.5):
+    """Vectorised ``confidence_label`` for an array of top-1 probabilities"""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return np.select([probabilities >= high, probabilities >= medium], ["High", "Medium"], "Low").astype(object)
+
+
+def ranked_predictions(probabilities, labels, k, label_key='label', high=0.8, medium=0.5):
+    """Top-k labels with probabilities and a confidence label for each row of a batch"""
+    indices, values = top_k(probabilities, k)
+    return [
+        {
+            "confidence": confidence_label(row_values[0], high, medium),
+            "confidence_score": row_values[0],
+            "top_k": [{label_key: labels[i], "probability": p} for i, p in zip(row_indices, row_values)]
+        }
+        for row_indices, row_values in zip(indices.tolist(), values.tolist())
+    ]
@@ -0,0 +1,136 @@
+"""
+Compiled yield prediction engine
+"""
+import numpy as np
+
+# Raw yield input columns, in the order the preprocessor expects them
+YIELD_NUMERIC_FIELDS = ('Year', 'average_rain_fall_mm_per_year', 'pesticides_tonnes', 'avg_temp')
+YIELD_CATEGORICAL_FIELDS = ('Area', 'Item')
+
+
+class CompiledYieldModel:
+    """Array-based evaluator for the yield preprocessor + DecisionTreeRegressor
+
+    The fitted tree is flattened into contiguous node arrays and the
+    ColumnTransformer (StandardScaler on the numeric columns, first-dropped
+    OneHotEncoder on Area/Item) is reduced to a mean/scale pair and a
+    category -> output column map. Rows are never materialised as the
+    113-wide one-hot matrix: a one-hot feature is 1 exactly when it is the
+    row's encoded Area or Item column. Inputs are compared as float32, as
+    sklearn does, so predictions are identical to the sklearn path.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, mean, scale, category_columns):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.category_columns = category_columns
+        self.n_numeric = len(self.mean)
+        self._node_lists = None
+
+    @classmethod
+    def from_sklearn(cls, preprocessor, model):
+        """Compile a fitted ColumnTransformer and DecisionTreeRegressor"""
+        scaler = preprocessor.named_transformers_['StandardScale']
+        encoder = preprocessor.named_transformers_['OneHotEncode']
+        offset = preprocessor.output_indices_['OneHotEncode'].start
+
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_)
+        scale = scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_)
+
+        category_columns = []
+        drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(encoder.categories_)
+        for categories, dropped in zip(encoder.categories_, drop_idx):
+            columns = {}
+            for i, category in enumerate(categories):
+                if dropped is not None and i == dropped:
+                    columns[category] = -1
+                else:
+                    columns[category] = offset
+                    offset += 1
+            category_columns.append(columns)
+
+        tree = model.tree_
+        return cls(
+            tree.feature, tree.threshold, tree.children_left, tree.children_right,
+            tree.value[:, 0, 0], mean, scale, category_columns
+        )
+
+    def encode_categories(self, areas, items):
+        """Map Area/Item values to one-hot output columns (-1 for the dropped category)
+
+        Raises ValueError for unknown categories, like the OneHotEncoder.
+        """
+        encoded = []
+        for field, columns, values in zip(YIELD_CATEGORICAL_FIELDS, self.category_columns, (areas, items)):
+            try:
+                encoded.append(np.fromiter((columns[v] for v in values), dtype=np.intp, count=len(values)))
+            except KeyError as e:
+                raise ValueError(f"Found unknown category {e.args[0]!r} in column {field}") from None
+        return encoded
+
+    def scale_numeric(self, numeric):
+        """Standard-scale the numeric columns and cast to float32 like the tree does"""
+        numeric = np.asarray(numeric, dtype=np.float64).reshape(-1, self.n_numeric)
+        return ((numeric - self.mean) / self.scale).astype(np.float32)
+
+    def predict_encoded(self, scaled, area_columns, item_columns):
+        """Evaluate the tree for pre-scaled numeric rows and encoded category columns"""
+        n_rows = len(scaled)
+        numeric = scaled.astype(np.float64)
+        node = np.zeros(n_rows, dtype=np.intp)
+        rows = np.arange(n_rows)
+
+        while rows.size:
+            nodes = node[rows]
+            internal = self.left[nodes] != -1
+            rows, nodes = rows[internal], nodes[internal]
+            if not rows.size:
+                break
+
+            features = self.feature[nodes]
+            is_numeric = features < self.n_numeric
+            x = np.where(
+                is_numeric,
+                numeric[rows, np.minimum(features, self.n_numeric - 1)],
+                (features == area_columns[rows]) | (features == item_columns[rows])
+            )
+            node[rows] = np.where(x <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+
+        return self.value[node]
+
+    def predict(self, numeric, areas, items):
+        """Predict yields for many rows
+
+        ``numeric`` is an (n, 4) array of Year, rainfall, pesticides and
+        average temperature; ``areas`` and ``items`` are sequences of labels.
+        """
+        area_columns, item_columns = self.encode_categories(areas, items)
+        return self.predict_encoded(self.scale_numeric(numeric), area_columns, item_columns)
+
+    def predict_one(self, year, rainfall, pesticides, avg_temp, area, item):
+        """Predict a single row with a plain Python traversal"""
+        if self._node_lists is None:
+            self._node_lists = (
+                self.feature.tolist(), self.threshold.tolist(),
+                self.left.tolist(), self.right.tolist()
+            )
+        feature, threshold, left, right = self._node_lists
+
+        area_column, item_column = (column[0] for column in self.encode_categories([area], [item]))
+        x = self.scale_numeric([year, rainfall, pesticides, avg_temp])[0].tolist()
+        n_numeric = self.n_numeric
+
+        node = 0
+        while left[node] != -1:
+            f = feature[node]
+            if f < n_numeric:
+                value = x[f]
+            else:
+                value = 1.0 if f == area_column or f == item_column else 0.0
+            node = left[node] if value <= threshold[node] else right[node]
+        return float(self.value[node])
@@ -0,0 +1,142 @@
+"""
+Scenario grids for yield sweeps
+"""
+import itertools
+import math
+
+import numpy as np
+
+from src.utils.yield_engine import YIELD_NUMERIC_FIELDS, YIELD_CATEGORICAL_FIELDS
+
+YIELD_FIELDS = YIELD_NUMERIC_FIELDS + YIELD_CATEGORICAL_FIELDS
+
+
+class GridTooLarge(ValueError):
+    """Raised before any axis is built when a grid would exceed its point limit"""
+
+    def __init__(self, size, max_points):
+        super().__init__(f"Grid too large: {size} points (max {max_points})")
+        self.size = size
+        self.max_points = max_points
+
+
+def range_number(field, value):
+    """A finite float from a range spec entry"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value in range for {field}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid value in range for {field}")
+    return number
+
+
+def axis_length(field, spec):
+    """Number of values a range spec expands to, computed without building them
+
+    A spec is a list of values, ``{"start", "stop", "num"}`` for evenly
+    spaced points or ``{"start", "stop", "step"}`` for a stepped range;
+    both include ``stop``.
+    """
+    if isinstance(spec, list):
+        length = len(spec)
+    elif isinstance(spec, dict) and {'start', 'stop'} <= spec.keys():
+        start, stop = range_number(field, spec['start']), range_number(field, spec['stop'])
+        if 'num' in spec:
+            length = int(range_number(field, spec['num']))
+        elif 'step' in spec:
+            step = range_number(field, spec['step'])
+            if step <= 0 or stop < start:
+                raise ValueError(f"Invalid range for {field}: step must be positive and stop >= start")
+            # Same length np.arange(start, stop + step / 2, step) produces
+            length = math.ceil((stop + step / 2 - start) / step)
+        else:
+            raise ValueError(f"Range for {field} needs 'num' or 'step'")
+    else:
+        raise ValueError(f"Invalid range for {field}: expected a list or start/stop with num or step")
+
+    if length <= 0:
+        raise ValueError(f"Range for {field} is empty")
+    return length
+
+
+def axis_values(field, spec, bounds=None):
+    """Expand a range spec into the values swept for one field
+
+    ``bounds`` is an optional input schema Field whose limits every
+    numeric value must respect. Call ``axis_length`` first to bound the
+    size of what this allocates.
+    """
+    axis_length(field, spec)
+    if isinstance(spec, list):
+        values = spec
+    elif 'num' in spec:
+        values = np.linspace(float(spec['start']), float(spec['stop']), int(float(spec['num'])))
+    else:
+        start, step = float(spec['start']), float(spec['step'])
+        values = np.arange(start, float(spec['stop']) + step / 2, step)
+
+    if field in YIELD_CATEGORICAL_FIELDS:
+        return [str(value) for value in values]
+    try:
+        values = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value in range for {field}") from None
+    if not np.isfinite(values).all():
+        raise ValueError(f"Invalid value in range for {field}")
+    if field == 'Year' and (values != np.round(values)).any():
+        raise ValueError("Year values must be whole numbers")
+    if bounds is not None and (values.min() < bounds.minimum or values.max() > bounds.maximum):
+        raise ValueError(bounds.range_message())
+    return values
+
+
+class ScenarioGrid:
+    """Cartesian grid of yield inputs around a base record
+
+    Fields without a range keep the base value. The numeric grid is built
+    once and reused for every Area x Item pair, so scoring only needs one
+    category encoding per pair instead of one per point.
+
+    The grid size is computed from the specs before any axis is built, and
+    GridTooLarge is raised when it exceeds ``max_points``. ``fields`` maps
+    field names to the input schema Fields whose bounds the values must
+    respect.
+    """
+
+    def __init__(self, base, ranges=None, max_points=None, fields=None):
+        ranges = ranges or {}
+        fields = fields or {}
+        unknown = set(ranges) - set(YIELD_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown range fields: {', '.join(sorted(unknown))}")
+
+        specs = {}
+        for field in YIELD_FIELDS:
+            if field in ranges:
+                specs[field] = ranges[field]
+            elif field in base:
+                specs[field] = [base[field]]
+            else:
+                raise ValueError(f"Missing required field: {field}")
+
+        lengths = {field: axis_length(field, spec) for field, spec in specs.items()}
+        # Python ints, so a huge product cannot overflow
+        self.numeric_points = math.prod(lengths[field] for field in YIELD_NUMERIC_FIELDS)
+        self.category_pairs = lengths['Area'] * lengths['Item']
+        if max_points is not None and self.size > max_points:
+            raise GridTooLarge(self.size, max_points)
+
+        self.axes = {field: axis_values(field, spec, fields.get(field)) for field, spec in specs.items()}
+
+    @property
+    def size(self):
+        return self.numeric_points * self.category_pairs
+
+    def numeric_grid(self):
+        """(numeric_points, 4) array of every numeric combination, last field varying fastest"""
+        mesh = np.meshgrid(*(self.axes[field] for field in YIELD_NUMERIC_FIELDS), indexing='ij')
+        return np.stack([axis.ravel() for axis in mesh], axis=1)
+
+    def pairs(self):
+        return itertools.product(self.axes['Area'], self.axes['Item'])
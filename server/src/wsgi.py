@@ -0,0 +1,27 @@
+"""
+WSGI entry point for production servers
+
+Models in PRELOAD_MODEL_GROUPS are loaded at import time. With gunicorn's
+preload_app (see gunicorn.conf.py) that happens once in the master, and
+the forked workers share those pages copy-on-write.
+"""
+import logging
+from pathlib import Path
+import sys
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import PRELOAD_MODEL_GROUPS
+from src.utils.model_loader import ModelLoader, MODEL_GROUPS
+from src.app import create_app
+
+model_loader = ModelLoader(mode='lazy')
+for group in PRELOAD_MODEL_GROUPS:
+    if group not in MODEL_GROUPS:
+        raise ValueError(f"Unknown model group in PRELOAD_MODEL_GROUPS: {group}")
+    model_loader.ensure_loaded(group)
+
+app = create_app(model_loader)
+logging.info(f"Preloaded model groups: {model_loader.get_model_readiness()}")
@@ -0,0 +1,22 @@
+"""
+Shared test fixtures
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import src.api.jobs as jobs
+import src.app as app
+
+@pytest.fixture(autouse=True)
+def runtime_dirs(tmp_path, monkeypatch):
+    """Keep the job store, uploads and log file that create_app() writes out of the source tree"""
+    monkeypatch.setattr(jobs, 'JOBS_DIR', tmp_path / 'jobs')
+    monkeypatch.setattr(app, 'LOGS_DIR', tmp_path / 'logs')
+    monkeypatch.setattr(app, 'LOG_FILE', tmp_path / 'logs' / 'api.log')
+    return tmp_path
@@ -40,4 +40,247 @@ def test_crop_prediction_missing_data(client):
     response = client.post('/predict-crop')
     assert response.status_code == 400
     data = response.get_json()
-    assert 'error' in data
\ No newline at end of file
+    assert 'error' in data
+
+def test_crop_batch_prediction_reports_row_errors(client):
+    """Test batch crop prediction returns per-row results and errors"""
+    sample = {'Nitrogen': 90, 'Phosporus': 42, 'Potassium': 43, 'Temperature': 20.87,
+              'Humidity': 82.0, 'pH': 6.5, 'Rainfall': 202.93}
+    rows = [sample, {**sample, 'pH': 'acidic'}, {k: v for k, v in sample.items() if k != 'Rainfall'}]
+    response = client.post('/predict-crop/batch', json={'samples': rows})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total'] == 3
+    assert data['succeeded'] == 1
+    assert 'prediction' in data['results'][0]
+    assert 'pH' in data['results'][1]['error']
+    assert 'Rainfall' in data['results'][2]['error']
+
+    single = client.post('/predict-crop', data=sample).get_json()
+    assert data['results'][0]['prediction'] == single['prediction']
+    assert data['results'][0]['top_k'] == single['top_k']
+
+def test_crop_prediction_reports_top_k_probabilities(client):
+    """Test crop predictions carry ranked probabilities from predict_proba"""
+    sample = {'Nitrogen': 90, 'Phosporus': 42, 'Potassium': 43, 'Temperature': 20.87,
+              'Humidity': 82.0, 'pH': 6.5, 'Rainfall': 202.93}
+    data = client.post('/predict-crop?top_k=5', data=sample).get_json()
+    probabilities = [entry['probability'] for entry in data['top_k']]
+    assert len(probabilities) == 5
+    assert probabilities == sorted(probabilities, reverse=True)
+    assert data['top_k'][0]['crop'] == data['prediction']
+    assert data['confidence'] in ('High', 'Medium', 'Low')
+    assert data['confidence_score'] == probabilities[0]
+
+    assert client.post('/predict-crop?top_k=0', data=sample).status_code == 400
+
+
+def test_crop_batch_prediction_accepts_csv(client):
+    """Test batch crop prediction from a CSV body"""
+    body = "Nitrogen,Phosporus,Potassium,Temperature,Humidity,pH,Rainfall\n90,42,43,20.87,82,6.5,202.93\n"
+    response = client.post('/predict-crop/batch', data=body, content_type='text/csv')
+    assert response.status_code == 200
+    assert response.get_json()['succeeded'] == 1
+
+
+def test_crop_batch_row_limit_applies_before_parsing(client, monkeypatch):
+    """Test batches over CROP_BATCH_MAX_ROWS get 413 from JSON and CSV bodies"""
+    import src.api.routes as routes
+
+    monkeypatch.setattr(routes, 'CROP_BATCH_MAX_ROWS', 2)
+    header = "Nitrogen,Phosporus,Potassium,Temperature,Humidity,pH,Rainfall\n"
+    row = "90,42,43,20.87,82,6.5,202.93\n"
+    response = client.post('/predict-crop/batch', data=header + row * 5, content_type='text/csv')
+    assert response.status_code == 413
+    response = client.post('/predict-crop/batch', json={'Nitrogen': [90] * 3, 'pH': [6.5] * 3})
+    assert response.status_code == 413
+    assert client.post('/predict-crop/batch', data=header + row * 2, content_type='text/csv').status_code == 200
+
+
+def test_fertilizer_recommendation(client):
+    """Test fertilizer recommendation for a known crop"""
+    response = client.post('/predict-fertilizer', data={
+        'cropname': 'rice', 'nitrogen': 50, 'phosphorous': 40, 'pottasium': 40
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['primary_deficiency'] == 'N'
+    assert data['nutrient_analysis']['N_diff'] == 30
+
+    response = client.post('/predict-fertilizer', data={
+        'cropname': 'rice', 'nitrogen': 'lots', 'phosphorous': -4, 'pottasium': 40
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error'] == (
+        "Invalid value for field: nitrogen; Value out of range for field: phosphorous (expected 0 to 1000)"
+    )
+
+def test_single_predictions_accept_json_bodies(client):
+    """Test JSON bodies are parsed like form fields"""
+    sample = {'Nitrogen': 90, 'Phosporus': 42, 'Potassium': 43, 'Temperature': 20.87,
+              'Humidity': 82.0, 'pH': 6.5, 'Rainfall': 202.93}
+    assert client.post('/predict-crop', json=sample).get_json() == client.post('/predict-crop', data=sample).get_json()
+
+    response = client.post('/predict-crop', json={**sample, 'pH': 'acidic'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Invalid value for field: pH"
+
+
+def test_repeated_crop_prediction_hits_cache(client):
+    """Test identical crop requests are served from the prediction cache"""
+    sample = {'Nitrogen': 90, 'Phosporus': 42, 'Potassium': 43, 'Temperature': 20.87,
+              'Humidity': 82.0, 'pH': 6.5, 'Rainfall': 202.93}
+    first = client.post('/predict-crop', data=sample).get_json()
+    second = client.post('/predict-crop', data=sample).get_json()
+    assert first == second
+
+    cache_stats = client.get('/health').get_json()['prediction_cache']
+    assert cache_stats['namespaces']['crop']['hits'] >= 1
+
+YIELD_SAMPLE = {
+    "Year": "2000", "average_rain_fall_mm_per_year": "1485", "pesticides_tonnes": "121",
+    "avg_temp": "16.37", "Area": "Albania", "Item": "Maize"
+}
+
+def test_yield_batch_matches_single_prediction(client):
+    """Test batch yield rows match /predict-yield and bad rows get errors"""
+    single = client.post('/predict-yield', data=YIELD_SAMPLE).get_json()['prediction']
+
+    response = client.post('/predict-yield/batch', json=[YIELD_SAMPLE, {**YIELD_SAMPLE, "Area": "Atlantis"}])
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['results'][0] == {"row": 0, "prediction": single}
+    assert data['results'][1]['error'] == "Unknown Area: Atlantis"
+
+    columns = {field: [value, value] for field, value in YIELD_SAMPLE.items()}
+    response = client.post('/predict-yield/batch', json=columns)
+    assert [row['prediction'] for row in response.get_json()['results']] == [single, single]
+    assert data['model_version'] == client.get('/models').get_json()['yield']['loaded']
+
+def test_field_report_combines_sections_and_keeps_partial_results(client):
+    """Test /field-report matches the single-model endpoints and reports failed sections alongside"""
+    crop_sample = {'Nitrogen': 90, 'Phosporus': 42, 'Potassium': 43, 'Temperature': 20.87,
+                   'Humidity': 82.0, 'pH': 6.5, 'Rainfall': 202.93}
+    response = client.post('/field-report', data={**crop_sample, **YIELD_SAMPLE})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['partial'] is False
+    assert data['sections'] == ['crop', 'fertilizer', 'yield']
+
+    crop = client.post('/predict-crop', data=crop_sample).get_json()
+    assert data['crop']['prediction'] == crop['prediction']
+    assert data['fertilizer']['crop'] == crop['prediction']
+    assert data['fertilizer']['nutrient_analysis']['current_N'] == 90
+    assert data['yield']['prediction'] == client.post('/predict-yield', data=YIELD_SAMPLE).get_json()['prediction']
+
+    response = client.post('/field-report', data={
+        **crop_sample, 'pH': 'acidic', 'cropname': 'rice', **YIELD_SAMPLE, 'Area': 'Atlantis'
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['partial'] is True
+    assert data['fertilizer']['crop'] == 'rice'
+    assert data['errors']['crop'] == {"error": "Invalid value for field: pH", "status": 400}
+    assert data['errors']['yield'] == {"error": "Unknown Area: Atlantis", "status": 400}
+
+    response = client.post('/field-report', data={'Temperature': 20})
+    assert response.status_code == 400
+    assert 'Missing required field: Nitrogen' in response.get_json()['errors']['crop']['error']
+    assert client.post('/field-report', data={}).status_code == 400
+
+class StubDiseaseModel:
+    """Stand-in disease model, so upload checks run without TensorFlow"""
+    input_shape = (None, 128, 128, 3)
+
+    def predict(self, batch, verbose=0):
+        import numpy as np
+        return np.full((len(batch), 38), 1 / 38, dtype=np.float32)
+
+def disease_client(model):
+    """Test client whose disease group loads ``model``, or fails to load when it is None"""
+    from src.utils.model_loader import ModelLoader
+
+    def load(models, paths):
+        models['disease_model'] = model
+        models['disease_classes'] = None
+        return model is not None
+
+    loader = ModelLoader(mode='lazy')
+    loader._loaders['disease'] = load
+    return create_app(loader).test_client()
+
+def test_disease_without_model_is_unavailable():
+    """Test /predict-disease answers 503 JSON when the disease model failed to load"""
+    import io
+
+    client = disease_client(None)
+    response = client.post('/predict-disease', data={'image': (io.BytesIO(b'plain text'), 'leaf.jpg')})
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Disease detection model not available"}
+
+def test_disease_upload_limits():
+    """Test oversized bodies get 413 and non-images are refused from their header"""
+    import io
+
+    client = disease_client(StubDiseaseModel())
+    limit = client.application.config['MAX_CONTENT_LENGTH']
+    response = client.post('/predict-disease', data={'image': (io.BytesIO(b'0' * (limit + 1)), 'leaf.jpg')})
+    assert response.status_code == 413
+
+    response = client.post('/predict-disease', data={'image': (io.BytesIO(b'plain text'), 'leaf.jpg')})
+    assert response.status_code == 400
+    assert 'Unsupported image format' in response.get_json()['error']
+
+def test_model_reload_requires_admin_token(client):
+    """Test /models/reload is refused without a configured, matching admin token"""
+    response = client.post('/models/reload', json={'group': 'crop'})
+    assert response.status_code == 403
+
+def test_yield_grid_streams_every_point(client):
+    """Test a scenario grid streams one prediction per grid point"""
+    import json
+
+    spec = {
+        "base": YIELD_SAMPLE,
+        "ranges": {
+            "avg_temp": {"start": 10, "stop": 20, "step": 5},
+            "average_rain_fall_mm_per_year": {"start": 500, "stop": 1500, "num": 4},
+            "Item": ["Maize", "Potatoes"]
+        }
+    }
+    response = client.post('/predict-yield/grid', json=spec)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == int(response.headers['X-Grid-Points']) == 24
+
+    single = client.post('/predict-yield', data={**YIELD_SAMPLE, "avg_temp": "15",
+                                                 "average_rain_fall_mm_per_year": "500"}).get_json()
+    match = next(row for row in rows if row['Item'] == 'Maize' and row['avg_temp'] == 15.0
+                 and row['average_rain_fall_mm_per_year'] == 500.0)
+    assert match['prediction'] == single['prediction']
+
+    csv_response = client.post('/predict-yield/grid?format=csv', json=spec)
+    assert len(csv_response.get_data(as_text=True).splitlines()) == 25
+
+def test_yield_grid_rejects_bad_specs(client):
+    """Test invalid scenario grids fail before streaming"""
+    assert client.post('/predict-yield/grid', json={"base": {}}).status_code == 400
+    response = client.post('/predict-yield/grid', json={"base": YIELD_SAMPLE, "ranges": {"Area": ["Atlantis"]}})
+    assert response.status_code == 400
+    response = client.post('/predict-yield/grid', json={"base": YIELD_SAMPLE, "ranges": {"rain": [1]}})
+    assert response.status_code == 400
+    response = client.post('/predict-yield/grid', json={
+        "base": YIELD_SAMPLE, "ranges": {"avg_temp": {"start": 0, "stop": 1, "num": 10 ** 10}}
+    })
+    assert response.status_code == 413
+    response = client.post('/predict-yield/grid', json={
+        "base": YIELD_SAMPLE, "ranges": {"average_rain_fall_mm_per_year": {"start": 0, "stop": 1000, "step": 1e-9}}
+    })
+    assert response.status_code == 413
+    response = client.post('/predict-yield/grid', json={
+        "base": YIELD_SAMPLE, "ranges": {"average_rain_fall_mm_per_year": {"start": -100, "stop": 100, "num": 3}}
+    })
+    assert response.status_code == 400
+    response = client.post('/predict-yield/grid', json={"base": YIELD_SAMPLE, "ranges": {"Year": [1800, 2000]}})
+    assert response.status_code == 400
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Crop lookup index tests
+"""
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import CROP_MODEL_PATH, CROP_SCALER_PATH
+from src.api.routes import crop_probabilities
+from src.utils.crop_index import CropLookupIndex, sample_inputs
+
+def load_models():
+    return joblib.load(CROP_MODEL_PATH), joblib.load(CROP_SCALER_PATH)
+
+def test_exact_mode_agrees_with_model_and_falls_back():
+    """Test exact lookups match the model where answered and the rest fall back to it"""
+    model, scaler = load_models()
+    index = CropLookupIndex.build(model, scaler, 'v1', n_points=50000, seed=0)
+    agreement = index.metadata['agreement']
+    assert agreement['exact']['agreement'] >= agreement['nearest']['agreement']
+    assert agreement['exact']['agreement'] > 0.98
+    assert agreement['nearest']['answered'] > 0.98
+
+    features = sample_inputs(model, scaler, 2000, np.random.default_rng(7))
+    expected = model.predict_proba(scaler.transform(features)).argmax(axis=1)
+    _, hits = index.lookup(features, 'exact')
+    assert 0 < hits.sum() < len(hits)
+
+    combined = crop_probabilities(features, scaler, model, index).argmax(axis=1)
+    assert np.array_equal(combined[~hits], expected[~hits])
+    assert (combined == expected).mean() > 0.98
+
+def test_index_for_other_model_files_is_ignored(tmp_path):
+    """Test an index built for different model files is not loaded"""
+    model, scaler = load_models()
+    index = CropLookupIndex.build(model, scaler, 'v1', n_points=2000)
+    index.save(tmp_path / 'crop_index.joblib')
+    assert CropLookupIndex.load(tmp_path / 'crop_index.joblib', 'v1') is not None
+    assert CropLookupIndex.load(tmp_path / 'crop_index.joblib', 'v2') is None
+
+def test_loader_serves_index_published_with_a_version(tmp_path):
+    """Test an index published alongside a crop version is loaded with it"""
+    from src.utils.model_loader import ModelLoader, MODEL_FILES, file_fingerprint
+    from src.utils.model_registry import ModelRegistry
+
+    model, scaler = load_models()
+    index_path = tmp_path / 'crop_index.joblib'
+    CropLookupIndex.build(model, scaler, file_fingerprint(MODEL_FILES['crop']), n_points=2000).save(index_path)
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish('crop', list(MODEL_FILES['crop']) + [index_path], version='v1')
+
+    loader = ModelLoader(mode='lazy', registry=registry)
+    assert loader.get_model('crop_index') is not None
+
+def test_rows_outside_the_sampled_region_go_to_the_model():
+    """Test out-of-range rows and rows far from every point are never answered from the index"""
+    model, scaler = load_models()
+    index = CropLookupIndex.build(model, scaler, 'v1', n_points=20000, seed=0)
+    rng = np.random.default_rng(3)
+    features = np.vstack([
+        [[900, 42, 43, 20.9, 82.0, 6.5, 5000]],
+        rng.uniform([0, 0, 0, -60, 0, 0, 0], [1000, 1000, 1000, 60, 100, 14, 10000], (500, 7))
+    ])
+    for mode in ('nearest', 'exact'):
+        _, hits = index.lookup(features, mode)
+        assert not hits[0]
+        assert hits.mean() < 0.05
+
+    expected = model.predict_proba(scaler.transform(features)).argmax(axis=1)
+    combined = crop_probabilities(features, scaler, model, index).argmax(axis=1)
+    assert combined[0] == expected[0]
+    assert (combined == expected).mean() > 0.98
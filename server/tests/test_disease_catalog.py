@@ -0,0 +1,57 @@
+"""
+Disease catalog tests
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import DISEASE_CLASS_NAMES, DISEASE_CLASSES_PATH, PLANT_DISEASE_DATA_PATH
+from src.api.routes import load_disease_info
+from src.utils.disease_catalog import DiseaseCatalog
+
+def test_catalog_matches_json_scan():
+    """Test indexed lookups agree with the original per-request JSON scan"""
+    catalog = DiseaseCatalog(DISEASE_CLASS_NAMES, PLANT_DISEASE_DATA_PATH, DISEASE_CLASSES_PATH)
+    assert catalog.class_names == tuple(DISEASE_CLASS_NAMES)
+
+    for index, class_name in enumerate(DISEASE_CLASS_NAMES):
+        response = catalog.response_for(index)
+        info = load_disease_info(class_name)
+        assert response['prediction'] == class_name
+        assert response['total_classes'] == len(DISEASE_CLASS_NAMES)
+        assert response['cause'] == info['cause']
+        assert response['html'] == info.get('html', '')
+
+def test_catalog_reloads_on_change(tmp_path):
+    """Test the catalog is rebuilt when the info file changes"""
+    path = tmp_path / "diseases.json"
+    path.write_text(json.dumps([{"name": "Apple___healthy", "cause": "None", "cure": "None"}]))
+    catalog = DiseaseCatalog(['Apple___healthy'], path, check_interval=0)
+    assert catalog.response_for(0)['disease'] == 'Healthy Apple'
+    assert catalog.response_for(0)['cure'] == 'None'
+
+    path.write_text(json.dumps([{"name": "Apple___healthy", "cause": "None", "cure": "Keep watering"}]))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert catalog.response_for(0)['cure'] == 'Keep watering'
+
+def test_response_from_softmax_reports_top_k():
+    """Test a softmax vector yields the top class's catalog entry plus ranked candidates"""
+    import numpy as np
+    from src.api.routes import disease_ranking, disease_response
+
+    catalog = DiseaseCatalog(DISEASE_CLASS_NAMES, PLANT_DISEASE_DATA_PATH, DISEASE_CLASSES_PATH)
+    logits = np.zeros((1, len(DISEASE_CLASS_NAMES)))
+    logits[0, [29, 30]] = [5.0, 3.0]
+    response = disease_response(catalog, disease_ranking(logits, catalog.class_names, 3)[0])
+
+    assert response['class_index'] == 29
+    assert response['prediction'] == response['top_k'][0]['class'] == DISEASE_CLASS_NAMES[29]
+    assert response['top_k'][1]['disease'] == 'Late blight'
+    assert 0.5 < response['confidence_score'] < 0.8
+    assert response['confidence'] == 'Medium'
@@ -0,0 +1,46 @@
+"""
+Fertilizer knowledge base tests
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import FERTILIZER_DATA_PATH
+from src.utils.fertilizer_kb import FertilizerKnowledgeBase
+
+def test_batch_keys_match_single_lookup():
+    """Test the vectorized path agrees with per-sample recommendations, including ties"""
+    kb = FertilizerKnowledgeBase(FERTILIZER_DATA_PATH)
+    rng = np.random.default_rng(0)
+    crops = list(rng.choice(kb.crops(), size=200)) + ['rice', 'rice', 'not-a-crop']
+    N = list(rng.integers(0, 150, size=200)) + [80, 70, 10]
+    P = list(rng.integers(0, 150, size=200)) + [40, 50, 10]
+    K = list(rng.integers(0, 210, size=200)) + [40, 50, 10]
+
+    keys, primary, _ = kb.deficiency_keys(crops, N, P, K)
+    recommendations = [kb.recommend(c, int(n), int(p), int(k)) for c, n, p, k in zip(crops, N, P, K)]
+
+    for key, nutrient, result in zip(keys, primary, recommendations):
+        if result is None:
+            assert key is None
+        else:
+            assert nutrient == result['primary_deficiency']
+    assert primary[-3] == 'K' and primary[-2] == 'K'
+
+def test_reloads_when_file_changes(tmp_path):
+    """Test the CSV is re-read only after its mtime changes"""
+    path = tmp_path / "fertilizer.csv"
+    path.write_text(",Crop,N,P,K,pH,soil_moisture\n0,rice,80,40,40,5.5,30\n")
+    kb = FertilizerKnowledgeBase(path, check_interval=0)
+    assert kb.get('rice').N == 80
+
+    path.write_text(",Crop,N,P,K,pH,soil_moisture\n0,rice,90,40,40,5.5,30\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert kb.get('rice').N == 90
@@ -0,0 +1,109 @@
+"""
+Disease image cache tests
+"""
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.api.routes import model_prediction
+from src.utils.image_cache import ImageResultCache, perceptual_hash
+from src.utils.image_preprocessing import ImagePreprocessor, ImageRejected
+
+class CountingModel:
+    """Stand-in disease model that counts forward passes"""
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, batch, verbose=0):
+        self.calls += 1
+        scores = np.zeros((len(batch), 38), dtype=np.float32)
+        scores[:, 7] = 1.0
+        return scores
+
+class StubLoader:
+    def __init__(self, model):
+        self.model = model
+
+    def get_model(self, name):
+        return self.model if name == 'disease_model' else None
+
+    def get_model_version(self, name):
+        return 'v1'
+
+def encode(array, fmt):
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format=fmt, quality=95)
+    return buffer.getvalue()
+
+def test_repeated_upload_skips_model():
+    """Test identical uploads hit the content cache and skip the forward pass"""
+    model = CountingModel()
+    cache = ImageResultCache()
+    image = encode(np.random.default_rng(0).integers(0, 255, (64, 64, 3), dtype=np.uint8), 'PNG')
+
+    assert model_prediction(image, StubLoader(model), image_cache=cache) == 7
+    assert model_prediction(image, StubLoader(model), image_cache=cache) == 7
+    assert model.calls == 1
+    assert cache.get_stats()['content_hits'] == 1
+
+def test_perceptual_hash_matches_reencoded_copy():
+    """Test a re-encoded copy of a photo hits the perceptual cache"""
+    model = CountingModel()
+    cache = ImageResultCache(use_perceptual_hash=True)
+    gradient = np.linspace(0, 255, 256, dtype=np.uint8)
+    array = np.stack([np.tile(gradient, (256, 1)), np.tile(gradient[:, None], (1, 256)),
+                      np.full((256, 256), 90, dtype=np.uint8)], axis=-1)
+
+    model_prediction(encode(array, 'PNG'), StubLoader(model), image_cache=cache)
+    model_prediction(encode(array, 'JPEG'), StubLoader(model), image_cache=cache)
+    assert model.calls == 1
+    assert cache.get_stats()['perceptual_hits'] == 1
+
+def test_stream_upload_matches_bytes_and_raw_pixels():
+    """Test a spooled upload stream and raw pixels score like the encoded bytes"""
+    model = CountingModel()
+    cache = ImageResultCache()
+    array = np.random.default_rng(1).integers(0, 255, (128, 128, 3), dtype=np.uint8)
+    stream = io.BytesIO(encode(array, 'PNG'))
+
+    assert model_prediction(stream, StubLoader(model), image_cache=cache) == 7
+    assert model_prediction(stream.getvalue(), StubLoader(model), image_cache=cache) == 7
+    assert model.calls == 1
+
+    raw = np.empty((128, 128, 3), dtype=np.float32)
+    ImagePreprocessor().decode_raw(array.tobytes(), out=raw)
+    np.testing.assert_array_equal(raw, ImagePreprocessor().decode(stream))
+    assert model_prediction(io.BytesIO(array.tobytes()), StubLoader(model), raw=True) == 7
+
+def test_rejects_bad_uploads_before_decoding():
+    """Test unsupported formats, oversized images and short raw uploads are refused"""
+    model = CountingModel()
+    large = encode(np.zeros((200, 200, 3), dtype=np.uint8), 'PNG')
+    for upload, kwargs in ((b'not an image', {}), (large, {}), (b'\x00' * 100, {'raw': True})):
+        with pytest.raises(ImageRejected):
+            model_prediction(io.BytesIO(upload), StubLoader(model),
+                             preprocessor=ImagePreprocessor(max_pixels=128 * 128), **kwargs)
+    assert model.calls == 0
+
+def test_memory_cap_evicts_oldest():
+    """Test the byte budget evicts least recently used entries"""
+    cache = ImageResultCache(max_bytes=2000)
+    for i in range(100):
+        cache.put(f"hash-{i}", 'v1', i)
+    stats = cache.get_stats()
+    assert stats['bytes'] <= 2000
+    assert stats['evictions'] > 0
+    assert cache.get_by_content('hash-99', 'v1') == 99
+    assert cache.get_by_content('hash-0', 'v1') is None
+
+def test_perceptual_hash_is_64_bit_hex():
+    """Test the perceptual hash is a 16-digit hex string"""
+    assert len(perceptual_hash(np.zeros((128, 128, 3)))) == 16
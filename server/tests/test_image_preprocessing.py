@@ -0,0 +1,59 @@
+"""
+Image preprocessing tests
+"""
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.image_preprocessing import ImagePreprocessor, IMAGE_SUFFIXES, model_input_shape
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "P"])
+def test_any_mode_becomes_model_shape(mode):
+    """Test every colour mode is converted to the requested RGB input shape"""
+    image = Image.new(mode, (300, 200))
+    output = ImagePreprocessor().decode(encode(image, 'PNG'), (161, 161, 3))
+    assert output.shape == (161, 161, 3)
+    assert output.dtype == np.float32
+
+@pytest.mark.parametrize("fmt, suffix", [("TIFF", ".tif"), ("GIF", ".gif"), ("WEBP", ".webp")])
+def test_job_image_suffixes_decode(fmt, suffix):
+    """Test formats picked up from job sources by file name are accepted by the decoder"""
+    assert suffix in IMAGE_SUFFIXES
+    output = ImagePreprocessor().decode(encode(Image.new('RGB', (64, 48)), fmt), (32, 32, 3))
+    assert output.shape == (32, 32, 3)
+
+def test_large_jpeg_draft_decode_matches_full_decode():
+    """Test reduced-size JPEG decoding stays close to a full decode and resize"""
+    gradient = np.linspace(0, 255, 2000, dtype=np.uint8)
+    array = np.stack([np.tile(gradient, (1500, 1)), np.tile(gradient[:1500, None], (1, 2000)),
+                      np.full((1500, 2000), 120, dtype=np.uint8)], axis=-1)
+    jpeg = encode(Image.fromarray(array), 'JPEG')
+
+    reference = np.asarray(Image.open(io.BytesIO(jpeg)).resize((128, 128)), dtype=np.float32)
+    output = ImagePreprocessor(decode_workers=1).preprocess(jpeg, (128, 128, 3))
+    assert np.abs(output - reference).mean() < 3.0
+
+def test_buffer_is_reused_per_thread():
+    """Test the same thread gets the same preallocated buffer back"""
+    preprocessor = ImagePreprocessor()
+    image = encode(Image.new('RGB', (64, 64)), 'PNG')
+    first = preprocessor.preprocess(image)
+    second = preprocessor.preprocess(image)
+    assert first is second
+
+def test_model_input_shape_falls_back_to_default():
+    """Test models without a usable input shape fall back to 128x128 RGB"""
+    assert model_input_shape(None) == (128, 128, 3)
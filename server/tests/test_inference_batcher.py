@@ -0,0 +1,52 @@
+"""
+Inference batcher tests
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.inference_batcher import InferenceBatcher
+
+def test_concurrent_requests_are_coalesced():
+    """Test concurrent submissions share forward passes and get their own rows"""
+    seen_sizes = []
+
+    def predict(batch):
+        seen_sizes.append(len(batch))
+        return batch.sum(axis=(1, 2))
+
+    batcher = InferenceBatcher(predict, max_batch_size=8, max_wait_ms=200)
+    results = {}
+    start = threading.Barrier(8)
+
+    def worker(i):
+        start.wait()
+        results[i] = batcher.predict(np.full((2, 2), i, dtype=np.float32), timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: 4.0 * i for i in range(8)}
+    assert len(seen_sizes) < 8
+    stats = batcher.get_stats()
+    assert stats['items'] == 8
+    assert stats['batches'] == len(seen_sizes)
+
+def test_errors_propagate_to_every_caller():
+    """Test a failing forward pass raises for the caller"""
+    def predict(batch):
+        raise RuntimeError("boom")
+
+    batcher = InferenceBatcher(predict, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.predict(np.zeros(3), timeout=5)
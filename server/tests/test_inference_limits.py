@@ -0,0 +1,108 @@
+"""
+Inference thread limit and compiled Keras backend tests
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.inference_limits import GuardedModel, guard_models
+
+class SlowModel:
+    """Records how many threads are inside predict at once"""
+
+    classes_ = ['a', 'b']
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def predict(self, X):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return np.zeros(len(X))
+
+def test_guarded_models_share_group_limit():
+    """Test a group's models admit at most the configured threads and forward other attributes"""
+    model, scaler = SlowModel(), SlowModel()
+    models = {'crop_model': model, 'crop_scaler': scaler, 'label_encoder': None}
+    guard_models(models, ('crop_model', 'crop_scaler', 'label_encoder'), 2, 'crop')
+    assert isinstance(models['crop_model'], GuardedModel)
+    assert models['label_encoder'] is None
+    assert models['crop_model'].classes_ == ['a', 'b']
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda i: models['crop_model' if i % 2 else 'crop_scaler'].predict([[i]]), range(16)))
+    assert model.peak + scaler.peak <= 4
+    assert max(model.peak, scaler.peak) <= 2
+
+    unguarded = {'crop_model': model}
+    guard_models(unguarded, ('crop_model',), 0, 'crop')
+    assert unguarded['crop_model'] is model
+
+def test_yield_engine_grid_calls_are_guarded():
+    """Test the compiled engine's scale/predict calls used by grid sweeps take the group's slots"""
+    engine = SlowModel()
+    engine.scale_numeric = engine.predict_encoded = engine.predict
+    models = {'yield_engine': engine}
+    guard_models(models, ('yield_engine',), 1, 'yield')
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda i: getattr(models['yield_engine'], ('scale_numeric', 'predict_encoded')[i % 2])([[i]]),
+                          range(8)))
+    assert engine.peak == 1
+
+@pytest.mark.parametrize("mode", ["function", "per_thread"])
+def test_keras_model_matches_predict(mode):
+    """Test the compiled forward pass returns Model.predict's outputs for any batch size"""
+    tf = pytest.importorskip("tensorflow")
+    from src.utils.keras_backend import KerasModel
+
+    tf.keras.utils.set_random_seed(0)
+    keras_model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(16, 16, 3)),
+        tf.keras.layers.Rescaling(1 / 255.0),
+        tf.keras.layers.Conv2D(4, 3, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(5, activation='softmax')
+    ])
+    model = KerasModel(keras_model, mode)
+    assert model.input_shape == (None, 16, 16, 3)
+
+    rng = np.random.default_rng(0)
+    for batch_size in (1, 3):
+        batch = rng.uniform(0, 255, (batch_size, 16, 16, 3)).astype(np.float32)
+        np.testing.assert_allclose(model.predict(batch), keras_model.predict(batch, verbose=0), rtol=1e-5, atol=1e-6)
+
+    batch = rng.uniform(0, 255, (2, 16, 16, 3)).astype(np.float32)
+    with ThreadPoolExecutor(3) as executor:
+        outputs = list(executor.map(lambda _: model.predict(batch), range(6)))
+    for output in outputs:
+        np.testing.assert_allclose(output, outputs[0], rtol=1e-5, atol=1e-6)
+
+def test_per_thread_execution_turns_off_disease_batching(monkeypatch):
+    """Test per_thread Keras execution runs disease requests without the single-thread batcher"""
+    import src.api.routes as routes
+    from src.app import create_app
+
+    def no_batcher(*args, **kwargs):
+        raise AssertionError("batcher created with per_thread execution")
+
+    monkeypatch.setattr(routes, 'DISEASE_BATCHING_ENABLED', True)
+    monkeypatch.setattr(routes, 'DISEASE_MODEL_BACKEND', 'keras')
+    monkeypatch.setattr(routes, 'DISEASE_KERAS_EXECUTION', 'per_thread')
+    monkeypatch.setattr(routes, 'InferenceBatcher', no_batcher)
+    create_app()
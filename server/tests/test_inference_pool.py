@@ -0,0 +1,43 @@
+"""
+Inference pool tests
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.inference_pool import InferencePool, Overloaded
+
+def test_full_pool_refuses_with_retry_after():
+    """Test calls beyond workers + queue are refused at once and counted"""
+    pool = InferencePool('disease', workers=1, max_queue=1)
+    release = threading.Event()
+    running = [pool.submit(release.wait, 5), pool.submit(release.wait, 5)]
+
+    with pytest.raises(Overloaded) as refused:
+        pool.submit(sum, [1, 2])
+    assert refused.value.retry_after >= 1
+    assert pool.get_stats()['rejected'] == 1
+
+    release.set()
+    assert all(future.result(timeout=5) for future in running)
+    assert pool.run(sum, [1, 2]) == 3
+    assert pool.get_stats()['pending'] == 0
+
+def test_stream_runs_chunks_on_the_pool():
+    """Test a streamed iterator is advanced on pool threads and yields every chunk"""
+    pool = InferencePool('yield', workers=1, max_queue=0)
+    threads = []
+
+    def chunks():
+        for i in range(3):
+            threads.append(threading.current_thread().name)
+            yield i
+
+    assert list(pool.stream(chunks())) == [0, 1, 2]
+    assert all(name.startswith('yield-inference') for name in threads)
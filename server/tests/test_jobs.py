@@ -0,0 +1,157 @@
+"""
+Bulk disease screening job tests
+"""
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.api.routes import disease_probabilities_batch
+from src.utils.job_store import JobStore
+from src.utils.job_worker import JobWorkerPool, list_job_images
+
+class BatchModel:
+    """Stand-in disease model that records batch sizes"""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch, verbose=0):
+        self.batch_sizes.append(len(batch))
+        scores = np.zeros((len(batch), 38), dtype=np.float32)
+        scores[:, 3] = 1.0
+        return scores
+
+class StubLoader:
+    def __init__(self, model):
+        self.model = model
+
+    def get_model(self, name):
+        return self.model if name == 'disease_model' else None
+
+def encode_png(seed):
+    buffer = io.BytesIO()
+    pixels = np.random.default_rng(seed).integers(0, 255, (32, 32, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def make_archive(path, count, broken=()):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for i in range(count):
+            archive.writestr(f"leaf_{i:03d}.png", b"not an image" if i in broken else encode_png(i))
+        archive.writestr("notes.txt", "ignored")
+    return str(path)
+
+def test_batch_prediction_reports_undecodable_images():
+    """Test one forward pass covers every decodable image and bad ones get errors"""
+    model = BatchModel()
+    scores, errors = disease_probabilities_batch([encode_png(0), b"junk", encode_png(1)], StubLoader(model))
+
+    assert model.batch_sizes == [2]
+    assert scores.argmax(axis=1).tolist() == [3, 3]
+    assert errors[0] is None and errors[2] is None
+    assert errors[1].startswith("Could not decode image")
+
+def test_job_runs_in_chunks_and_reports_progress(tmp_path):
+    """Test a worker processes a zip job in batches and records per-image results"""
+    source = make_archive(tmp_path / "images.zip", 5, broken={2})
+    store = JobStore(tmp_path / "jobs.sqlite")
+    chunks = []
+
+    def score(images):
+        chunks.append(len(images))
+        scores, errors = disease_probabilities_batch(images, StubLoader(BatchModel()))
+        indices = iter(scores.argmax(axis=1).tolist())
+        return [(None, e) if e else ({"predicted_class": next(indices)}, None) for e in errors]
+
+    names = list_job_images('zip', source)
+    assert names == [f"leaf_{i:03d}.png" for i in range(5)]
+    job_id = store.create_job('zip', source, len(names))
+
+    pool = JobWorkerPool(store, score, workers=0, batch_size=2)
+    assert pool.run_once('test') is True
+    assert pool.run_once('test') is False
+    assert chunks == [2, 2, 1]
+    assert not Path(source).exists()
+
+    job = store.get_job(job_id, limit=10)
+    assert job['status'] == 'completed'
+    assert job['progress'] == {"total": 5, "processed": 5, "failed": 1, "fraction": 1.0}
+    assert job['results'][0] == {"index": 0, "name": "leaf_000.png", "predicted_class": 3}
+    assert 'error' in job['results'][2]
+
+    page = store.get_job(job_id, offset=3, limit=1)
+    assert [item['index'] for item in page['results']] == [3]
+
+def test_reclaimed_job_resumes_from_recorded_items(tmp_path):
+    """Test a stale running job is reclaimed and only unfinished images are scored"""
+    source = make_archive(tmp_path / "images.zip", 4)
+    store = JobStore(tmp_path / "jobs.sqlite", stale_seconds=0)
+    job_id = store.create_job('zip', source, 4)
+
+    # A worker claimed the job and recorded two items before dying
+    assert store.claim_next_job('dead-worker')['id'] == job_id
+    store.record_items(job_id, [(0, "leaf_000.png", {"predicted_class": 1}, None),
+                                (1, "leaf_001.png", {"predicted_class": 1}, None)])
+
+    scored = []
+
+    def score(images):
+        scored.extend(images)
+        return [({"predicted_class": 2}, None) for _ in images]
+
+    pool = JobWorkerPool(store, score, workers=0, batch_size=8)
+    assert pool.run_once('test') is True
+    assert len(scored) == 2
+
+    job = store.get_job(job_id)
+    assert job['status'] == 'completed'
+    assert [item['predicted_class'] for item in job['results']] == [1, 1, 2, 2]
+
+def test_job_endpoints(tmp_path):
+    """Test archive upload queues a job and unknown jobs return 404"""
+    from src.app import create_app
+
+    app = create_app()
+    app.config['TESTING'] = True
+    client = app.test_client()
+
+    archive = make_archive(tmp_path / "upload.zip", 3)
+    with open(archive, 'rb') as handle:
+        response = client.post('/jobs', data={'archive': (handle, 'upload.zip')},
+                               content_type='multipart/form-data')
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['total'] == 3
+
+    status = client.get(job['status_url']).get_json()
+    assert status['job_id'] == job['job_id']
+    assert status['progress']['total'] == 3
+
+    assert client.get('/jobs/missing').status_code == 404
+    assert client.post('/jobs', data={'archive': (io.BytesIO(b"x"), 'upload.rar')},
+                       content_type='multipart/form-data').status_code == 400
+
+def test_rejected_archives_are_not_kept(tmp_path):
+    """Test unreadable, unsupported and image-less archives get 400 and leave no upload behind"""
+    from src.app import create_app
+
+    client = create_app().test_client()
+    uploads = tmp_path / "jobs" / "uploads"
+    empty = tmp_path / "empty.zip"
+    with zipfile.ZipFile(empty, 'w') as archive:
+        archive.writestr("notes.txt", "no images")
+
+    bodies = [(io.BytesIO(b"not a zip"), 'broken.zip'), (io.BytesIO(b"not a tar"), 'broken.tar.gz'),
+              (io.BytesIO(b"x"), 'leaf.jpg.gz'), (open(empty, 'rb'), 'empty.zip')]
+    for body, name in bodies:
+        with body:
+            response = client.post('/jobs', data={'archive': (body, name)}, content_type='multipart/form-data')
+        assert response.status_code == 400
+    assert not uploads.exists() or not any(uploads.iterdir())
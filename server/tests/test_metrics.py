@@ -0,0 +1,70 @@
+"""
+Metrics and structured logging tests
+"""
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.metrics import MetricsRegistry, NULL_METRIC
+from src.utils.structured_log import SampledLogger
+
+def test_histogram_renders_cumulative_buckets():
+    """Test histograms render cumulative buckets, sum and count per label set"""
+    registry = MetricsRegistry(namespace='test')
+    histogram = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage='decode')
+    registry.counter('requests_total', 'Requests', ('status',)).inc(status=200)
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="decode",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="decode",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{stage="decode",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{stage="decode"} 4' in text
+    assert 'test_requests_total{status="200"} 1' in text
+
+def test_disabled_registry_is_a_no_op():
+    """Test a disabled registry hands out no-op metrics and renders nothing"""
+    registry = MetricsRegistry(enabled=False)
+    histogram = registry.histogram('latency_seconds', 'Latency', ('stage',))
+    assert histogram is NULL_METRIC
+    with histogram.time(stage='decode'):
+        pass
+    registry.counter('requests_total', 'Requests').inc()
+    assert registry.render().strip() == ''
+
+def test_sampled_logger_suppresses_floods(caplog):
+    """Test repeated events are capped per window and the suppressed count is reported"""
+    logger = SampledLogger(logging.getLogger('test.sampled'), burst=2, window_seconds=3600.0)
+    with caplog.at_level(logging.ERROR, logger='test.sampled'):
+        for _ in range(5):
+            logger.error('prediction_failed', ValueError('bad input'), endpoint='/predict-crop')
+    assert len(caplog.records) == 2
+    record = json.loads(caplog.records[0].getMessage())
+    assert record == {"event": "prediction_failed", "error_type": "ValueError",
+                      "error": "bad input", "endpoint": "/predict-crop"}
+
+    # A new window logs again and reports what was dropped
+    logger.window = 0.0
+    with caplog.at_level(logging.ERROR, logger='test.sampled'):
+        logger.error('prediction_failed', ValueError('bad input'))
+    assert json.loads(caplog.records[-1].getMessage())['suppressed'] == 3
+
+def test_metrics_endpoint_reports_requests():
+    """Test /metrics exposes request latency and model readiness"""
+    from src.app import create_app
+
+    app = create_app()
+    client = app.test_client()
+    client.get('/health')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert 'agri_request_duration_seconds_count{endpoint="/health",method="GET",status="200"}' in text
+    assert 'agri_model_ready{group="crop"} 1' in text
@@ -0,0 +1,64 @@
+"""
+Model loader tests
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.model_loader import ModelLoader
+
+def test_lazy_mode_loads_groups_on_first_use():
+    """Test lazy mode only loads the group a model belongs to"""
+    loader = ModelLoader(mode='lazy')
+    assert set(loader.get_model_readiness().values()) == {'pending'}
+    assert loader.get_model_status()['crop_recommendation'] is False
+
+    assert loader.is_model_available('crop_model')
+    readiness = loader.get_model_readiness()
+    assert readiness['crop'] == 'ready'
+    assert readiness['disease'] == 'pending'
+    assert readiness['yield'] == 'pending'
+
+def test_background_mode_warms_all_groups():
+    """Test background warm-up reaches a final state for every group"""
+    loader = ModelLoader(mode='background')
+    for future in loader.warm_up():
+        future.result(timeout=120)
+    assert set(loader.get_model_readiness().values()) <= {'ready', 'failed'}
+    assert loader.get_model_status()['yield_prediction'] is True
+
+class SlowCopyDict(dict):
+    """Model dict whose copy is slow, widening the window between reading and replacing it"""
+
+    def __iter__(self):
+        return super().__iter__()
+
+    def keys(self):
+        time.sleep(0.05)
+        return super().keys()
+
+def stage(**models):
+    def load(staged, paths):
+        staged.update(models)
+        return True
+    return load
+
+def test_concurrent_group_loads_keep_each_others_models():
+    """Test two groups loaded from parallel threads both end up in the served models"""
+    loader = ModelLoader(mode='lazy')
+    loader.warm_group = lambda group, models: None
+    loader._loaders = {
+        'crop': stage(crop_model='crop', crop_scaler='scaler', crop_index=None),
+        'yield': stage(yield_model='yield', yield_preprocessor='preprocessor', yield_engine=None)
+    }
+    loader.models = SlowCopyDict()
+
+    with ThreadPoolExecutor(2) as executor:
+        assert all(executor.map(loader.ensure_loaded, ['crop', 'yield']))
+    assert loader.get_model('crop_model') is not None
+    assert loader.get_model('yield_model') is not None
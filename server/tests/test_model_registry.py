@@ -0,0 +1,71 @@
+"""
+Model registry and hot-swap tests
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.model_loader import ModelLoader, MODEL_FILES
+from src.utils.model_registry import ModelRegistry
+
+def test_publish_activate_and_resolve(tmp_path):
+    """Test versions are published whole, activated by name and resolved to their files"""
+    registry = ModelRegistry(tmp_path / 'registry')
+    assert registry.active_version('crop') is None
+    assert registry.resolve('crop', None, MODEL_FILES['crop']) == {path: path for path in MODEL_FILES['crop']}
+
+    registry.publish('crop', MODEL_FILES['crop'], version='v1')
+    registry.publish('crop', MODEL_FILES['crop'], version='v2')
+    assert registry.versions('crop') == ['v1', 'v2']
+    assert registry.active_version('crop') == 'v2'
+
+    registry.activate('crop', 'v1')
+    assert registry.active_version('crop') == 'v1'
+    resolved = registry.resolve('crop', 'v1', MODEL_FILES['crop'])
+    assert all(path.exists() and path.parent.name == 'v1' for path in resolved.values())
+
+def test_reload_swaps_in_new_version_and_keeps_old_on_failure(tmp_path):
+    """Test a reload swaps in the active version and a broken version never replaces a working one"""
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish('crop', MODEL_FILES['crop'], version='v1')
+    loader = ModelLoader(mode='lazy', registry=registry)
+    assert loader.is_model_available('crop_model')
+    assert loader.get_model_version('crop') == 'v1'
+    old_models = loader.models
+
+    registry.publish('crop', MODEL_FILES['crop'], version='v2', activate=True)
+    assert loader.reload('crop', wait=True)
+    assert loader.get_model_version('crop') == 'v2'
+    assert loader.models is not old_models
+    assert old_models['crop_model'] is not None
+
+    broken = tmp_path / 'broken'
+    broken.mkdir()
+    for path in MODEL_FILES['crop']:
+        (broken / Path(path).name).write_bytes(b'not a model')
+    registry.publish('crop', sorted(broken.iterdir()), version='v3', activate=True)
+    serving = loader.get_model('crop_model')
+    assert loader.check_for_updates()[0].result(timeout=60) is False
+    assert loader.get_model_version('crop') == 'v2'
+    assert loader.get_model('crop_model') is serving
+    assert loader.get_model_readiness()['crop'] == 'ready'
+
+def test_watcher_does_not_retry_a_failed_version(tmp_path):
+    """Test a group that failed to load is only retried once its source version changes"""
+    broken = tmp_path / 'broken'
+    broken.mkdir()
+    for path in MODEL_FILES['crop']:
+        (broken / Path(path).name).write_bytes(b'not a model')
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish('crop', sorted(broken.iterdir()), version='v1')
+    loader = ModelLoader(mode='lazy', registry=registry)
+    assert not loader.is_model_available('crop_model')
+    assert loader.get_model_readiness()['crop'] == 'failed'
+    assert loader.check_for_updates() == []
+
+    registry.publish('crop', MODEL_FILES['crop'], version='v2', activate=True)
+    assert loader.check_for_updates()[0].result(timeout=60) is True
+    assert loader.get_model_version('crop') == 'v2'
@@ -0,0 +1,49 @@
+"""
+Prediction cache tests
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.prediction_cache import PredictionCache
+
+def test_lru_eviction_and_canonical_keys():
+    """Test equivalent inputs share an entry and the oldest entry is evicted"""
+    cache = PredictionCache(max_entries=2, ttl_seconds=None)
+    cache.set('yield', 'v1', (2000, 'Albania '), {"prediction": 1.0})
+    assert cache.get('yield', 'v1', (2000.0, 'Albania')) == {"prediction": 1.0}
+    assert cache.get('yield', 'v2', (2000, 'Albania')) is None
+
+    cache.set('yield', 'v1', (2001, 'Albania'), {"prediction": 2.0})
+    cache.get('yield', 'v1', (2000, 'Albania'))
+    cache.set('yield', 'v1', (2002, 'Albania'), {"prediction": 3.0})
+    assert cache.get('yield', 'v1', (2001, 'Albania')) is None
+    assert cache.get('yield', 'v1', (2000, 'Albania')) is not None
+
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3
+
+def test_ttl_and_invalidation():
+    """Test entries expire and namespaces can be invalidated"""
+    cache = PredictionCache(max_entries=10, ttl_seconds=0.05)
+    cache.set('crop', 'v1', (1.0,), "rice")
+    cache.set('yield', 'v1', (1.0,), 3.5)
+    cache.invalidate('crop')
+    assert cache.get('crop', 'v1', (1.0,)) is None
+    assert cache.get('yield', 'v1', (1.0,)) == 3.5
+    time.sleep(0.1)
+    assert cache.get('yield', 'v1', (1.0,)) is None
+
+def test_shared_store_between_caches(tmp_path):
+    """Test two caches on the same file (as two workers would) share results"""
+    path = tmp_path / "cache.sqlite"
+    first = PredictionCache(shared_path=path)
+    second = PredictionCache(shared_path=path)
+    first.set('crop', 'v1', (90.0, 42.0), {"prediction": "rice"})
+    assert second.get('crop', 'v1', (90.0, 42.0)) == {"prediction": "rice"}
+    assert second.get_stats()['shared_hits'] == 1
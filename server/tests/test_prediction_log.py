@@ -0,0 +1,77 @@
+"""
+Prediction log and replay tests
+"""
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import src.api.routes as routes
+from src.app import create_app
+from src.utils.prediction_log import PredictionLogger, read_prediction_log, flush_all
+from benchmarks.replay import build_request, in_process_sender, replay, summarize_replay
+
+def log_entry(i, **fields):
+    return {
+        'timestamp': 1000.0 + i, 'endpoint': '/predict-crop', 'query': '', 'status': 200, 'latency_ms': 1.5,
+        'worker': 1, 'model_version': '', 'input_format': 'form', 'inputs': {'pH': str(i)}, 'image_hash': '',
+        'outputs': b'{"model_version": "v2", "crop": "Ma\\u00efs"}', 'stages': [('crop.predict', 0.002)] * 2,
+        **fields
+    }
+
+def test_logger_writes_rotating_npz_segments(tmp_path):
+    """Test entries round-trip through NPZ segments and only the newest files are kept"""
+    logger = PredictionLogger(tmp_path, flush_rows=2, flush_seconds=60, max_files=2)
+    for i in range(5):
+        assert logger.record(log_entry(i, inputs='{"sample": "ñ"}' if i == 4 else {'pH': str(i)}))
+    logger.flush()
+
+    assert len(list(tmp_path.glob("predictions-*.npz"))) == 2
+    log = read_prediction_log([tmp_path])
+    assert log['timestamp'].tolist() == [1002.0, 1003.0, 1004.0]
+    assert log['model_version'].tolist() == ['v2'] * 3
+    assert log['inputs'].iloc[0] == '{"pH": "2"}'
+    assert log['inputs'].iloc[2] == '{"sample": "ñ"}'
+    assert log['stages'].iloc[0] == '{"crop.predict": 4.0}'
+    assert log['status'].dtype == np.int16
+    assert logger.get_stats()['written'] == 5
+
+def test_logged_requests_replay_with_same_predictions(tmp_path, monkeypatch):
+    """Test prediction routes are logged with versions, stages and image hashes, and replay identically"""
+    monkeypatch.setattr(routes, 'PREDICTION_LOG_ENABLED', True)
+    monkeypatch.setattr(routes, 'PREDICTION_LOG_DIR', tmp_path)
+    app = create_app()
+    client = app.test_client()
+
+    sample = {'Nitrogen': 90, 'Phosporus': 42, 'Potassium': 43, 'Temperature': 20.87,
+              'Humidity': 82.0, 'pH': 6.5, 'Rainfall': 202.93}
+    assert client.post('/predict-crop?top_k=2', data=sample).status_code == 200
+    assert client.post('/predict-fertilizer', json={'cropname': 'rice', 'nitrogen': 10,
+                                                    'phosphorous': 20, 'pottasium': 30}).status_code == 200
+    client.post('/predict-disease', data={'image': (io.BytesIO(b'not an image'), 'leaf.jpg')})
+    client.get('/health')
+    flush_all()
+
+    log = read_prediction_log([tmp_path])
+    assert log['endpoint'].tolist() == ['/predict-crop', '/predict-fertilizer', '/predict-disease']
+    crop = log.iloc[0]
+    assert crop['query'] == 'top_k=2'
+    assert crop['model_version'] != ''
+    assert 'crop.predict' in crop['stages'] or 'crop.index_lookup' in crop['stages']
+    assert log['input_format'].tolist() == ['form', 'json', 'form']
+    assert len(log['image_hash'].iloc[2]) == 32
+    assert 'not an image' not in log['inputs'].iloc[2]
+
+    requests = [(row, build_request(row, {})) for row in log.itertuples(index=False)]
+    assert requests[2][1] is None
+    outcomes, elapsed = replay(in_process_sender(app), requests[:2], speed=0, concurrency=2)
+    results = summarize_replay(outcomes, elapsed, skipped=1)
+    assert results['all']['errors'] == 0
+    assert results['/predict-crop']['compared'] == 1
+    assert results['/predict-crop']['predictions_changed'] == 0
+    assert results['/predict-fertilizer']['predictions_changed'] == 0
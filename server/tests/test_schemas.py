@@ -0,0 +1,54 @@
+"""
+Input schema tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.api.schemas import SchemaError, CROP_SCHEMA, YIELD_SCHEMA
+
+CROP_SAMPLE = {'Nitrogen': '90', 'Phosporus': '42', 'Potassium': '43', 'Temperature': '20.87',
+               'Humidity': '82', 'pH': '6.5', 'Rainfall': '202.93'}
+
+def test_parse_reports_every_problem_at_once():
+    """Test a single record gets missing, invalid and out-of-range fields in one error"""
+    features, _ = CROP_SCHEMA.parse(CROP_SAMPLE)
+    assert features.dtype == np.float64
+    assert features.tolist() == [90, 42, 43, 20.87, 82, 6.5, 202.93]
+
+    record = {**CROP_SAMPLE, 'pH': '15', 'Humidity': 'wet', 'Rainfall': ' '}
+    with pytest.raises(SchemaError) as error:
+        CROP_SCHEMA.parse(record)
+    assert error.value.errors == [
+        "Missing required field: Rainfall",
+        "Invalid value for field: Humidity",
+        "Value out of range for field: pH (expected 0 to 14)"
+    ]
+
+def test_batch_rows_match_single_records():
+    """Test columnar parsing gives the same values and messages as single records"""
+    records = [
+        {'Year': 2000, 'average_rain_fall_mm_per_year': 1485, 'pesticides_tonnes': 121, 'avg_temp': 16.37,
+         'Area': 'Albania', 'Item': 'Maize'},
+        {'Year': 2000.5, 'average_rain_fall_mm_per_year': -1, 'pesticides_tonnes': 121, 'avg_temp': 16.37,
+         'Area': 'Atlantis', 'Item': 'Maize'},
+    ]
+    choices = {'Area': {'Albania'}, 'Item': {'Maize'}}
+    numeric, text, row_errors = YIELD_SCHEMA.parse_batch(pd.DataFrame(records), choices=choices)
+
+    single, single_text = YIELD_SCHEMA.parse(records[0], choices=choices)
+    assert np.array_equal(numeric[0], single)
+    assert text['Area'][0] == single_text['Area']
+    assert row_errors[0] is None
+
+    with pytest.raises(SchemaError) as error:
+        YIELD_SCHEMA.parse(records[1], choices=choices)
+    assert sorted(row_errors[1].split("; ")) == sorted(error.value.errors)
+    assert "Unknown Area: Atlantis" in row_errors[1]
@@ -0,0 +1,53 @@
+"""
+Offline bulk scoring tests
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from score import score_file
+
+def test_crop_scoring_matches_single_and_multiprocess(tmp_path):
+    """Test chunked crop scoring keeps row order and errors, with and without workers"""
+    rows = [
+        {"Nitrogen": 90, "Phosporus": 42, "Potassium": 43, "Temperature": 20.8, "Humidity": 82, "pH": 6.5, "Rainfall": 202.9},
+        {"Nitrogen": 20, "Phosporus": 67, "Potassium": 19, "Temperature": 24.6, "Humidity": 64, "pH": "abc", "Rainfall": 60.3},
+        {"Nitrogen": 40, "Phosporus": 72, "Potassium": 77, "Temperature": 17.0, "Humidity": 16, "pH": 7.5, "Rainfall": 88.5},
+    ] * 5
+    source = tmp_path / "samples.csv"
+    pd.DataFrame(rows).to_csv(source, index=False)
+
+    assert score_file('crop', str(source), str(tmp_path / "single.csv.gz"), chunk_rows=4, top_k_classes=3) == (15, 5)
+    assert score_file('crop', str(source), str(tmp_path / "pool.csv"), chunk_rows=4, workers=2) == (15, 5)
+
+    single = pd.read_csv(tmp_path / "single.csv.gz")
+    pooled = pd.read_csv(tmp_path / "pool.csv")
+    assert len(single) == 15
+    assert single['prediction'].iloc[::3].nunique() == 1
+    assert single['error'].iloc[1] == "Invalid value for field: pH"
+    assert single['prediction'].fillna('').tolist() == pooled['prediction'].fillna('').tolist()
+    assert (single['crop_1'].dropna() == single['prediction'].dropna()).all()
+    assert (single['probability_1'].dropna() >= single['probability_2'].dropna()).all()
+    assert 'crop_2' not in pooled.columns
+
+def test_fertilizer_scoring_writes_ndjson(tmp_path):
+    """Test fertilizer scoring applies the endpoint's validation rules"""
+    source = tmp_path / "soil.csv"
+    pd.DataFrame({
+        "cropname": ["rice", "maize", "unknown"],
+        "nitrogen": [10, 50, 1],
+        "phosphorous": [20, 12.5, 3],
+        "pottasium": [30, 40, 1]
+    }).to_csv(source, index=False)
+
+    assert score_file('fertilizer', str(source), str(tmp_path / "out.ndjson")) == (3, 2)
+    results = pd.read_json(tmp_path / "out.ndjson", lines=True)
+    assert results['recommendation_key'].iloc[0] == "Nlow"
+    assert results['N_diff'].iloc[0] == 70
+    assert results['error'].iloc[1] == "Invalid value for field: phosphorous"
+    assert results['error'].iloc[2] == "Crop 'unknown' not found in database"
@@ -0,0 +1,41 @@
+"""
+TFLite backend tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+tf = pytest.importorskip("tensorflow")
+
+from src.utils.tflite_backend import TFLiteModel, convert_keras_model, parity_check
+
+@pytest.fixture(scope="module")
+def keras_model():
+    """Small CNN with the disease model's input and output layout"""
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(32, 32, 3)),
+        tf.keras.layers.Rescaling(1 / 255.0),
+        tf.keras.layers.Conv2D(4, 3, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(38, activation='softmax')
+    ])
+
+@pytest.mark.parametrize("quantization", ["none", "dynamic"])
+def test_converted_model_matches_keras(keras_model, tmp_path, quantization):
+    """Test the TFLite model serves through predict with the Keras model's outputs"""
+    path = tmp_path / "model.tflite"
+    path.write_bytes(convert_keras_model(keras_model, quantization))
+    tflite_model = TFLiteModel(path)
+    assert tflite_model.input_shape == (None, 32, 32, 3)
+
+    samples = np.random.default_rng(0).uniform(0, 255, (12, 32, 32, 3)).astype(np.float32)
+    report = parity_check(keras_model, tflite_model, samples, batch_size=5)
+    assert report['top1_agreement'] >= 0.9
+    assert tflite_model.predict(samples[:3]).shape == (3, 38)
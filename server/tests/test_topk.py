@@ -0,0 +1,41 @@
+"""
+Top-k ranking tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.topk import as_probabilities, calibrate, ranked_predictions, top_k
+
+def test_top_k_matches_argmax_and_orders_rows():
+    """Test top-k is sorted per row and its first entry matches argmax, ties included"""
+    scores = np.array([[0.1, 0.6, 0.3], [0.4, 0.2, 0.4]])
+    indices, values = top_k(scores, 2)
+    assert indices.tolist() == [[1, 2], [0, 2]]
+    assert values.tolist() == [[0.6, 0.3], [0.4, 0.4]]
+    assert indices[:, 0].tolist() == scores.argmax(axis=1).tolist()
+    assert top_k(scores, 10)[0].shape == (2, 3)
+
+def test_logits_are_softmaxed_and_temperature_softens():
+    """Test logits become distributions and a temperature above 1 lowers the top probability"""
+    probabilities = as_probabilities(np.array([[2.0, 1.0, -1.0]]))
+    assert np.allclose(probabilities.sum(axis=1), 1.0)
+    assert np.array_equal(as_probabilities(probabilities), probabilities)
+
+    softened = calibrate(probabilities, temperature=2.0)
+    assert softened[0, 0] < probabilities[0, 0]
+    assert softened.argmax() == probabilities.argmax()
+
+def test_ranked_predictions_label_confidence():
+    """Test each row gets labelled candidates and a confidence bucket"""
+    rows = ranked_predictions(np.array([[0.9, 0.1], [0.45, 0.55], [0.35, 0.65]]), ['rice', 'maize'],
+                              k=2, label_key='crop', high=0.8, medium=0.6)
+    assert rows[0]["confidence"] == "High"
+    assert rows[1]["confidence"] == "Low"
+    assert rows[2]["confidence"] == "Medium"
+    assert rows[1]["top_k"] == [{"crop": "maize", "probability": 0.55}, {"crop": "rice", "probability": 0.45}]
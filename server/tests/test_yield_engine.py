@@ -0,0 +1,53 @@
+"""
+Compiled yield engine tests
+"""
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import YIELD_MODEL_PATH, YIELD_PREPROCESSOR_PATH
+from src.utils.yield_engine import CompiledYieldModel
+
+@pytest.fixture(scope="module")
+def yield_models():
+    """Load the sklearn yield models and compile them"""
+    preprocessor = joblib.load(YIELD_PREPROCESSOR_PATH)
+    model = joblib.load(YIELD_MODEL_PATH)
+    return preprocessor, model, CompiledYieldModel.from_sklearn(preprocessor, model)
+
+def random_yield_rows(preprocessor, n_rows, seed=0):
+    """Generate random yield inputs covering every category"""
+    rng = np.random.default_rng(seed)
+    areas, items = preprocessor.named_transformers_['OneHotEncode'].categories_
+    rows = np.empty((n_rows, 6), dtype=object)
+    rows[:, 0] = rng.integers(1990, 2014, n_rows)
+    rows[:, 1] = rng.uniform(50, 3300, n_rows)
+    rows[:, 2] = rng.uniform(0, 370000, n_rows)
+    rows[:, 3] = rng.uniform(1, 31, n_rows)
+    rows[:, 4] = rng.choice(areas, n_rows)
+    rows[:, 5] = rng.choice(items, n_rows)
+    return rows
+
+def test_compiled_predictions_match_sklearn(yield_models):
+    """Test batch and single-row compiled predictions are identical to sklearn"""
+    preprocessor, model, engine = yield_models
+    rows = random_yield_rows(preprocessor, 2000)
+    expected = model.predict(preprocessor.transform(rows))
+
+    numeric = rows[:, :4].astype(np.float64)
+    np.testing.assert_array_equal(engine.predict(numeric, rows[:, 4], rows[:, 5]), expected)
+    for row, value in zip(rows[:200], expected[:200]):
+        assert engine.predict_one(*row) == value
+
+def test_unknown_category_raises(yield_models):
+    """Test unknown categories are rejected like the OneHotEncoder does"""
+    _, _, engine = yield_models
+    with pytest.raises(ValueError):
+        engine.predict_one(2000, 1485.0, 121.0, 16.37, 'Atlantis', 'Maize')